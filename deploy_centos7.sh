@@ -127,6 +127,17 @@ access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
 
 proc_name = "ssq_webapp"
 daemon = False
+
+# 预加载应用：master 进程中只加载一次开奖数据和预计算结果，
+# worker fork 后以写时复制方式共享，不再各自加载一份（见 when_ready）
+preload_app = True
+graceful_timeout = 30
+
+
+def when_ready(server):
+    """master 就绪后、fork worker 前加载数据快照"""
+    from web_app import preload_analyzer
+    preload_analyzer()
 EOF
 GUNICORN_EOF
 
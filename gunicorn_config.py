@@ -38,8 +38,15 @@ daemon = False
 # 临时目录
 tmp_upload_dir = None
 
-# 预加载应用（提高性能，但会增加内存使用）
-preload_app = False
+# 预加载应用：master 进程中只加载一次开奖数据和预计算结果，
+# worker fork 后以写时复制方式共享，不再各自加载一份（见 when_ready）
+preload_app = True
 
 # Worker 超时设置
 graceful_timeout = 30
+
+
+def when_ready(server):
+    """master 就绪后、fork worker 前加载数据快照"""
+    from web_app import preload_analyzer
+    preload_analyzer()
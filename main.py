@@ -16,6 +16,7 @@
 3. 生成完整的数据文件和分析报告
 """
 
+import argparse
 import os
 import sys
 import time
@@ -24,6 +25,7 @@ from datetime import datetime, timezone, timedelta
 sys.path.append('scripts')
 from scripts.super_lotto_analyzer import SuperLottoAnalyzer
 from scripts.lottery_analyzer import DoubleColorBallAnalyzer
+from scripts.plotting import ChartRenderer
 
 def create_directories():
     """创建必要的目录结构"""
@@ -53,8 +55,8 @@ def show_disclaimer():
     print("• 使用本软件产生的任何后果由用户自行承担")
     print("=" * 80)
 
-def run_lottery_analyzer(unified_timestamp=None):
-    """运行双色球分析器"""
+def run_lottery_analyzer(unified_timestamp=None, renderer=None, resume=False):
+    """运行双色球分析器（给出 renderer 时图表提交到后台进程池渲染，resume 时从完整抓取的断点继续）"""
     print("\n" + "=" * 60)
     print("🔴 开始运行双色球数据分析...")
     print("=" * 60)
@@ -63,9 +65,9 @@ def run_lottery_analyzer(unified_timestamp=None):
         analyzer = DoubleColorBallAnalyzer()
 
         # 初始化并增量更新历史数据（优先复用已有数据，必要时完整抓取一次）
-        analyzer.init_and_update_history()
+        analyzer.init_and_update_history(resume=resume)
         
-        if not analyzer.lottery_data:
+        if len(analyzer.draw_store) == 0:
             print("❌ 双色球数据获取失败")
             return False
         
@@ -81,7 +83,7 @@ def run_lottery_analyzer(unified_timestamp=None):
 
         # 生成图表和报告
         try:
-            analyzer.visualize_frequency()
+            analyzer.visualize_frequency(renderer=renderer)
         except Exception as e:
             print(f"⚠️  双色球图表生成失败: {e}")
         
@@ -100,8 +102,8 @@ def run_lottery_analyzer(unified_timestamp=None):
         print(f"❌ 双色球分析出错: {e}")
         return False
 
-def run_super_lotto_analyzer(unified_timestamp=None):
-    """运行大乐透分析器"""
+def run_super_lotto_analyzer(unified_timestamp=None, renderer=None, resume=False):
+    """运行大乐透分析器（给出 renderer 时图表提交到后台进程池渲染，resume 时从完整抓取的断点继续）"""
     print("\n" + "=" * 60)
     print("🔵 开始运行大乐透数据分析...")
     print("=" * 60)
@@ -115,12 +117,11 @@ def run_super_lotto_analyzer(unified_timestamp=None):
         else:
             print("🔄 将使用传统requests模式获取数据")
         
-        # 获取最大页数并抓取数据
-        max_pages = analyzer.get_max_pages()
-        analyzer.fetch_lottery_data(max_pages=max_pages)
-        analyzer.save_data()
+        # 载入已有数据并增量更新（遇到已保存的期号即停止翻页），浏览器会话在 with 块结束时关闭
+        with analyzer:
+            analyzer.init_and_update_history(resume=resume)
         
-        if not analyzer.lottery_data:
+        if len(analyzer.draw_store) == 0:
             print("❌ 大乐透数据获取失败")
             return False
         
@@ -132,7 +133,7 @@ def run_super_lotto_analyzer(unified_timestamp=None):
         
         # 生成图表和报告
         try:
-            analyzer.visualize_frequency()
+            analyzer.visualize_frequency(renderer=renderer)
         except Exception as e:
             print(f"⚠️  大乐透图表生成失败: {e}")
         
@@ -156,8 +157,12 @@ def run_super_lotto_analyzer(unified_timestamp=None):
         traceback.print_exc()
         return False
 
-def main():
+def main(argv=None):
     """主函数"""
+    parser = argparse.ArgumentParser(description="彩票数据分析统一入口")
+    parser.add_argument("--resume", action="store_true", help="从上次中断的完整抓取断点继续，只抓取缺少的页")
+    args = parser.parse_args(argv)
+    
     start_time = time.time()
     
     # 生成统一的时间戳（UTC+8）
@@ -172,10 +177,12 @@ def main():
     # 创建目录结构
     create_directories()
     
-    # 运行分析器（传入统一时间戳）
-    lottery_success = run_lottery_analyzer(unified_timestamp)
-    # super_lotto_success = run_super_lotto_analyzer(unified_timestamp)
+    # 运行分析器（传入统一时间戳）；频率图表在后台进程池中渲染，与报告生成并行
+    renderer = ChartRenderer()
+    lottery_success = run_lottery_analyzer(unified_timestamp, renderer, args.resume)
+    # super_lotto_success = run_super_lotto_analyzer(unified_timestamp, renderer, args.resume)
     super_lotto_success = False
+    renderer.wait()
     
     # 总结结果
     end_time = time.time()
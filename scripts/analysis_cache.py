@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析结果快照缓存
+
+同一份历史数据在一次运行中会被多处重复分析：
+分析报告、聚合数据文件、README 推荐、增强版方案以及 Web 端每个请求
+都会调用 generate_recommendations 和频率/规律统计。
+
+AnalysisSnapshot 以 (玩法, 期数, 最新期号) 作为数据集版本标识，
+同一版本上的分析结果只计算一次，之后所有调用方直接读取。
+数据集版本变化（例如增量抓取合并了新开奖）时快照自动失效。
+"""
+
+import copy
+
+
+def dataset_key(store):
+    """数据集版本标识：(玩法, 期数, 最新期号)"""
+    return (store.game.name, len(store), store.latest_period)
+
+
+class AnalysisSnapshot:
+    """某一数据集版本上的分析结果缓存"""
+
+    def __init__(self, key):
+        self.key = key
+        self._values = {}
+
+    def __contains__(self, name):
+        return name in self._values
+
+    def memoize(self, name, compute, copy_result=True):
+        """
+        读取缓存的分析结果，未命中时调用 compute() 计算并保存。
+
+        默认返回深拷贝，调用方修改返回值（例如给推荐结果补充 history_score）
+        不会污染缓存；不可变结果（如 DrawStats）可以传 copy_result=False 直接共享。
+        """
+        if name not in self._values:
+            self._values[name] = compute()
+        value = self._values[name]
+        return copy.deepcopy(value) if copy_result else value
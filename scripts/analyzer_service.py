@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web 端分析器服务：后台刷新 + 原子替换
+
+请求线程只读取“当前分析器快照”，从不等待官方接口：
+1. 首次访问时只从本地数据文件加载（二进制快照 + 追加日志），不联网
+2. 后台线程每隔 check_interval 秒检查数据文件（JSON / 追加日志）是否变化，
+   变化时在后台加载一个新的分析器，加载完成后一次性替换引用
+3. 每隔 sync_interval 秒做一次增量同步（开奖日历感知，多数时候不联网）；
+   多个 gunicorn worker 之间用文件锁选出一个执行同步，
+   同步写入数据文件后，其余 worker 通过第 2 步在几秒内看到新数据
+
+已发布的分析器不再修改数据（增量同步在新建的实例上进行），
+因此请求处理过程中拿到的快照始终完整一致。
+
+多 worker 部署（gunicorn preload_app）时可在 master 进程中调用 preload()：
+数据与预计算的统计只加载一次，fork 出的 worker 以写时复制方式共享，
+开奖数组本身来自二进制快照的 mmap，各进程共用同一份页缓存。
+写时复制的共享只持续到第一次热替换：数据更新后每个 worker 各自重新加载分析器。
+"""
+
+import gc
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，每个进程各自同步
+    fcntl = None
+
+try:
+    from scripts.draw_journal import journal_path
+except ImportError:  # 直接在 scripts/ 目录下运行本脚本时
+    from draw_journal import journal_path
+
+
+class AnalyzerService:
+    """持有当前分析器快照，并在后台线程中刷新"""
+
+    def __init__(self, factory, data_path="data/lottery_data.json",
+                 backup_path="data/initial_backup/lottery_data_initial.json",
+                 check_interval=5, sync_interval=1800):
+        self.factory = factory
+        self.data_path = data_path
+        self.backup_path = backup_path
+        self.check_interval = check_interval
+        self.sync_interval = sync_interval
+        self._analyzer = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._last_sync = 0.0
+
+    def _files_signature(self):
+        """数据文件和追加日志的 (修改时间, 大小)，任何一个变化都说明有新数据"""
+        signature = []
+        for path in (self.data_path, journal_path(self.data_path)):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load_from_disk(self):
+        """只从本地文件加载一个新的分析器（不联网）"""
+        signature = self._files_signature()
+        analyzer = self.factory()
+        analyzer.load_data(self.data_path)
+        return analyzer, signature
+
+    def _publish(self, analyzer, signature):
+        """原子替换当前快照"""
+        self._analyzer = analyzer
+        self._signature = signature
+
+    def current(self):
+        """当前分析器快照；首次调用时从本地文件加载并启动后台刷新线程"""
+        analyzer = self._analyzer
+        if analyzer is None:
+            with self._lock:
+                if self._analyzer is None:
+                    self._publish(*self._load_from_disk())
+                analyzer = self._analyzer
+        self.start()
+        return analyzer
+
+    def preload(self, warm=None):
+        """
+        在 fork worker 之前（gunicorn master 中）加载数据并预计算。
+        - warm: 可选回调 warm(analyzer)，用于预先计算统计、推荐等结果
+
+        不启动后台线程（线程不会随 fork 进入 worker，worker 首次请求时各自启动）；
+        加载完成后冻结垃圾回收跟踪的对象，避免 worker 中的 GC 扫描触碰这些页面导致复制。
+        """
+        with self._lock:
+            analyzer, signature = self._load_from_disk()
+            if warm is not None:
+                warm(analyzer)
+            self._publish(analyzer, signature)
+        gc.freeze()
+        print(f"📦 已预加载数据快照：共 {len(analyzer.draw_store)} 期，worker 将共享该快照")
+        return analyzer
+
+    def start(self):
+        """启动后台刷新线程（fork 出的新进程中会重新启动）"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="analyzer-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # 没有本地数据时立即同步一次（首次部署），否则等到下一个同步周期
+        self._last_sync = time.monotonic()
+        if self._analyzer is None or len(self._analyzer.draw_store) == 0:
+            self._safe(self.sync_once)
+        while not self._stop.wait(self.check_interval):
+            if time.monotonic() - self._last_sync >= self.sync_interval:
+                self._last_sync = time.monotonic()
+                self._safe(self.sync_once)
+            self._safe(self.reload_if_changed)
+
+    @staticmethod
+    def _safe(step):
+        try:
+            step()
+        except Exception as e:
+            print(f"⚠️  后台刷新出错: {e}")
+
+    def reload_if_changed(self):
+        """数据文件变化时在后台加载新快照并替换，返回是否替换"""
+        if self._files_signature() == self._signature:
+            return False
+        analyzer, signature = self._load_from_disk()
+        self._publish(analyzer, signature)
+        print(f"🔄 已切换到新的数据快照：共 {len(analyzer.draw_store)} 期，最新期号 {analyzer.draw_store.latest_period}")
+        return True
+
+    def sync_once(self):
+        """
+        在新建的分析器上做一次增量同步并发布。
+        多进程部署时只有拿到文件锁的进程执行，其余进程跳过，等待数据文件变化。
+        """
+        lock_file = None
+        if fcntl is not None:
+            lock_path = os.path.splitext(self.data_path)[0] + '.sync.lock'
+            os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+            lock_file = open(lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        try:
+            analyzer = self.factory()
+            analyzer.init_and_update_history(data_path=self.data_path, backup_path=self.backup_path)
+            self._publish(analyzer, self._files_signature())
+            return True
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
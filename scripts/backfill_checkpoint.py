@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+完整抓取（回填）断点
+
+从头抓取全部历史要翻几十页、耗时数分钟，以前只在最后一次性保存，中途断网就得从头再来。
+BackfillCheckpoint 把每一页解析好的记录在到达时追加写入 data/<name>.backfill.jsonl：
+1. 第一行是头部 {"page_size", "total"}，之后每行一页 {"page", "records"}
+2. 继续抓取（--resume）时，先用最新的第 1 页校验断点：接口按期号从新到旧分页，
+   中断期间有新开奖时所有记录整体后移，按新旧总数之差重新对齐页码；
+   第 1 页中的旧记录必须与断点逐期一致，否则断点作废、从头抓取
+3. 全部页到齐且记录数与接口总数一致时删除断点文件，否则保留以便下次继续；
+   抓取结束后断点仍在，说明只抓到了部分历史，调用方不应把结果当作完整历史保存
+
+写入方式与追加日志（draw_journal.py）相同：每页追加后落盘，残缺的末行读取时忽略。
+"""
+
+import json
+import os
+
+try:
+    from scripts.draw_journal import atomic_write
+except ImportError:  # 直接在 scripts/ 目录下运行本脚本时
+    from draw_journal import atomic_write
+
+
+def checkpoint_path(json_path):
+    """JSON 数据文件对应的断点路径：data/lottery_data.json -> data/lottery_data.backfill.jsonl"""
+    return os.path.splitext(json_path)[0] + '.backfill.jsonl'
+
+
+def rebase_pages(meta, pages, page_size, first_records, total):
+    """
+    把断点中已完成的页对齐到接口当前的分页。
+    - meta / pages: 断点头部与 {页码: 记录列表}
+    - first_records / total: 刚抓取的第 1 页记录与接口当前的总记录数
+    返回按当前页码排列的 {页码: 记录列表}（只含完整的页，第 1 页用最新数据）；
+    pageSize 变化、断点缺第 1 页或重叠部分的期号不一致时返回 None。
+    """
+    if meta is None or meta.get('page_size') != page_size or 1 not in pages:
+        return None
+    old_total = int(meta.get('total') or 0)
+    shift = total - old_total  # 中断期间新增的开奖期数
+    if shift < 0 or shift >= len(first_records):
+        return None
+
+    # 按位置展开断点中的记录，条数不完整的页视为未完成
+    positions = [None] * old_total
+    for page, records in pages.items():
+        start = (page - 1) * page_size
+        expected = min(page_size, old_total - start)
+        if expected > 0 and len(records) == expected:
+            positions[start:start + expected] = records
+    positions = list(first_records[:shift]) + positions
+
+    # 重叠校验：第 1 页中除新开奖外的记录必须与断点中同位置的记录一致
+    for fresh, saved in zip(first_records[shift:], positions[shift:]):
+        if saved is None or fresh['period'] != saved['period']:
+            return None
+
+    rebased = {}
+    for page in range(1, -(-total // page_size) + 1):
+        chunk = positions[(page - 1) * page_size:page * page_size]
+        if chunk and all(rec is not None for rec in chunk):
+            rebased[page] = chunk
+    rebased[1] = list(first_records)
+    return rebased
+
+
+class BackfillCheckpoint:
+    """某个数据文件的完整抓取断点"""
+
+    def __init__(self, json_path):
+        self.path = checkpoint_path(json_path)
+
+    def exists(self):
+        """是否留有上次未完成的断点"""
+        return os.path.exists(self.path)
+
+    def read(self):
+        """读取断点，返回 (头部, {页码: 记录列表})；文件不存在或缺少头部时头部为 None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return None, {}
+
+        meta, pages = None, {}
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            if meta is None and 'page_size' in entry:
+                meta = entry
+            elif isinstance(entry.get('page'), int) and isinstance(entry.get('records'), list):
+                pages[entry['page']] = entry['records']
+        return meta, pages
+
+    def begin(self, page_size, first_records, total, resume=False):
+        """
+        开始（或继续）一次完整抓取，返回已完成的 {页码: 记录列表}（至少含第 1 页）。
+        - resume: 为 True 时尝试复用已有断点，否则重新开始
+        断点文件随即按当前分页重写。
+        """
+        pages = None
+        if resume:
+            meta, saved = self.read()
+            if meta is None:
+                print(f"📭 没有找到可用的断点 {self.path}，从头开始抓取")
+            else:
+                pages = rebase_pages(meta, saved, page_size, first_records, total)
+                if pages is None:
+                    print("⚠️  断点与接口最新数据对不上（pageSize 变化或期号不一致），从头开始抓取")
+                else:
+                    print(f"♻️  从断点继续：已完成 {len(pages)} 页")
+        if pages is None:
+            pages = {1: list(first_records)}
+
+        lines = [json.dumps({'page_size': page_size, 'total': total})]
+        lines.extend(json.dumps({'page': page, 'records': records}, ensure_ascii=False)
+                     for page, records in sorted(pages.items()))
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        atomic_write(self.path, ('\n'.join(lines) + '\n').encode('utf-8'))
+        return pages
+
+    def add_page(self, page, records):
+        """追加一页记录并落盘"""
+        line = json.dumps({'page': page, 'records': records}, ensure_ascii=False) + '\n'
+        with open(self.path, 'ab+') as f:
+            # 上次写入中断留下的残行：先补一个换行，避免与新记录粘在一起
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    line = '\n' + line
+            f.write(line.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def finish(self, pages, page_count, total):
+        """
+        抓取结束时调用：全部页到齐且记录数与接口总数一致时删除断点并返回 True，
+        否则保留断点供 --resume 继续，返回 False。
+        """
+        missing = [page for page in range(1, page_count + 1) if page not in pages]
+        if missing:
+            print(f"💾 还有 {len(missing)} 页未完成，断点已保存到 {self.path}，可使用 --resume 继续")
+            return False
+        periods = {rec['period'] for records in pages.values() for rec in records}
+        if total and len(periods) != total:
+            print(f"⚠️  抓取到 {len(periods)} 期，与接口总数 {total} 不一致，断点保留在 {self.path}")
+            return False
+        self.clear()
+        return True
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
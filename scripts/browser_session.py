@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+长驻的无头浏览器会话（DrissionPage）
+
+官方接口对普通 requests 偶尔返回 567（反爬），浏览器环境可以绕过。
+BrowserSession 把浏览器当作“带反爬令牌的 HTTP 客户端”来用：
+1. 只启动一次 Chromium，在接口所在的源上打开一次页面（预热 cookie / 令牌），
+   之后的请求都是同源的页面内 fetch，不再逐页导航
+2. 一次 run_js 用 Promise.all 并发发出多页请求，直接等待响应结果，
+   不再固定 sleep 等待页面加载，也不再从 HTML 中提取 JSON
+3. 失败的请求重新预热后重试，退避时间只在重试时产生
+4. 与 requests 抓取器共用接口主机的自适应限速器和熔断器（fetchers.host_controls），
+   每批请求前等待放行，响应的状态码反馈给两者
+5. 作为上下文管理器使用，with 块结束时关闭浏览器；进程退出时兜底关闭
+
+DrissionPage 为可选依赖，只在 start() 时导入。
+"""
+
+import atexit
+import time
+
+try:
+    from scripts.fetchers import FAILED, OK, THROTTLED, classify_status, host_controls, report_outcome
+except ImportError:  # 直接在 scripts/ 目录下运行本脚本时
+    from fetchers import FAILED, OK, THROTTLED, classify_status, host_controls, report_outcome
+
+# 页面内并发 fetch：arguments[0] 为 URL 列表，arguments[1] 为单个请求的超时毫秒数。
+# 每个请求返回解析后的 JSON，HTTP 错误返回 {__status}，网络错误 / 超时返回 {__error}
+FETCH_JSON_JS = """
+const urls = arguments[0], timeoutMs = arguments[1];
+return Promise.all(urls.map(url => {
+    const controller = new AbortController();
+    const timer = setTimeout(() => controller.abort(), timeoutMs);
+    return fetch(url, {credentials: 'include', signal: controller.signal})
+        .then(response => response.ok ? response.json() : {__status: response.status})
+        .catch(error => ({__error: String(error)}))
+        .finally(() => clearTimeout(timer));
+}));
+"""
+
+
+class BrowserSession:
+    """复用同一个已预热的浏览器标签页，批量并发请求 JSON 接口"""
+
+    def __init__(self, warm_url, user_agent=None, max_concurrency=6, timeout=30, max_retries=3,
+                 rate_limit=0.0, max_rate=None):
+        self.warm_url = warm_url
+        self.user_agent = user_agent
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = timeout
+        self.max_retries = max_retries
+        # 接口主机共享限速器的初始速率（次/秒），0 为不限速；熔断器始终生效
+        self.rate_limit = rate_limit
+        self.max_rate = max_rate
+        self.browser = None
+        self.tab = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        """启动浏览器并预热（已启动时直接返回）"""
+        if self.tab is not None:
+            return self
+        from DrissionPage import Chromium, ChromiumOptions
+
+        options = ChromiumOptions()
+        options.headless(True)  # 无头模式，适合服务器环境
+        options.set_argument('--no-sandbox')
+        options.set_argument('--disable-dev-shm-usage')
+        options.set_argument('--disable-gpu')
+        options.set_argument('--disable-extensions')
+        options.set_argument('--disable-plugins')
+        options.set_argument('--disable-images')  # 禁用图片加载，提高速度
+        if self.user_agent:
+            options.set_user_agent(self.user_agent)
+
+        print(f"🚀 正在启动浏览器... (User-Agent: {(self.user_agent or '默认')[:50]}...)")
+        self.browser = Chromium(options)
+        self.tab = self.browser.latest_tab
+        atexit.register(self.close)
+        self.warm()
+        print("✅ 浏览器启动成功")
+        return self
+
+    def warm(self):
+        """在接口所在的源上打开一次页面，之后的 fetch 为同源请求并携带该源的 cookie"""
+        self.tab.get(self.warm_url, retry=3, interval=2, timeout=self.timeout)
+        self.tab.wait.doc_loaded(timeout=self.timeout)
+
+    def _fetch_batch(self, urls):
+        """返回 [(JSON 或 None, 请求结果分类)]，分类用于反馈给限速器与熔断器；格式不对的结果视为故障"""
+        results = self.tab.run_js(FETCH_JSON_JS, urls, self.timeout * 1000, timeout=self.timeout + 5)
+        if not isinstance(results, list) or len(results) != len(urls):
+            return [(None, FAILED)] * len(urls)
+        batch = []
+        for r in results:
+            if not isinstance(r, dict):
+                batch.append((None, FAILED))
+            elif '__status' in r:
+                batch.append((None, classify_status(r['__status'])))
+            elif '__error' in r:
+                # AbortController 超时中止视为限流，其余网络错误视为故障
+                batch.append((None, THROTTLED if 'Abort' in r['__error'] else FAILED))
+            else:
+                batch.append((r, OK))
+        return batch
+
+    def _wait_turn(self, limiter, breaker, count):
+        """等待熔断器放行，并从限速器预约 count 个请求"""
+        delay = breaker.acquire()
+        while delay > 0:
+            time.sleep(delay)
+            delay = breaker.acquire()
+        if limiter is not None:
+            delay = max(limiter.reserve() for _ in range(count))
+            if delay > 0:
+                time.sleep(delay)
+
+    def fetch_json(self, urls):
+        """
+        并发请求多个 URL（每批最多 max_concurrency 个），按输入顺序返回解析后的 JSON；
+        重试 max_retries 次后仍失败的位置为 None。
+        """
+        urls = list(urls)
+        limiter, breaker = host_controls(self.warm_url, self.rate_limit, max_rate=self.max_rate)
+        results = [None] * len(urls)
+        pending = list(range(len(urls)))
+        for attempt in range(self.max_retries):
+            if attempt > 0:
+                # 失败多为令牌过期或 567 反爬：退避后重新预热再重试
+                delay = 2 ** attempt
+                print(f"⏳ {len(pending)} 个请求失败，{delay} 秒后重新预热并重试 (第 {attempt + 1}/{self.max_retries} 次)")
+                time.sleep(delay)
+                try:
+                    self.warm()
+                except Exception as e:
+                    print(f"⚠️  浏览器重新预热失败: {e}")
+            failed = []
+            for start in range(0, len(pending), self.max_concurrency):
+                batch = pending[start:start + self.max_concurrency]
+                batch_results = [(None, FAILED)] * len(batch)
+                sent_at = None
+                try:
+                    self._wait_turn(limiter, breaker, len(batch))
+                    sent_at = time.monotonic()
+                    batch_results = self._fetch_batch([urls[i] for i in batch])
+                except Exception as e:
+                    print(f"⚠️  页面内请求出错: {e}")
+                finally:
+                    # 请求已发出就一定反馈结果（出错视为故障），否则半开的熔断器一直等待探测结果
+                    if sent_at is not None:
+                        for _, outcome in batch_results:
+                            report_outcome(limiter, breaker, outcome, sent_at)
+                for i, (data, outcome) in zip(batch, batch_results):
+                    if data is None:
+                        failed.append(i)
+                    else:
+                        results[i] = data
+            pending = failed
+            if not pending:
+                break
+        return results
+
+    def close(self):
+        """关闭浏览器（可重复调用）"""
+        browser, self.browser, self.tab = self.browser, None, None
+        if browser is None:
+            return
+        atexit.unregister(self.close)
+        try:
+            browser.quit()
+            print("🔒 浏览器已关闭")
+        except Exception as e:
+            print(f"⚠️  关闭浏览器时出错: {e}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+开奖日历
+
+双色球每周二、四、日开奖，大乐透每周一、三、六开奖，开奖时间均为北京时间 21:15 左右。
+增量同步前先根据日历判断自最新一期以来是否可能有新开奖：
+不可能有时直接跳过，不发起任何网络请求。
+
+说明：春节等休市期间虽然是开奖日但不开奖，此时日历判断为“可能有新开奖”，
+由后续一次轻量的最新期号检查兜底。
+"""
+
+from datetime import datetime, timedelta, timezone
+
+# 北京时间（GitHub Actions 等环境默认使用 UTC）
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+# 开奖星期（Monday == 0）
+SSQ_DRAW_WEEKDAYS = (1, 3, 6)  # 周二、周四、周日
+DLT_DRAW_WEEKDAYS = (0, 2, 5)  # 周一、周三、周六
+
+# 开奖时间（北京时间）
+DRAW_TIME = (21, 15)
+
+
+def beijing_now():
+    """当前北京时间"""
+    return datetime.now(BEIJING_TZ)
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+
+def draw_datetime(draw_date):
+    """某个开奖日的开奖时刻（北京时间）"""
+    return datetime.combine(_to_date(draw_date), datetime.min.time(), BEIJING_TZ).replace(
+        hour=DRAW_TIME[0], minute=DRAW_TIME[1]
+    )
+
+
+def draw_dates_since(latest_date, weekdays, now=None):
+    """
+    返回 latest_date 之后（不含）到 now 为止已经过了开奖时间的开奖日列表。
+    - latest_date: 已有数据的最新开奖日期（'YYYY-MM-DD' 或 date）
+    - weekdays: 开奖星期，例如 SSQ_DRAW_WEEKDAYS
+    - now: 北京时间的当前时刻，默认取系统时间
+    """
+    now = now or beijing_now()
+    if now.tzinfo is not None:
+        now = now.astimezone(BEIJING_TZ)
+    day = _to_date(latest_date) + timedelta(days=1)
+    today = now.date()
+
+    dates = []
+    while day <= today:
+        if day.weekday() in weekdays:
+            if day < today or (now.hour, now.minute) >= DRAW_TIME:
+                dates.append(day)
+        day += timedelta(days=1)
+    return dates
+
+
+def next_draw_datetime(weekdays, now=None):
+    """now 之后最近一次开奖时刻（北京时间）"""
+    now = now or beijing_now()
+    if now.tzinfo is not None:
+        now = now.astimezone(BEIJING_TZ)
+    day = now.date()
+    while True:
+        if day.weekday() in weekdays:
+            moment = draw_datetime(day)
+            if moment > now:
+                return moment
+        day += timedelta(days=1)
+
+
+def draw_possible_since(latest_date, weekdays, now=None):
+    """自 latest_date 以来是否可能已有新的开奖"""
+    return bool(draw_dates_since(latest_date, weekdays, now))
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+开奖数据流式导出
+
+按块直接从列式存储（draw_store.py）切片生成输出，不构建完整的 list-of-dicts，
+内存占用与数据量无关，消费方可以边读边处理：
+- NDJSON：每行一期，字段与 JSON 数据文件一致
+- CSV：号码列表展开为 red_balls_1 ... red_balls_6 等单独的列
+- Parquet / Arrow IPC：需要安装 pyarrow，按块写入 RecordBatch
+
+另外可以导出核心统计结果（号码频率、奇偶 / 和值 / 跨度 / 区间分布），
+每行一个 (metric, value, count)。
+
+命令行用法：
+    python scripts/draw_export.py --format csv --output data/lottery_data.csv
+    python scripts/draw_export.py --game dlt --format ndjson --fields period,front_balls,back_balls
+    python scripts/draw_export.py --stats --format csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+
+# 每次从列式存储切出的行数
+CHUNK_ROWS = 500
+
+# 逐行输出的格式（Web 接口与命令行均支持）；列式格式只能写文件
+STREAM_FORMATS = ('ndjson', 'csv')
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+
+def _chunks(store, chunk_rows):
+    for start in range(0, len(store), chunk_rows):
+        yield slice(start, min(start + chunk_rows, len(store)))
+
+
+def _resolve_fields(store, fields):
+    available = store.field_names()
+    if not fields:
+        return available
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}（可选: {', '.join(available)}）")
+    return list(fields)
+
+
+def _list_width(store, name):
+    """号码列表字段展开后的列数；标量字段返回 None"""
+    game = store.game
+    if name == game.main_key:
+        return game.main_count
+    if name == game.extra_key and not game.extra_scalar:
+        return game.extra_count
+    return None
+
+
+def iter_ndjson(store, fields=None, chunk_rows=CHUNK_ROWS):
+    """逐块生成 NDJSON 文本，每行一期"""
+    fields = _resolve_fields(store, fields)
+    for rows in _chunks(store, chunk_rows):
+        columns = [store.column(name, rows) for name in fields]
+        yield ''.join(
+            json.dumps(dict(zip(fields, values)), ensure_ascii=False) + '\n'
+            for values in zip(*columns)
+        )
+
+
+def iter_csv(store, fields=None, chunk_rows=CHUNK_ROWS):
+    """逐块生成 CSV 文本（首块含表头），号码列表展开为多列"""
+    fields = _resolve_fields(store, fields)
+    widths = [_list_width(store, name) for name in fields]
+
+    header = []
+    for name, width in zip(fields, widths):
+        header.extend([f"{name}_{i + 1}" for i in range(width)] if width else [name])
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(header)
+    for rows in _chunks(store, chunk_rows):
+        columns = [store.column(name, rows) for name in fields]
+        for values in zip(*columns):
+            line = []
+            for value, width in zip(values, widths):
+                line.extend(value if width else [value])
+            writer.writerow(line)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stats_rows(stats):
+    """把 DrawStats 展开为 (metric, value, count) 行，metric 为号码字段名或分布名"""
+    game = stats.game
+    yield 'total', '', stats.total
+    for metric, pairs in (
+        (game.main_key, stats.main_counts),
+        (game.extra_key, stats.extra_counts),
+        ('odd_even', stats.odd_even),
+        ('sum_range', stats.sums),
+        ('span_range', stats.spans),
+        ('zone', stats.zones),
+    ):
+        for value, count in pairs:
+            yield metric, value, count
+
+
+def iter_stats(stats, fmt):
+    """逐行生成统计结果（ndjson 或 csv）"""
+    if fmt == 'csv':
+        yield 'metric,value,count\n'
+        for metric, value, count in stats_rows(stats):
+            yield f"{metric},{value},{count}\n"
+    else:
+        for metric, value, count in stats_rows(stats):
+            yield json.dumps({'metric': metric, 'value': value, 'count': count}, ensure_ascii=False) + '\n'
+
+
+def _arrow_type(pa, store, name):
+    game = store.game
+    if name in ('period', 'date') or name in store.text_columns:
+        return pa.string()
+    if name == game.main_key or (name == game.extra_key and not game.extra_scalar):
+        return pa.list_(pa.uint8())
+    if name == game.extra_key:
+        return pa.uint8()
+    return pa.int64()
+
+
+def write_columnar(store, path, fmt, fields=None, chunk_rows=CHUNK_ROWS):
+    """按块写出 Parquet 或 Arrow IPC 文件（需要 pyarrow）"""
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("导出 Parquet / Arrow 需要 pyarrow，请先安装: pip install pyarrow")
+
+    fields = _resolve_fields(store, fields)
+    schema = pa.schema([(name, _arrow_type(pa, store, name)) for name in fields])
+    if fmt == 'parquet':
+        writer = pa.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    try:
+        for rows in _chunks(store, chunk_rows):
+            arrays = [pa.array(store.column(name, rows), type=schema.field(name).type) for name in fields]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+    finally:
+        writer.close()
+
+
+def _load_analyzer(game, data_path):
+    """通过对应分析器加载数据（优先二进制快照 + 追加日志）"""
+    # 导入与加载时的日志都打印到标准错误，避免混入导出到标准输出的数据
+    # （分析器模块导入时会打印依赖检测信息）
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        if game == 'dlt':
+            try:
+                from scripts.super_lotto_analyzer import SuperLottoAnalyzer as analyzer_class
+            except ImportError:  # 直接在 scripts/ 目录下运行本脚本时
+                from super_lotto_analyzer import SuperLottoAnalyzer as analyzer_class
+            data_path = data_path or 'data/super_lotto_data.json'
+        else:
+            try:
+                from scripts.lottery_analyzer import DoubleColorBallAnalyzer as analyzer_class
+            except ImportError:  # 直接在 scripts/ 目录下运行本脚本时
+                from lottery_analyzer import DoubleColorBallAnalyzer as analyzer_class
+            data_path = data_path or 'data/lottery_data.json'
+
+        analyzer = analyzer_class()
+        analyzer.load_data(data_path)
+    finally:
+        sys.stdout = stdout
+    return analyzer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="流式导出开奖数据或统计结果")
+    parser.add_argument("--game", choices=("ssq", "dlt"), default="ssq", help="玩法：ssq 双色球（默认）/ dlt 大乐透")
+    parser.add_argument("--data", default=None, help="数据文件路径，默认 data/lottery_data.json 或 data/super_lotto_data.json")
+    parser.add_argument("--format", choices=STREAM_FORMATS + COLUMNAR_FORMATS, default="ndjson", help="导出格式")
+    parser.add_argument("--fields", default="", help="逗号分隔的字段名，默认全部字段")
+    parser.add_argument("--stats", action="store_true", help="导出统计结果而不是逐期数据（仅 ndjson / csv）")
+    parser.add_argument("--output", "-o", default="-", help="输出文件路径，默认标准输出")
+    args = parser.parse_args(argv)
+
+    analyzer = _load_analyzer(args.game, args.data)
+    store = analyzer.draw_store
+    try:
+        fields = _resolve_fields(store, [f.strip() for f in args.fields.split(",") if f.strip()])
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.format in COLUMNAR_FORMATS:
+        if args.stats or args.output == "-":
+            parser.error("Parquet / Arrow 只能导出逐期数据，且必须指定 --output 文件")
+        try:
+            write_columnar(store, args.output, args.format, fields)
+        except RuntimeError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        print(f"✅ 已导出 {len(store)} 期数据到 {args.output}", file=sys.stderr)
+        return 0
+
+    chunks = iter_stats(analyzer.stats, args.format) if args.stats else (
+        iter_ndjson(store, fields) if args.format == "ndjson" else iter_csv(store, fields)
+    )
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if out is not sys.stdout:
+        print(f"✅ 已导出到 {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+开奖数据追加日志
+
+日常增量更新通常只有一两期新数据，没必要每次都重写整份历史 JSON：
+1. 新开奖记录以 JSON Lines 形式追加到 data/<name>.journal.jsonl，每次只写几百字节
+2. 加载时先读基础快照（JSON / 二进制快照），再按期号合并日志中的记录
+3. 日志累计到一定条数后做一次压缩：整份写回 JSON（原子替换）并清空日志
+
+写入过程中断时：
+- JSON 通过临时文件 + os.replace 原子替换，不会出现写了一半的文件
+- 日志末尾残缺的一行在读取时忽略，下次追加前先补换行，不会污染后续记录
+"""
+
+import json
+import os
+
+# 日志累计达到该条数时压缩回基础 JSON（约一个季度的开奖）
+COMPACT_THRESHOLD = 40
+
+
+def journal_path(json_path):
+    """JSON 数据文件对应的追加日志路径：data/lottery_data.json -> data/lottery_data.journal.jsonl"""
+    return os.path.splitext(json_path)[0] + '.journal.jsonl'
+
+
+def atomic_write(path, raw):
+    """先写临时文件并落盘，再原子替换目标文件"""
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def merge_records(base, updates):
+    """按期号合并两组记录（updates 覆盖同期号的 base），返回从新到旧排列的列表"""
+    merged = {rec['period']: rec for rec in base}
+    for rec in updates:
+        merged[rec['period']] = rec
+    # 期号按字符串排序即可（同一玩法期号位数固定），从新到旧
+    return [merged[p] for p in sorted(merged, reverse=True)]
+
+
+class DrawJournal:
+    """某个数据文件的追加日志"""
+
+    def __init__(self, json_path, compact_threshold=COMPACT_THRESHOLD):
+        self.path = journal_path(json_path)
+        self.compact_threshold = compact_threshold
+
+    def read(self):
+        """读取日志中的全部完整记录，残缺或损坏的行直接跳过"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+
+        records = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and record.get('period'):
+                records.append(record)
+        return records
+
+    def append(self, records):
+        """把记录逐行追加到日志末尾并落盘"""
+        if not records:
+            return
+        lines = ''.join(json.dumps(rec, ensure_ascii=False) + '\n' for rec in records)
+        with open(self.path, 'ab+') as f:
+            # 上次写入中断留下的残行：先补一个换行，避免与新记录粘在一起
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    lines = '\n' + lines
+            f.write(lines.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def needs_compaction(self):
+        return len(self.read()) >= self.compact_threshold
+
+    def clear(self):
+        """压缩完成后删除日志"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+开奖数据统计引擎
+
+双色球与大乐透共用：对列式存储构造一次号码出现矩阵（one-hot，N×33 / N×35，
+副号码 N×16 / N×12），在一次 NumPy 计算中得到全部核心统计量：
+1. 每个号码的出现次数
+2. 奇偶分布
+3. 和值区间分布（每10一档）
+4. 跨度区间分布（每5一档）
+5. 分区分布（每5个号码一个分区）
+
+结果封装为不可变的 DrawStats，分析器和 Web 端都直接读取它，不再重复遍历历史记录。
+
+RunningStats 在此基础上做增量维护：每来一期新开奖只按该期号码调整计数，
+不再重新扫描全部历史；可选的窗口模式（例如最近10期）同时移出最旧一期。
+全量统计结果保存在数据文件旁（data/<name>.stats.json），连同 JSON 数据文件的内容校验和
+（与二进制快照相同的 SHA-256），下次启动时校验和一致才直接读取。
+"""
+
+import json
+import os
+from collections import Counter, deque, namedtuple
+
+import numpy as np
+
+
+def _first_seen_order(values, counts):
+    """返回出现过的号码，按其在数据中首次出现的先后排序（逐行、行内从左到右）"""
+    flat = np.asarray(values, dtype=np.intp).ravel()
+    first_seen = np.full(counts.size, flat.size, dtype=np.intp)
+    np.minimum.at(first_seen, flat, np.arange(flat.size))
+    present = np.nonzero(counts)[0]
+    return present[np.argsort(first_seen[present], kind='stable')]
+
+
+def _ordered_pairs(values, label):
+    """按取值分组计数，返回 ((label(取值), 次数), ...)，顺序为该取值首次出现的顺序"""
+    values = np.asarray(values)
+    if not len(values):
+        return ()
+    uniq, first_idx, counts = np.unique(values, return_index=True, return_counts=True, axis=0)
+    order = np.argsort(first_idx, kind='stable')
+    return tuple((label(uniq[i]), int(counts[i])) for i in order)
+
+
+def _odd_even_label(odd, count):
+    return f"{odd}奇{count - odd}偶"
+
+
+def _sum_label(bucket):
+    return f"{bucket * 10}-{bucket * 10 + 9}"
+
+
+def _span_label(bucket):
+    return f"{bucket * 5}-{bucket * 5 + 4}"
+
+
+def _zone_label(row):
+    return "-".join(str(int(x)) for x in row)
+
+
+def _incidence(balls, max_num):
+    """构造号码出现矩阵：第 i 行第 n 列为 1 表示第 i 期开出号码 n"""
+    n = len(balls)
+    matrix = np.zeros((n, max_num + 1), dtype=np.int64)
+    if n:
+        matrix[np.arange(n)[:, None], balls.astype(np.intp)] = 1
+    return matrix
+
+
+class DrawStats(namedtuple('DrawStats', [
+    'game',          # 玩法描述（GameSpec）
+    'total',         # 统计的期数
+    'main_counts',   # ((号码, 次数), ...) 主号码，按首次出现顺序
+    'extra_counts',  # ((号码, 次数), ...) 副号码，按首次出现顺序
+    'odd_even',      # (("3奇3偶", 次数), ...)
+    'sums',          # (("100-109", 次数), ...)
+    'spans',         # (("25-29", 次数), ...)
+    'zones',         # (("1-0-2-1-1-0-1", 次数), ...)
+])):
+    """核心统计结果（不可变）。各取值方法每次返回新的字典/Counter，调用方可以放心修改"""
+
+    __slots__ = ()
+
+    def main_counter(self):
+        """主号码（红球/前区）出现次数"""
+        return Counter(dict(self.main_counts))
+
+    def extra_counter(self):
+        """副号码（蓝球/后区）出现次数"""
+        return Counter(dict(self.extra_counts))
+
+    def odd_even_dist(self):
+        return dict(self.odd_even)
+
+    def sum_dist(self):
+        return dict(self.sums)
+
+    def span_dist(self):
+        return dict(self.spans)
+
+    def zone_dist(self):
+        return dict(self.zones)
+
+    def patterns_raw(self):
+        """与 _get_patterns_analysis_raw 相同结构的规律分布"""
+        return {
+            'odd_even_dist': self.odd_even_dist(),
+            'sum_dist': self.sum_dist(),
+            'span_dist': self.span_dist(),
+        }
+
+
+def compute_stats(store):
+    """对列式存储做一次向量化统计，返回 DrawStats"""
+    game = store.game
+    total = len(store)
+    numbers = np.arange(game.main_max + 1)
+
+    main_hits = _incidence(store.main, game.main_max)
+    extra_hits = _incidence(store.extra, game.extra_max)
+
+    main_counts = main_hits.sum(axis=0)
+    extra_counts = extra_hits.sum(axis=0)
+
+    # 每期的奇数个数、和值、最小/最大号码都由出现矩阵直接得到
+    odd = main_hits[:, 1::2].sum(axis=1)
+    sums = main_hits @ numbers
+    present = main_hits.astype(bool)
+    lowest = present.argmax(axis=1)
+    highest = game.main_max - present[:, ::-1].argmax(axis=1)
+    spans = highest - lowest
+
+    # 分区：1-5, 6-10, ...，号码 0 不属于任何分区
+    zone_count = (game.main_max + 4) // 5
+    zone_map = np.zeros((game.main_max + 1, zone_count), dtype=np.int64)
+    zone_map[numbers[1:], (numbers[1:] - 1) // 5] = 1
+    zones = main_hits @ zone_map
+
+    main_order = _first_seen_order(store.main, main_counts)
+    extra_order = _first_seen_order(store.extra, extra_counts)
+    count = game.main_count
+
+    return DrawStats(
+        game=game,
+        total=total,
+        main_counts=tuple((int(n), int(main_counts[n])) for n in main_order),
+        extra_counts=tuple((int(n), int(extra_counts[n])) for n in extra_order),
+        odd_even=_ordered_pairs(odd, lambda k: _odd_even_label(k, count)),
+        sums=_ordered_pairs(sums // 10, _sum_label),
+        spans=_ordered_pairs(spans // 5, _span_label),
+        zones=_ordered_pairs(zones, _zone_label),
+    )
+
+
+def stats_path(json_path):
+    """JSON 数据文件对应的统计结果文件：data/lottery_data.json -> data/lottery_data.stats.json"""
+    return os.path.splitext(json_path)[0] + '.stats.json'
+
+
+def _draw_keys(game, main, extra):
+    """单期开奖对各项统计的贡献：(主号码, 副号码, 奇偶, 和值, 跨度, 分区)"""
+    main = [int(x) for x in main]
+    extra = [int(x) for x in extra]
+    odd = sum(1 for x in main if x % 2 == 1)
+    zones = [0] * ((game.main_max + 4) // 5)
+    for x in main:
+        zones[(x - 1) // 5] += 1
+    return (
+        main,
+        extra,
+        [_odd_even_label(odd, game.main_count)],
+        [_sum_label(sum(main) // 10)],
+        [_span_label((max(main) - min(main)) // 5)],
+        [_zone_label(zones)],
+    )
+
+
+# DrawStats 中参与增量维护的计数字段，与 _draw_keys 的返回顺序一致
+_COUNT_FIELDS = ('main_counts', 'extra_counts', 'odd_even', 'sums', 'spans', 'zones')
+
+
+class RunningStats:
+    """
+    可增量维护的统计结果。
+
+    各计数用有序字典保存，键的顺序即“首次出现顺序”（从最新一期开始数），
+    与 compute_stats 完全一致：新开奖排在最前面，所以它涉及的键依次移到最前，
+    其余键保持原有顺序。每期只涉及常数个键，更新代价与历史期数无关。
+
+    window 不为 None 时只统计最新 window 期，新开奖加入时移出最旧一期。
+    """
+
+    def __init__(self, game, counts, total, latest_period, window=None, draws=None, checksum=None):
+        self.game = game
+        self.counts = counts
+        self.total = total
+        self.latest_period = latest_period
+        self.window = window
+        # 保存/读取时对应的 JSON 数据文件校验和（content_checksum），内存中新建的统计为 None
+        self.checksum = checksum
+        # 窗口模式下保存窗口内各期的贡献，从新到旧
+        self.draws = deque(draws or [])
+
+    @classmethod
+    def from_store(cls, store, window=None):
+        """对列式存储做一次完整统计作为起点"""
+        if window is not None:
+            store = store.head(window)
+        stats = compute_stats(store)
+        counts = {field: dict(getattr(stats, field)) for field in _COUNT_FIELDS}
+        draws = None
+        if window is not None:
+            draws = [_draw_keys(store.game, store.main[i], store.extra[i]) for i in range(len(store))]
+        return cls(store.game, counts, stats.total, store.latest_period, window=window, draws=draws)
+
+    def matches(self, store, checksum=None):
+        """
+        是否与给定数据集对应（期数和最新期号一致）。
+        - checksum: 数据集来源 JSON 文件的校验和，给出时还要求与保存时记录的一致，
+          避免期数和最新期号碰巧相同、但历史记录已被修改的数据文件沿用旧统计
+        """
+        if checksum is not None and self.checksum != checksum:
+            return False
+        total = len(store) if self.window is None else min(len(store), self.window)
+        return self.total == total and self.latest_period == store.latest_period
+
+    def add_draw(self, period, main, extra):
+        """加入比当前最新一期更新的一期开奖"""
+        keys = _draw_keys(self.game, main, extra)
+        for field, draw_keys in zip(_COUNT_FIELDS, keys):
+            old = self.counts[field]
+            front = {}
+            for key in draw_keys:
+                front[key] = front.get(key, old.get(key, 0)) + 1
+            for key, value in old.items():
+                if key not in front:
+                    front[key] = value
+            self.counts[field] = front
+        self.total += 1
+        self.latest_period = str(period)
+
+        if self.window is not None:
+            self.draws.appendleft(keys)
+            if len(self.draws) > self.window:
+                self._remove_oldest(self.draws.pop())
+
+    def _remove_oldest(self, keys):
+        """移出窗口中最旧的一期：只减计数，其余键的先后顺序不受影响"""
+        for field, draw_keys in zip(_COUNT_FIELDS, keys):
+            counter = self.counts[field]
+            for key in draw_keys:
+                counter[key] -= 1
+                if counter[key] == 0:
+                    del counter[key]
+        self.total -= 1
+
+    def to_stats(self):
+        """转换为不可变的 DrawStats"""
+        return DrawStats(game=self.game, total=self.total, **{
+            field: tuple(self.counts[field].items()) for field in _COUNT_FIELDS
+        })
+
+    def save(self, path, checksum):
+        """
+        保存全量统计结果（窗口模式不保存，启动时由最近几期直接算出）。
+        - checksum: 当前 JSON 数据文件的校验和（追加日志中的新记录由期数和最新期号覆盖）
+        """
+        payload = {
+            'game': self.game.name,
+            'checksum': checksum,
+            'total': self.total,
+            'latest_period': self.latest_period,
+            'counts': {field: list(values.items()) for field, values in self.counts.items()},
+        }
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.checksum = checksum
+
+    @classmethod
+    def load(cls, path, game):
+        """读取保存的统计结果，文件缺失或损坏时返回 None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            if payload.get('game') != game.name:
+                return None
+            counts = {}
+            for field in _COUNT_FIELDS:
+                pairs = payload['counts'][field]
+                # 号码计数的键是整数，规律分布的键是字符串
+                counts[field] = {(int(k) if field in ('main_counts', 'extra_counts') else k): int(v)
+                                 for k, v in pairs}
+            return cls(game, counts, int(payload['total']), payload['latest_period'],
+                       checksum=payload.get('checksum'))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+开奖数据列式存储
+
+把 list-of-dicts 形式的历史开奖数据一次性转换为紧凑的 NumPy 列：
+1. 主号码矩阵：双色球红球 (N, 6) / 大乐透前区 (N, 5)，uint8
+2. 副号码矩阵：双色球蓝球 (N, 1) / 大乐透后区 (N, 2)，uint8
+3. 奖级、销量、奖池等 int64 列
+4. 期号索引（期号 -> 距最早一期的偏移），新开奖拼接到最前面时索引只需追加
+
+统计引擎（draw_stats.py）直接在这些列上做向量化统计；list-of-dicts 仅作为
+模板渲染和 JSON 读写的兼容视图，按需生成并缓存。
+
+二进制快照：save_data 在 JSON 旁写一份定长记录的 .bin 文件，文件头记录
+对应 JSON 内容的 SHA-256。load_data 校验一致时直接内存映射 .bin，
+不再解析整份 JSON；不一致或缺失时回退到 JSON 并由下一次保存重新生成。
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+# 玩法描述：主号码/副号码在记录中的字段名、个数和号码上限
+GameSpec = namedtuple('GameSpec', [
+    'name',          # 玩法标识
+    'main_key',      # 主号码字段名
+    'main_count',    # 每期主号码个数
+    'main_max',      # 主号码最大值
+    'extra_key',     # 副号码字段名
+    'extra_count',   # 每期副号码个数
+    'extra_max',     # 副号码最大值
+    'extra_scalar',  # 副号码在记录中是否为单个整数（双色球蓝球）
+])
+
+SSQ_GAME = GameSpec('ssq', 'red_balls', 6, 33, 'blue_ball', 1, 16, True)
+DLT_GAME = GameSpec('dlt', 'front_balls', 5, 35, 'back_balls', 2, 12, False)
+
+# 记录中除期号、日期、号码之外的数值字段
+INT_COLUMNS = (
+    'first_prize_count',
+    'first_prize_amount',
+    'second_prize_count',
+    'second_prize_amount',
+    'sales_amount',
+    'pool_amount',
+)
+
+# 二进制快照文件格式：魔数 + 头部长度(uint32, 小端) + JSON 头部 + 定长记录
+BINARY_MAGIC = b'DRAWSTR1'
+BINARY_ALIGN = 64
+
+
+def _to_int(value):
+    """把记录中的数值字段转为整数，兼容 '1,415,654,588.90' 这类字符串"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if not value or value in ('-', '---'):
+        return 0
+    cleaned = re.sub(r'[,￥¥元]', '', str(value))
+    try:
+        return int(float(cleaned))
+    except ValueError:
+        return 0
+
+
+def sidecar_path(json_path):
+    """JSON 数据文件对应的二进制快照路径：data/lottery_data.json -> data/lottery_data.bin"""
+    return os.path.splitext(json_path)[0] + '.bin'
+
+
+def content_checksum(raw):
+    """JSON 文件内容（bytes）的校验和，用于判断二进制快照是否过期"""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _record_dtype(game, period_width, date_width, text_widths):
+    """二进制快照中每条记录的定长结构"""
+    fields = [
+        ('period', '<U%d' % max(period_width, 1)),
+        ('date', '<U%d' % max(date_width, 1)),
+        ('main', 'u1', (game.main_count,)),
+        ('extra', 'u1', (game.extra_count,)),
+    ]
+    for name in INT_COLUMNS:
+        if name in text_widths:
+            fields.append((name, '<U%d' % max(text_widths[name], 1)))
+        else:
+            fields.append((name, '<i8'))
+    return np.dtype(fields)
+
+
+class DrawStore:
+    """开奖数据列式存储（按期号从新到旧排列）"""
+
+    def __init__(self, game, periods, dates, main, extra, columns, records=None, text_columns=None):
+        self.game = game
+        self.periods = periods
+        self.dates = dates
+        self.main = main
+        self.extra = extra
+        self.columns = columns
+        # 原始记录中以字符串保存的数值字段（如大乐透 '1,415,654,588.90' 形式的奖池），
+        # 还原字典视图时原样输出，保证与 JSON 一致
+        self.text_columns = text_columns or {}
+        self._records = records
+        # 期号 -> 距最早一期的偏移（len - 1 - 行号），在最前面拼接新开奖时已有条目保持不变
+        self._period_offsets = None
+
+    @classmethod
+    def from_records(cls, records, game):
+        """从 list-of-dicts 构建列式存储，原始记录列表保留为兼容视图"""
+        records = list(records)
+        n = len(records)
+        if n:
+            main = np.array([rec[game.main_key] for rec in records], dtype=np.uint8)
+            if game.extra_scalar:
+                extra = np.array([[rec[game.extra_key]] for rec in records], dtype=np.uint8)
+            else:
+                extra = np.array([rec[game.extra_key] for rec in records], dtype=np.uint8)
+        else:
+            main = np.zeros((0, game.main_count), dtype=np.uint8)
+            extra = np.zeros((0, game.extra_count), dtype=np.uint8)
+
+        periods = np.array([str(rec.get('period', '')) for rec in records], dtype=str)
+        dates = np.array([str(rec.get('date', '')) for rec in records], dtype=str)
+        columns = {
+            name: np.array([_to_int(rec.get(name, 0)) for rec in records], dtype=np.int64)
+            for name in INT_COLUMNS
+        }
+        text_columns = {
+            name: np.array([str(rec.get(name, '')) for rec in records], dtype=str)
+            for name in INT_COLUMNS
+            if any(isinstance(rec.get(name), str) for rec in records)
+        }
+        return cls(game, periods, dates, main, extra, columns, records=records, text_columns=text_columns)
+
+    @classmethod
+    def load_binary(cls, path, game, checksum):
+        """
+        内存映射二进制快照。文件缺失、格式不符或校验和与 JSON 不一致时返回 None，
+        由调用方回退到解析 JSON。
+        """
+        try:
+            with open(path, 'rb') as f:
+                prefix = f.read(len(BINARY_MAGIC) + 4)
+                if len(prefix) < len(BINARY_MAGIC) + 4 or prefix[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+                    return None
+                header_len = struct.unpack('<I', prefix[len(BINARY_MAGIC):])[0]
+                header = json.loads(f.read(header_len).decode('utf-8'))
+        except (OSError, ValueError):
+            return None
+
+        if header.get('game') != game.name or header.get('checksum') != checksum:
+            return None
+
+        dtype = _record_dtype(game, header['period_width'], header['date_width'], header['text_widths'])
+        count = header['count']
+        if count:
+            table = np.memmap(path, dtype=dtype, mode='r', offset=header['offset'], shape=(count,))
+        else:
+            table = np.zeros(0, dtype=dtype)
+
+        columns = {}
+        text_columns = {}
+        for name in INT_COLUMNS:
+            if name in header['text_widths']:
+                text_columns[name] = table[name]
+                columns[name] = np.array([_to_int(str(v)) for v in table[name]], dtype=np.int64)
+            else:
+                columns[name] = table[name]
+        return cls(game, table['period'], table['date'], table['main'], table['extra'],
+                   columns, text_columns=text_columns)
+
+    def save_binary(self, path, checksum):
+        """
+        写出二进制快照。只有当快照能无损还原出当前字典视图时才写入，
+        返回是否写入成功。
+        """
+        records = self.to_records()
+        rebuilt = DrawStore(self.game, self.periods, self.dates, self.main, self.extra,
+                            self.columns, text_columns=self.text_columns)
+        if [list(r.items()) for r in rebuilt.to_records()] != [list(r.items()) for r in records]:
+            return False
+
+        text_widths = {name: int(max((len(v) for v in col), default=1))
+                       for name, col in self.text_columns.items()}
+        period_width = int(max((len(p) for p in self.periods), default=1))
+        date_width = int(max((len(d) for d in self.dates), default=1))
+        dtype = _record_dtype(self.game, period_width, date_width, text_widths)
+
+        table = np.zeros(len(self), dtype=dtype)
+        table['period'] = self.periods
+        table['date'] = self.dates
+        table['main'] = self.main
+        table['extra'] = self.extra
+        for name in INT_COLUMNS:
+            table[name] = self.text_columns[name] if name in self.text_columns else self.columns[name]
+
+        header = {
+            'game': self.game.name,
+            'count': len(self),
+            'checksum': checksum,
+            'period_width': period_width,
+            'date_width': date_width,
+            'text_widths': text_widths,
+        }
+        # 记录区按 BINARY_ALIGN 对齐，offset 写在头部里
+        fixed = len(BINARY_MAGIC) + 4
+        probe = json.dumps(dict(header, offset=0)).encode('utf-8')
+        offset = -(-(fixed + len(probe) + 16) // BINARY_ALIGN) * BINARY_ALIGN
+        header_bytes = json.dumps(dict(header, offset=offset)).encode('utf-8')
+        header_bytes = header_bytes.ljust(offset - fixed, b' ')
+
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(BINARY_MAGIC)
+            f.write(struct.pack('<I', len(header_bytes)))
+            f.write(header_bytes)
+            f.write(table.tobytes())
+        os.replace(tmp_path, path)
+        return True
+
+    def __len__(self):
+        return len(self.periods)
+
+    @property
+    def latest_period(self):
+        """最新一期期号，无数据时返回 None"""
+        return str(self.periods[0]) if len(self) else None
+
+    @property
+    def latest_date(self):
+        """最新一期开奖日期，无数据时返回 None"""
+        return str(self.dates[0]) if len(self) else None
+
+    @property
+    def blues(self):
+        """双色球蓝球向量（副号码矩阵的第一列）"""
+        return self.extra[:, 0]
+
+    def _offsets(self):
+        if self._period_offsets is None:
+            last = len(self) - 1
+            self._period_offsets = {str(p): last - i for i, p in enumerate(self.periods)}
+        return self._period_offsets
+
+    def index_of(self, period):
+        """按期号查找行号，不存在时返回 None"""
+        offset = self._offsets().get(str(period))
+        if offset is None or offset >= len(self):
+            return None
+        return len(self) - 1 - offset
+
+    def prepend(self, records):
+        """
+        合并新抓取的开奖记录，返回新的存储（原存储保持不变，可继续被并发读取）。
+
+        利用数据按期号从新到旧排列的特点：
+        - 比最新一期更新的记录按期号排好后直接拼接到最前面
+        - 与已有期号重叠的记录在新数组上按行替换
+        - 期号索引和字典视图复制后只追加新期号，不再整体排序、重建
+
+        代价仍是 O(N)：为了让原存储保持可读（写时复制），各列数组（np.concatenate）、
+        期号索引（dict 复制）和字典视图（list 复制）都会整体复制一次。省掉的是逐条解析记录、
+        按期号排序以及逐条重建字典这些 Python 级的循环；几千期的历史复制一次只是几百 KB 的内存拷贝。
+
+        有记录既不存在又早于最新一期（补历史缺口）时返回 None，由调用方整体重建。
+        """
+        latest = self.latest_period
+        fresh = {}
+        replaced = {}
+        for rec in records:
+            period = str(rec['period'])
+            row = self.index_of(period)
+            if row is not None:
+                replaced[row] = rec
+            elif latest is None or period > latest:
+                fresh[period] = rec
+            else:
+                return None
+
+        added = DrawStore.from_records([fresh[p] for p in sorted(fresh, reverse=True)], self.game)
+        if len(added) and set(added.text_columns) != set(self.text_columns):
+            return None
+        k = len(added)
+
+        def join(new, old):
+            return np.concatenate([new, old]) if k else np.array(old)
+
+        periods = join(added.periods, self.periods)
+        dates = join(added.dates, self.dates)
+        main = join(added.main, self.main)
+        extra = join(added.extra, self.extra)
+        columns = {name: join(added.columns[name], col) for name, col in self.columns.items()}
+        text_columns = {name: join(added.text_columns[name], col) if k else np.array(col)
+                        for name, col in self.text_columns.items()}
+
+        # 重叠期号：在新数组上按行替换
+        for row, rec in replaced.items():
+            patch = DrawStore.from_records([rec], self.game)
+            if set(patch.text_columns) != set(self.text_columns):
+                return None
+            target = row + k
+            periods[target] = patch.periods[0]
+            dates[target] = patch.dates[0]
+            main[target] = patch.main[0]
+            extra[target] = patch.extra[0]
+            for name in columns:
+                columns[name][target] = patch.columns[name][0]
+            for name in text_columns:
+                value = patch.text_columns[name][0]
+                if len(value) > text_columns[name].dtype.itemsize // 4:
+                    # 定长字符串列放不下新值时先加宽，避免截断
+                    text_columns[name] = text_columns[name].astype('<U%d' % len(value))
+                text_columns[name][target] = value
+
+        records_view = None
+        if self._records is not None:
+            records_view = list(added._records) + list(self._records)
+            for row, rec in replaced.items():
+                records_view[row + k] = rec
+
+        store = DrawStore(self.game, periods, dates, main, extra, columns,
+                          records=records_view, text_columns=text_columns)
+        offsets = dict(self._offsets())
+        for i, period in enumerate(added.periods):
+            offsets[str(period)] = len(self) + k - 1 - i
+        store._period_offsets = offsets
+        return store
+
+    def head(self, n):
+        """取最新 n 期，返回共享底层数组的新存储"""
+        records = self._records[:n] if self._records is not None else None
+        return DrawStore(
+            self.game,
+            self.periods[:n],
+            self.dates[:n],
+            self.main[:n],
+            self.extra[:n],
+            {name: col[:n] for name, col in self.columns.items()},
+            records=records,
+            text_columns={name: col[:n] for name, col in self.text_columns.items()},
+        )
+
+    def record(self, i):
+        """把第 i 行还原为与 JSON 兼容的字典"""
+        if self._records is not None:
+            return self._records[i]
+        return self._build_record(i)
+
+    def _build_record(self, i):
+        game = self.game
+        extra = [int(x) for x in self.extra[i]]
+        rec = {
+            'period': str(self.periods[i]),
+            'date': str(self.dates[i]),
+            game.main_key: [int(x) for x in self.main[i]],
+            game.extra_key: extra[0] if game.extra_scalar else extra,
+        }
+        for name in INT_COLUMNS:
+            if name in self.text_columns:
+                rec[name] = str(self.text_columns[name][i])
+            else:
+                rec[name] = int(self.columns[name][i])
+        return rec
+
+    def field_names(self):
+        """记录中的字段名，顺序与字典视图一致"""
+        return ['period', 'date', self.game.main_key, self.game.extra_key] + list(INT_COLUMNS)
+
+    def column(self, name, rows):
+        """
+        某个字段在给定行上的取值列表（与 JSON 兼容），直接从列数据切片，不生成逐条记录的字典。
+        - rows: 行号数组或切片
+        """
+        game = self.game
+        if name == 'period':
+            return [str(p) for p in self.periods[rows]]
+        if name == 'date':
+            return [str(d) for d in self.dates[rows]]
+        if name == game.main_key:
+            return self.main[rows].tolist()
+        if name == game.extra_key:
+            return self.extra[rows, 0].tolist() if game.extra_scalar else self.extra[rows].tolist()
+        if name in self.text_columns:
+            return [str(v) for v in self.text_columns[name][rows]]
+        if name in self.columns:
+            return self.columns[name][rows].tolist()
+        raise KeyError(name)
+
+    def select_rows(self, period_from=None, period_to=None, date_from=None, date_to=None):
+        """
+        按期号 / 日期范围（均含端点）筛选，返回从新到旧的行号数组。
+        期号为定长数字字符串、日期为 YYYY-MM-DD，直接按字符串比较。
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if period_from is not None:
+            mask &= self.periods >= str(period_from)
+        if period_to is not None:
+            mask &= self.periods <= str(period_to)
+        if date_from is not None:
+            mask &= self.dates >= str(date_from)
+        if date_to is not None:
+            mask &= self.dates <= str(date_to)
+        return np.flatnonzero(mask)
+
+    def to_records(self):
+        """list-of-dicts 兼容视图（模板渲染、JSON 保存使用），首次访问时生成并缓存"""
+        if self._records is None:
+            self._records = [self._build_record(i) for i in range(len(self))]
+        return self._records
@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+开奖数据分页抓取工具
+
+ApiSpec：官方接口的响应格式
+双色球（中国福彩网）与大乐透（体彩网）的分页接口结构不同，
+ApiSpec 描述如何判断响应成功、取出本页记录和总记录数，抓取器据此统一处理两种接口。
+
+抓取后端（make_fetcher 按名称创建，接口相同，可互换）：
+- PageFetcher（sync）：线程池并发抓取多页，同时在途请求数不超过 max_workers
+- AsyncPageFetcher（async）：asyncio 协程并发，等待限速与重试退避不占用线程，
+  可在协程中直接 await，也可以像同步后端一样调用
+两者共同的行为：
+1. 按主机共享的自适应限速：令牌桶 + AIMD，接口健康时逐步提速，
+   遇到 567 / 429 / 503、超时或响应变慢时减半，既不空等也不触发封禁
+2. 按主机共享的熔断器：连续失败后暂停请求，到期后先放行一个探测请求
+3. 失败重试：可选指数退避（带随机抖动），重试时轮换 User-Agent
+4. 每个线程使用独立的 Session，但挂载分析器 _setup_session 中配置的同一个
+   HTTPAdapter，复用其连接池
+5. 结果按页码返回，由调用方按页序解析，保证输出顺序稳定
+
+plan_fetch：抓取规划
+依次尝试接口可接受的较大 pageSize，用第一页响应中的 total 推算总页数，
+第一页数据直接复用，不再逐页试探最大页码。
+
+离线调试可以用 mock_lottery_server.py 在本地回放两个接口。
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+# requests 在真正发起请求时才导入：分析器导入本模块不应拖慢只做分析的 Web 端启动
+
+
+# 依次尝试的 pageSize，服务端不接受或截断时自动降级
+PAGE_SIZE_CANDIDATES = (100, 50, 30)
+
+# 抓取规划：实际生效的 pageSize、总记录数、总页数（total 缺失时为 None）、第一页数据
+FetchPlan = namedtuple('FetchPlan', ['page_size', 'total', 'page_count', 'first_page'])
+
+# 接口响应格式：check(data) 返回错误信息（成功时为 None），items(data) 返回本页记录，
+# total(data) 返回总记录数（缺失时为 None）
+ApiSpec = namedtuple('ApiSpec', ['name', 'url', 'check', 'items', 'total'])
+
+
+def _ssq_check(data):
+    if data.get('state') == 0:
+        return None
+    return f"API返回错误: {data.get('message', '未知错误')}"
+
+
+def _dlt_check(data):
+    # 某些情况下 errorMessage 是“处理成功”但 isSuccess 为 false
+    if data.get('isSuccess') or data.get('errorMessage') == '处理成功':
+        return None
+    return f"API返回错误: {data.get('errorMessage', '未知错误')}"
+
+
+SSQ_API = ApiSpec(
+    'ssq',
+    'https://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice',
+    _ssq_check,
+    lambda data: data.get('result') or [],
+    lambda data: data.get('total'),
+)
+
+DLT_API = ApiSpec(
+    'dlt',
+    'https://webapi.sporttery.cn/gateway/lottery/getHistoryPageListV1.qry',
+    _dlt_check,
+    lambda data: (data.get('value') or {}).get('list') or [],
+    lambda data: (data.get('value') or {}).get('total'),
+)
+
+
+class ApiError(ValueError):
+    """接口返回了 HTTP 200，但响应内容表示失败"""
+
+
+# 表示“请求过快”的状态码：567 为官方接口的反爬响应
+THROTTLE_STATUSES = frozenset({429, 503, 567})
+
+# 请求结果分类：成功、被限流（降速并计入熔断）、服务端故障（计入熔断）、
+# 与主机健康无关（如接口返回业务错误，不调整速率也不计入熔断）
+OK, THROTTLED, FAILED, NEUTRAL = 'ok', 'throttled', 'failed', 'neutral'
+
+
+def classify_status(status):
+    """把一个非 2xx 的 HTTP 状态码归类为 THROTTLED / FAILED / NEUTRAL"""
+    if status in THROTTLE_STATUSES:
+        return THROTTLED
+    return FAILED if status >= 500 else NEUTRAL
+
+
+def classify_error(error):
+    """把一次请求的异常归类为 OK / THROTTLED / FAILED / NEUTRAL"""
+    if error is None:
+        return OK
+    import requests
+
+    if isinstance(error, requests.exceptions.Timeout):
+        return THROTTLED
+    response = getattr(error, 'response', None)
+    if isinstance(error, requests.exceptions.HTTPError) and response is not None:
+        return classify_status(response.status_code)
+    if isinstance(error, requests.exceptions.RequestException):
+        return FAILED
+    return NEUTRAL
+
+
+class AdaptiveRateLimiter:
+    """
+    令牌桶限速器，速率按 AIMD 自适应：
+    - 令牌以 rate 个/秒补充，桶容量为 burst，空闲后允许少量突发
+    - 加性增：每次成功后速率增加 increase / rate，满速运行时约每秒增加 increase，上限 max_rate
+    - 乘性减：被限流（567 / 429 / 503 / 超时）或响应慢于 slow_latency 秒时速率乘以 decrease，
+      下限 min_rate；降速之前已发出的请求再返回的限流信号不重复降速
+    rate 为 0 或 None 时不限速。
+    """
+
+    def __init__(self, rate, min_rate=None, max_rate=None, burst=2, increase=None,
+                 decrease=0.5, slow_latency=10.0):
+        self.enabled = bool(rate and rate > 0)
+        self.rate = float(rate or 0.0)
+        self.min_rate = min_rate if min_rate is not None else self.rate / 10
+        self.max_rate = max_rate if max_rate is not None else self.rate * 4
+        self.burst = burst
+        self.increase = increase if increase is not None else self.rate / 10
+        self.decrease = decrease
+        self.slow_latency = slow_latency
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._last_decrease = float('-inf')
+
+    def reserve(self):
+        """取一个令牌，返回还需等待的秒数（令牌可以预支，等待时间按欠数计算）"""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, outcome, latency, sent_at):
+        """
+        按一次请求的结果调整速率。
+        - outcome: classify_error 的结果
+        - latency: 请求耗时（秒）
+        - sent_at: 请求发出时的 time.monotonic()
+        返回是否已由降速处理了这次限流（速率已在下限时返回 False，交给熔断器处理）。
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            if outcome == THROTTLED or (outcome == OK and self.slow_latency and latency > self.slow_latency):
+                if sent_at < self._last_decrease:
+                    return outcome == THROTTLED
+                if self.rate <= self.min_rate:
+                    return False
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._tokens = min(self._tokens, 0.0)
+                self._last_decrease = time.monotonic()
+                return outcome == THROTTLED
+            if outcome == OK:
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+            return False
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器处于打开状态且已多次熔断，请求被直接拒绝"""
+
+
+class CircuitBreaker:
+    """
+    单个主机的熔断器：
+    - 连续 failure_threshold 次失败（服务端故障，或限速器已无法再降速时的限流）后打开，reset_timeout 秒内不再发请求
+    - 到期后进入半开状态，只放行一个探测请求：成功则关闭，失败则重新打开并把等待时间加倍
+      （不超过 max_reset_timeout）；探测结果在同样长的时间内没有反馈（调用方异常退出等）时，
+      放行新的探测请求，避免一直停在半开状态
+    - 连续熔断 max_trips 次后，打开期间的请求不再等待而是立即失败（抛出 CircuitOpenError），
+      让抓取尽快结束，等待时间到期后仍会放行探测请求
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=5.0, max_reset_timeout=60.0, max_trips=3):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.max_trips = max_trips
+        self.state = self.CLOSED
+        self.trips = 0
+        self._failures = 0
+        self._timeout = reset_timeout
+        self._open_until = 0.0
+        self._probe_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """请求前调用：返回需要等待的秒数（0 表示可以发出请求），之后需再次调用"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now < self._open_until:
+                    if self.trips >= self.max_trips:
+                        raise CircuitOpenError(f"连续熔断 {self.trips} 次，{self._open_until - now:.0f} 秒内拒绝请求")
+                    return self._open_until - now
+                self.state = self.HALF_OPEN  # 当前调用者发出探测请求
+                self._probe_until = now + self._timeout
+                return 0.0
+            # 半开：等待探测请求的结果，超时未反馈则由当前调用者重新探测
+            if now >= self._probe_until:
+                self._probe_until = now + self._timeout
+                return 0.0
+            return min(1.0, self.reset_timeout, self._probe_until - now)
+
+    def record(self, outcome):
+        """请求完成后调用，outcome 为 classify_error 的结果"""
+        with self._lock:
+            if outcome in (THROTTLED, FAILED):
+                self._failures += 1
+                if self.state == self.HALF_OPEN:
+                    self._timeout = min(self.max_reset_timeout, self._timeout * 2)
+                    self._open()
+                elif self.state == self.CLOSED and self._failures >= self.failure_threshold:
+                    self._open()
+            else:
+                # 收到了正常的 HTTP 响应，主机可用
+                self.state = self.CLOSED
+                self.trips = 0
+                self._failures = 0
+                self._timeout = self.reset_timeout
+
+    def _open(self):
+        self.state = self.OPEN
+        self.trips += 1
+        self._open_until = time.monotonic() + self._timeout
+        print(f"🔌 请求连续失败，熔断 {self._timeout:.0f} 秒后再试 (第 {self.trips} 次熔断)")
+
+
+# 按主机共享的限速器与熔断器：同一进程中访问同一主机的所有抓取器共用一份状态
+_host_lock = threading.Lock()
+_host_limiters = {}
+_host_breakers = {}
+
+
+def host_limiter(host, rate, **options):
+    """host 对应的共享限速器，首次使用时按 rate 与 options 创建"""
+    with _host_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            limiter = _host_limiters[host] = AdaptiveRateLimiter(rate, **options)
+        return limiter
+
+
+def host_breaker(host):
+    """host 对应的共享熔断器"""
+    with _host_lock:
+        breaker = _host_breakers.get(host)
+        if breaker is None:
+            breaker = _host_breakers[host] = CircuitBreaker()
+        return breaker
+
+
+def host_controls(url, rate, **options):
+    """url 所在主机的共享 (限速器, 熔断器)；rate 为 0 或 None 时限速器为 None（不限速）"""
+    host = urlparse(url).netloc
+    limiter = host_limiter(host, rate, **options) if rate else None
+    return limiter, host_breaker(host)
+
+
+def report_outcome(limiter, breaker, outcome, sent_at):
+    """
+    把一次请求的结果反馈给限速器与熔断器：
+    限流信号优先由限速器降速消化，已降到下限仍被限流时才计入熔断
+    """
+    absorbed = limiter is not None and limiter.record(outcome, time.monotonic() - sent_at, sent_at)
+    if not absorbed:
+        breaker.record(outcome)
+
+
+def reset_host_controls():
+    """清空所有主机的限速与熔断状态（测试、基准测试之间使用）"""
+    with _host_lock:
+        _host_limiters.clear()
+        _host_breakers.clear()
+
+
+class PageFetcher:
+    """
+    基于线程池的有界并发分页抓取器（sync 后端）。
+    - rate_limit: 初始速率（次/秒），max_rate 为自适应提速的上限（默认 rate_limit 的 4 倍）；
+      同一主机的限速器只在首次使用时创建，之后所有抓取器共用
+    """
+
+    def __init__(self, session, api=SSQ_API, max_workers=4, rate_limit=5.0, max_rate=None, max_retries=5,
+                 backoff=0.0, max_failed_pages=5, timeout=30, user_agents=None):
+        self.session = session
+        self.api = api
+        self.max_workers = max(1, int(max_workers))
+        self.rate_limit = rate_limit
+        self.max_rate = max_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_failed_pages = max_failed_pages
+        self.timeout = timeout
+        self.user_agents = user_agents or []
+        self._local = threading.local()
+
+    def _controls(self, url):
+        """url 所在主机的共享 (限速器, 熔断器)；rate_limit 为 0 时不限速"""
+        return host_controls(url, self.rate_limit, max_rate=self.max_rate)
+
+    def _observe(self, limiter, breaker, error, sent_at):
+        report_outcome(limiter, breaker, classify_error(error), sent_at)
+
+    def _thread_session(self):
+        """当前线程的 Session：复制主 Session 的请求头，挂载同一个连接池适配器"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+            session.cookies.update(self.session.cookies)
+            for prefix, adapter in self.session.adapters.items():
+                session.mount(prefix, adapter)
+            self._local.session = session
+        return session
+
+    def _request(self, url, params, attempt):
+        """发起一次请求并检查响应，失败时抛出异常"""
+        session = self._thread_session()
+        if attempt > 0 and self.user_agents:
+            # 重试时轮换 User-Agent
+            session.headers['User-Agent'] = random.choice(self.user_agents)
+        response = session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        error = self.api.check(data)
+        if error:
+            raise ApiError(error)
+        return data
+
+    def _retry_delay(self, attempt):
+        """第 attempt 次重试前的退避时间：backoff * 2^(attempt-1)，带随机抖动"""
+        if attempt == 0 or not self.backoff:
+            return 0.0
+        return self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+    def _report_retry(self, params, attempt, max_retries, error):
+        print(f"⚠️  请求失败 (页面 {params.get('pageNo', '-')}, 尝试 {attempt + 1}/{max_retries}): {error}")
+
+    def fetch_json(self, url, params, max_retries=None):
+        """
+        带重试地请求一次接口，返回解析后的 JSON（已通过 api.check）。
+        重试耗尽后抛出最后一次的异常。
+        """
+        import requests
+
+        max_retries = max_retries or self.max_retries
+        limiter, breaker = self._controls(url)
+        last_error = None
+        for attempt in range(max_retries):
+            # 重试退避之后，等待熔断器放行（未熔断时立即放行）
+            delay = self._retry_delay(attempt) or breaker.acquire()
+            while delay > 0:
+                time.sleep(delay)
+                delay = breaker.acquire()
+            if limiter is not None:
+                limiter.wait()
+            sent_at = time.monotonic()
+            try:
+                data = self._request(url, params, attempt)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self._observe(limiter, breaker, e, sent_at)
+                last_error = e
+                self._report_retry(params, attempt, max_retries, e)
+                continue
+            except BaseException:
+                # 其他异常（含协程被取消）同样反馈为失败，否则半开的熔断器一直等待探测结果
+                report_outcome(limiter, breaker, FAILED, sent_at)
+                raise
+            self._observe(limiter, breaker, None, sent_at)
+            return data
+        raise last_error
+
+    def fetch_pages(self, url, make_params, pages, raw=False, on_page=None):
+        """
+        并发抓取多页数据。
+
+        - make_params(page): 返回该页的请求参数
+        - pages: 页码序列
+        - raw: 为 True 时返回完整的响应 JSON，而不是本页记录
+        - on_page(page, result): 每页成功时在调用线程中回调（例如写入断点），按完成顺序
+
+        返回 {页码: 本页记录列表}；失败的页不出现在结果中。
+        失败页数达到 max_failed_pages 时取消尚未开始的页，避免被封禁。
+        """
+        pages = list(pages)
+        results = {}
+        failed = 0
+
+        def fetch_one(page):
+            data = self.fetch_json(url, make_params(page))
+            return data if raw else self.api.items(data)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(fetch_one, page): page for page in pages}
+            for future in as_completed(futures):
+                page = futures[future]
+                try:
+                    results[page] = future.result()
+                    print(f"✅ 第 {page} 页获取到 {len(self.api.items(results[page]) if raw else results[page])} 条记录")
+                    if on_page is not None:
+                        on_page(page, results[page])
+                except Exception as e:
+                    failed += 1
+                    print(f"💥 第 {page} 页重试 {self.max_retries} 次后仍然失败，跳过此页: {e}")
+                    if failed >= self.max_failed_pages:
+                        print(f"🛑 已有 {failed} 页失败，停止抓取以避免被封禁")
+                        for pending in futures:
+                            pending.cancel()
+                        break
+        return results
+
+
+class AsyncPageFetcher(PageFetcher):
+    """
+    asyncio 协程版本（async 后端）：信号量限制在途请求数，限速等待和重试退避用 asyncio.sleep，
+    只有阻塞的 HTTP 请求本身交给线程执行。
+    fetch_json_async / fetch_pages_async 供协程中 await；
+    fetch_json / fetch_pages 与同步后端接口相同，可直接替换。
+    """
+
+    async def fetch_json_async(self, url, params, max_retries=None):
+        import requests
+
+        max_retries = max_retries or self.max_retries
+        limiter, breaker = self._controls(url)
+        last_error = None
+        for attempt in range(max_retries):
+            # 重试退避之后，等待熔断器放行（未熔断时立即放行）
+            delay = self._retry_delay(attempt) or breaker.acquire()
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = breaker.acquire()
+            if limiter is not None:
+                delay = limiter.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            sent_at = time.monotonic()
+            try:
+                data = await asyncio.to_thread(self._request, url, params, attempt)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self._observe(limiter, breaker, e, sent_at)
+                last_error = e
+                self._report_retry(params, attempt, max_retries, e)
+                continue
+            except BaseException:
+                # 其他异常（含协程被取消）同样反馈为失败，否则半开的熔断器一直等待探测结果
+                report_outcome(limiter, breaker, FAILED, sent_at)
+                raise
+            self._observe(limiter, breaker, None, sent_at)
+            return data
+        raise last_error
+
+    async def fetch_pages_async(self, url, make_params, pages, raw=False, on_page=None):
+        """与 PageFetcher.fetch_pages 相同，返回 {页码: 本页记录列表}（raw 为 True 时为完整响应）"""
+        pages = list(pages)
+        results = {}
+        failed = 0
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def fetch_one(page):
+            async with semaphore:
+                try:
+                    data = await self.fetch_json_async(url, make_params(page))
+                except Exception as e:
+                    return page, None, e
+                return page, data if raw else self.api.items(data), None
+
+        tasks = [asyncio.ensure_future(fetch_one(page)) for page in pages]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                page, result, error = await next_done
+                if error is None:
+                    results[page] = result
+                    print(f"✅ 第 {page} 页获取到 {len(self.api.items(result) if raw else result)} 条记录")
+                    if on_page is not None:
+                        on_page(page, result)
+                    continue
+                failed += 1
+                print(f"💥 第 {page} 页重试 {self.max_retries} 次后仍然失败，跳过此页: {error}")
+                if failed >= self.max_failed_pages:
+                    print(f"🛑 已有 {failed} 页失败，停止抓取以避免被封禁")
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return results
+
+    def fetch_json(self, url, params, max_retries=None):
+        return asyncio.run(self.fetch_json_async(url, params, max_retries))
+
+    def fetch_pages(self, url, make_params, pages, raw=False, on_page=None):
+        return asyncio.run(self.fetch_pages_async(url, make_params, pages, raw, on_page))
+
+
+# 可用的抓取后端
+FETCHER_BACKENDS = {
+    'sync': PageFetcher,
+    'async': AsyncPageFetcher,
+}
+
+
+def make_fetcher(backend, session, **kwargs):
+    """按名称创建抓取后端（'sync' 或 'async'），其余参数传给构造函数"""
+    try:
+        fetcher_class = FETCHER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"未知的抓取后端: {backend}（可选: {', '.join(FETCHER_BACKENDS)}）")
+    return fetcher_class(session, **kwargs)
+
+
+def plan_fetch(fetcher, url, make_params, page_sizes=PAGE_SIZE_CANDIDATES):
+    """
+    用一次请求确定抓取规划。
+
+    - make_params(page, page_size): 返回请求参数
+    - 从大到小尝试 page_sizes，第一个返回有效数据的即被采用
+    - 服务端把过大的 pageSize 截断到自身上限时，以实际返回条数作为 pageSize
+
+    全部失败时返回 None。
+    """
+    for size in page_sizes:
+        try:
+            data = fetcher.fetch_json(url, make_params(1, size), max_retries=2)
+        except Exception as e:
+            print(f"⚠️  pageSize={size} 不可用: {e}")
+            continue
+
+        result = fetcher.api.items(data)
+        if not result:
+            continue
+        try:
+            total = int(fetcher.api.total(data) or 0)
+        except (TypeError, ValueError):
+            total = 0
+
+        page_size = size
+        if len(result) < size and total > len(result):
+            page_size = len(result)
+
+        if total:
+            page_count = -(-total // page_size)
+        elif len(result) < size:
+            total, page_count = len(result), 1
+        else:
+            total, page_count = None, None
+        return FetchPlan(page_size, total, page_count, result)
+    return None
@@ -16,33 +16,46 @@
 3. 基于统计分析生成推荐号码
 """
 
-import requests
-import time
+import argparse
 import json
 import re
-import pandas as pd
 import numpy as np
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import Counter, defaultdict
+from collections import Counter
 import warnings
 import os
 import hjson
 import random
-warnings.filterwarnings('ignore')
 
-# 设置中文字体支持
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+try:
+    from scripts.draw_store import DrawStore, SSQ_GAME, sidecar_path, content_checksum
+    from scripts.draw_stats import RunningStats, stats_path
+    from scripts.analysis_cache import AnalysisSnapshot, dataset_key
+    from scripts.draw_journal import DrawJournal, atomic_write, merge_records
+    from scripts.plotting import BarPanel, ChartSpec, render_if_changed
+    from scripts.fetchers import SSQ_API, make_fetcher, plan_fetch
+    from scripts.draw_calendar import SSQ_DRAW_WEEKDAYS, beijing_now, draw_dates_since
+    from scripts.backfill_checkpoint import BackfillCheckpoint
+except ImportError:  # 直接在 scripts/ 目录下运行本脚本时
+    from draw_store import DrawStore, SSQ_GAME, sidecar_path, content_checksum
+    from draw_stats import RunningStats, stats_path
+    from analysis_cache import AnalysisSnapshot, dataset_key
+    from draw_journal import DrawJournal, atomic_write, merge_records
+    from plotting import BarPanel, ChartSpec, render_if_changed
+    from fetchers import SSQ_API, make_fetcher, plan_fetch
+    from draw_calendar import SSQ_DRAW_WEEKDAYS, beijing_now, draw_dates_since
+    from backfill_checkpoint import BackfillCheckpoint
+
+warnings.filterwarnings('ignore')
 
 class DoubleColorBallAnalyzer:
     """双色球分析器"""
     
     def __init__(self):
         self.base_url = "https://www.cwl.gov.cn/ygkj/wqkjgg/"
-        self.api_url = "https://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice"
+        self.api_url = SSQ_API.url
+        # 抓取后端：'sync'（线程池）或 'async'（asyncio），见 fetchers.py
+        self.fetcher_backend = 'sync'
         
         # 多个真实的User-Agent，用于轮换
         self.user_agents = [
@@ -54,16 +67,107 @@ class DoubleColorBallAnalyzer:
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0'
         ]
         
-        self.session = requests.Session()
-        self.lottery_data = []
+        # requests 会话在首次抓取时才创建（见 session 属性），只做分析时不导入 requests
+        self._session = None
+        # 列式存储（红球矩阵、蓝球向量、奖金列、期号索引），所有分析都基于它进行
+        self.draw_store = DrawStore.from_records([], SSQ_GAME)
+        self._snapshot = None
+        # 增量维护的统计：全量历史 / 最近10期
+        self._running_stats = None
+        self._recent_running = None
+        # 抓取规划（pageSize、总页数），首次需要时请求一次并缓存
+        self._fetch_plan = None
+    
+    @property
+    def session(self):
+        """requests 会话（连接池 + 随机 User-Agent），首次使用时才导入 requests 并创建"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+            self._setup_session()
+        return self._session
+    
+    @property
+    def lottery_data(self):
+        """历史开奖数据的 list-of-dicts 视图（模板渲染、JSON 兼容），按期号从新到旧"""
+        return self.draw_store.to_records()
+    
+    @lottery_data.setter
+    def lottery_data(self, records):
+        """整体替换历史数据时一次性重建列式存储"""
+        self.draw_store = DrawStore.from_records(records or [], SSQ_GAME)
+        self._reset_derived()
+    
+    def _reset_derived(self):
+        """数据整体替换后丢弃所有派生结果（分析快照、增量统计）"""
+        self._snapshot = None
+        self._running_stats = None
+        self._recent_running = None
+    
+    def merge_draws(self, records):
+        """
+        合并新开奖记录：新期号拼接到最前面、重叠期号按行替换，期号索引只追加新期号；
+        各列仍会整体复制一次（写时复制，O(N)，见 DrawStore.prepend），但不再逐条解析和排序。
+        仅在需要补历史缺口时才整体排序重建。
+        """
+        old = self.draw_store
+        store = old.prepend(records)
+        if store is None:
+            self.lottery_data = merge_records(self.lottery_data, records)
+            return
         
-        # 配置session
-        self._setup_session()
+        # 只有新期号拼接在最前面（没有替换已有期号）时，统计才能按新开奖逐期增量更新；
+        # 否则统计与数据集不再对应，下次访问时重新完整统计
+        if all(old.index_of(rec['period']) is None for rec in records):
+            for running in (self._running_stats, self._recent_running):
+                if running is not None and running.matches(old):
+                    for i in range(len(store) - len(old) - 1, -1, -1):
+                        running.add_draw(store.periods[i], store.main[i], store.extra[i])
+        else:
+            self._running_stats = None
+            self._recent_running = None
+        self.draw_store = store
+        self._snapshot = None
+    
+    @property
+    def analysis_snapshot(self):
+        """当前数据集版本的分析结果快照，期数或最新期号变化时自动重建"""
+        key = dataset_key(self.draw_store)
+        if self._snapshot is None or self._snapshot.key != key:
+            self._snapshot = AnalysisSnapshot(key)
+        return self._snapshot
+    
+    @property
+    def running_stats(self):
+        """全量历史的增量统计，与当前数据集不对应时重新完整统计一次"""
+        if self._running_stats is None or not self._running_stats.matches(self.draw_store):
+            self._running_stats = RunningStats.from_store(self.draw_store)
+        return self._running_stats
+    
+    @property
+    def recent_running_stats(self):
+        """最近10期的增量统计（新开奖加入时移出最旧一期）"""
+        if self._recent_running is None or not self._recent_running.matches(self.draw_store):
+            self._recent_running = RunningStats.from_store(self.draw_store, window=10)
+        return self._recent_running
+    
+    @property
+    def stats(self):
+        """当前数据集的核心统计结果（DrawStats，不可变），同一数据集版本只生成一次"""
+        return self.analysis_snapshot.memoize(
+            'stats', lambda: self.running_stats.to_stats(), copy_result=False)
+    
+    @property
+    def recent_stats(self):
+        """最近10期的统计结果（趋势分析使用）"""
+        return self.analysis_snapshot.memoize(
+            'recent_stats', lambda: self.recent_running_stats.to_stats(), copy_result=False)
         
     def _setup_session(self):
         """配置session的基本设置"""
         # 设置连接池
-        adapter = requests.adapters.HTTPAdapter(
+        from requests.adapters import HTTPAdapter
+        adapter = HTTPAdapter(
             pool_connections=10,
             pool_maxsize=20,
             max_retries=3
@@ -93,264 +197,195 @@ class DoubleColorBallAnalyzer:
         self.session.headers.update(headers)
         print(f"🔄 更新User-Agent: {user_agent[:50]}...")
         
-    def get_max_pages(self):
-        """获取真实的最大页码，增强错误处理"""
-        print("正在获取最大页码...")
+    def _make_fetcher(self, max_workers=4, rate_limit=5.0):
+        """创建复用本 session 连接池的分页抓取器（后端由 fetcher_backend 决定）"""
+        return make_fetcher(
+            self.fetcher_backend,
+            self.session,
+            api=SSQ_API,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+            user_agents=self.user_agents
+        )
+    
+    def get_fetch_plan(self, refresh=False):
+        """
+        获取抓取规划：尝试接口可接受的最大 pageSize，并由第一页响应推算总页数。
+        结果缓存在实例上，供全量抓取和增量抓取共用。
+        """
+        if self._fetch_plan is not None and not refresh:
+            return self._fetch_plan
         
-        max_retries = 5
-        base_delay = 2
+        print("正在规划抓取（自适应 pageSize）...")
+        self._update_headers()
+        plan = plan_fetch(
+            self._make_fetcher(),
+            self.api_url,
+            lambda page, page_size: {
+                'name': 'ssq',
+                'pageNo': page,
+                'pageSize': page_size,
+                'systemType': 'PC'
+            }
+        )
+        if plan is None:
+            print("⚠️  抓取规划失败，将使用默认 pageSize=30")
+            return None
         
-        for attempt in range(max_retries):
+        if plan.page_count:
+            print(f"✅ pageSize={plan.page_size}，共 {plan.total} 条记录，需要抓取 {plan.page_count} 页")
+        else:
+            print(f"✅ pageSize={plan.page_size}，接口未返回总数，将抓取到末页为止")
+        self._fetch_plan = plan
+        return plan
+    
+    def get_max_pages(self):
+        """获取最大页码（按抓取规划中的 pageSize 计算），规划失败时使用默认页数 100"""
+        plan = self.get_fetch_plan()
+        if plan is None or not plan.page_count:
+            print("⚠️  无法确定总页数，使用默认页数 100")
+            return 100
+        return plan.page_count
+    
+    def _parse_api_item(self, item):
+        """把官方接口返回的一条开奖信息解析为记录字典，关键字段缺失时返回 None"""
+        # 解析期号
+        period = item.get('code', '')
+        
+        # 解析开奖日期，提取日期部分，去除星期信息
+        date_match = re.search(r'(\d{4}-\d{2}-\d{2})', item.get('date', ''))
+        if not date_match:
+            return None
+        draw_date = date_match.group(1)
+        
+        # 解析红球号码（逗号分隔的字符串）
+        red_str = item.get('red', '')
+        if not red_str:
+            return None
+        red_balls = [int(x.strip()) for x in red_str.split(',')]
+        
+        # 解析蓝球号码
+        blue_str = item.get('blue', '')
+        if not blue_str:
+            return None
+        blue_ball = int(blue_str)
+        
+        # 解析其他信息
+        sales_amount = self._parse_number(item.get('sales', '0'))
+        pool_amount = self._parse_number(item.get('poolmoney', '0'))
+        
+        # 解析奖级信息
+        first_prize_count = 0
+        first_prize_amount = 0
+        second_prize_count = 0
+        second_prize_amount = 0
+        
+        for grade in item.get('prizegrades', []):
+            if grade.get('type') == 1:  # 一等奖
+                first_prize_count = self._parse_number(grade.get('typenum', '0'))
+                first_prize_amount = self._parse_number(grade.get('typemoney', '0'))
+            elif grade.get('type') == 2:  # 二等奖
+                second_prize_count = self._parse_number(grade.get('typenum', '0'))
+                second_prize_amount = self._parse_number(grade.get('typemoney', '0'))
+        
+        return {
+            'period': period,
+            'date': draw_date,
+            'red_balls': red_balls,
+            'blue_ball': blue_ball,
+            'first_prize_count': first_prize_count,
+            'first_prize_amount': first_prize_amount,
+            'second_prize_count': second_prize_count,
+            'second_prize_amount': second_prize_amount,
+            'sales_amount': sales_amount,
+            'pool_amount': pool_amount
+        }
+    
+    def _parse_items(self, items):
+        """解析一页接口数据，跳过无法解析的记录"""
+        records = []
+        for item in items:
             try:
-                # 每次尝试都更新headers
-                self._update_headers()
-                
-                # 先获取第一页数据来确定总数
-                params = {
-                    'name': 'ssq',
-                    'pageNo': 1,
-                    'pageSize': 30,
-                    'systemType': 'PC'
-                }
-                
-                # 添加随机延时
-                # if attempt > 0:
-                #     delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                #     print(f"⏳ 第 {attempt + 1} 次尝试，等待 {delay:.1f} 秒...")
-                #     time.sleep(delay)
-                # else:
-                #     time.sleep(random.uniform(0, 1))  # 初始随机延时
-                
-                print(f"🌐 正在请求API... (尝试 {attempt + 1}/{max_retries})")
-                response = self.session.get(self.api_url, params=params, timeout=30)
-                
-                print(f"📡 响应状态码: {response.status_code}")
-                response.raise_for_status()
-                
-                data = response.json()
-                print(f"📊 API响应: state={data.get('state')}, message={data.get('message')}")
-                
-                if data.get('state') != 0:
-                    print(f"❌ API返回错误: {data.get('message', '未知错误')}")
-                    if attempt < max_retries - 1:
-                        continue
-                    else:
-                        return 100  # 默认返回100页
-                
-                # 尝试获取总记录数
-                total_count = data.get('total', 0)
-                if total_count > 0:
-                    max_pages = (total_count + 29) // 30  # 向上取整
-                    print(f"✅ 发现总共 {total_count} 条记录，需要抓取 {max_pages} 页")
-                    return max_pages
-                
-                # 如果无法获取总数，通过试探方式确定最大页码
-                print("无法获取总记录数，正在试探最大页码...")
-                page = 1
-                while page <= 200:  # 设置上限防止无限循环
-                    params['pageNo'] = page
-                    response = self.session.get(self.api_url, params=params, timeout=30)
-                    data = response.json()
-                    
-                    if data.get('state') != 0 or not data.get('result'):
-                        break
-                    
-                    page += 10  # 每次跳跃10页快速试探
-                    time.sleep(0.2)
-                
-                # 精确定位最大页码
-                start = max(1, page - 10)
-                end = page
-                
-                for precise_page in range(start, end + 1):
-                    params['pageNo'] = precise_page
-                    response = self.session.get(self.api_url, params=params, timeout=30)
-                    data = response.json()
-                    
-                    if data.get('state') != 0 or not data.get('result'):
-                        max_pages = precise_page - 1
-                        print(f"✅ 通过试探确定最大页码为 {max_pages}")
-                        return max_pages
-                    
-                    time.sleep(0.1)
-                
-                return max(1, page - 1)
-                
-            except requests.exceptions.Timeout:
-                print(f"⏰ 请求超时 (尝试 {attempt + 1}/{max_retries})")
-            except requests.exceptions.ConnectionError:
-                print(f"🔌 连接错误 (尝试 {attempt + 1}/{max_retries})")
-            except requests.exceptions.HTTPError as e:
-                print(f"🌐 HTTP错误: {e} (尝试 {attempt + 1}/{max_retries})")
+                record = self._parse_api_item(item)
             except Exception as e:
-                print(f"❌ 获取最大页码时出错: {e} (尝试 {attempt + 1}/{max_retries})")
-            
-            if attempt < max_retries - 1:
-                print("🔄 准备重试...")
-        
-        print("⚠️  所有尝试都失败，使用默认页数 100")
-        return 100
+                print(f"⚠️  解析记录时出错: {e}")
+                continue
+            if record:
+                records.append(record)
+        return records
     
-    def fetch_lottery_data(self, max_pages=10):
-        """抓取双色球开奖数据，增强错误处理"""
+    def fetch_lottery_data(self, max_pages=None, max_workers=4, rate_limit=5.0, checkpoint=None, resume=False):
+        """
+        抓取双色球开奖数据（多页并发抓取）
+        - max_pages: 最多抓取的页数，默认取抓取规划中的总页数
+        - max_workers: 同时在途的请求数上限
+        - rate_limit: 所有线程合计的初始请求速率（次/秒），之后随接口响应自适应调整
+        - checkpoint: BackfillCheckpoint，给出时每页到达即写入断点，全部完成后删除
+        - resume: 从 checkpoint 中已完成的页继续，只抓取缺少的页
+        """
         print("开始抓取双色球开奖数据...")
         
-        consecutive_failures = 0
-        max_consecutive_failures = 5
-        successful_pages = 0
+        plan = self.get_fetch_plan()
+        page_size = plan.page_size if plan else 30
+        if max_pages is None:
+            max_pages = plan.page_count if plan and plan.page_count else 100
+        print(f"🚀 并发抓取 {max_pages} 页（pageSize {page_size}，并发 {max_workers}，初始限速 {rate_limit} 次/秒）")
         
-        for page in range(1, max_pages + 1):
-            print(f"📄 正在抓取第 {page} 页数据...")
-            
-            # 重试机制
-            max_retries = 5
-            retry_count = 0
-            success = False
-            base_delay = 1
-            
-            while retry_count < max_retries and not success:
-                try:
-                    # 每隔几次请求更新headers
-                    if page % 5 == 1 or retry_count > 0:
-                        self._update_headers()
-                    
-                    # API参数
-                    params = {
-                        'name': 'ssq',  # 双色球
-                        'pageNo': page,
-                        'pageSize': 30,
-                        'systemType': 'PC'
-                    }
-                    
-                    # 计算延时
-                    # if retry_count > 0:
-                    #     # 指数退避延时，加上随机因子
-                    #     delay = min(base_delay * (2 ** retry_count), 15) + random.uniform(0, 2)
-                    #     print(f"⏳ 第 {retry_count + 1} 次重试，等待 {delay:.1f} 秒...")
-                    #     time.sleep(delay)
-                    # else:
-                    #     # 正常延时，避免请求过于频繁
-                    #     delay = random.uniform(1, 2)  # 1-2秒随机延时
-                    #     time.sleep(delay)
-                    
-                    print(f"🌐 发送请求到API... (页面 {page}, 尝试 {retry_count + 1})")
-                    response = self.session.get(self.api_url, params=params, timeout=30)
-                    
-                    print(f"📡 响应状态码: {response.status_code}")
-                    response.raise_for_status()
-                    
-                    # 解析JSON响应
-                    data = response.json()
-                    print(f"📊 API响应解析: state={data.get('state')}")
-                    
-                    if data.get('state') != 0:
-                        print(f"❌ API返回错误: {data.get('message', '未知错误')}")
-                        retry_count += 1
-                        continue
-                    
-                    results = data.get('result', [])
-                    if not results:
-                        print(f"📭 第 {page} 页无数据")
-                        break
-                    
-                    print(f"✅ 第 {page} 页获取到 {len(results)} 条记录")
-                    consecutive_failures = 0  # 重置连续失败计数
-                    successful_pages += 1
-                    
-                    for item in results:
-                        try:
-                            # 解析期号
-                            period = item.get('code', '')
-                            
-                            # 解析开奖日期
-                            date_str = item.get('date', '')
-                            # 提取日期部分，去除星期信息
-                            date_match = re.search(r'(\d{4}-\d{2}-\d{2})', date_str)
-                            if not date_match:
-                                continue
-                            draw_date = date_match.group(1)
-                            
-                            # 解析红球号码（逗号分隔的字符串）
-                            red_str = item.get('red', '')
-                            if not red_str:
-                                continue
-                            red_balls = [int(x.strip()) for x in red_str.split(',')]
-                            
-                            # 解析蓝球号码
-                            blue_str = item.get('blue', '')
-                            if not blue_str:
-                                continue
-                            blue_ball = int(blue_str)
-                            
-                            # 解析其他信息
-                            sales_amount = self._parse_number(item.get('sales', '0'))
-                            pool_amount = self._parse_number(item.get('poolmoney', '0'))
-                            
-                            # 解析奖级信息
-                            prizegrades = item.get('prizegrades', [])
-                            first_prize_count = 0
-                            first_prize_amount = 0
-                            second_prize_count = 0
-                            second_prize_amount = 0
-                            
-                            for grade in prizegrades:
-                                if grade.get('type') == 1:  # 一等奖
-                                    first_prize_count = self._parse_number(grade.get('typenum', '0'))
-                                    first_prize_amount = self._parse_number(grade.get('typemoney', '0'))
-                                elif grade.get('type') == 2:  # 二等奖
-                                    second_prize_count = self._parse_number(grade.get('typenum', '0'))
-                                    second_prize_amount = self._parse_number(grade.get('typemoney', '0'))
-                            
-                            # 存储数据
-                            lottery_record = {
-                                'period': period,
-                                'date': draw_date,
-                                'red_balls': red_balls,
-                                'blue_ball': blue_ball,
-                                'first_prize_count': first_prize_count,
-                                'first_prize_amount': first_prize_amount,
-                                'second_prize_count': second_prize_count,
-                                'second_prize_amount': second_prize_amount,
-                                'sales_amount': sales_amount,
-                                'pool_amount': pool_amount
-                            }
-                            
-                            self.lottery_data.append(lottery_record)
-                            
-                        except Exception as e:
-                            print(f"⚠️  解析记录时出错: {e}")
-                            continue
-                    
-                    success = True  # 标记成功
-                    
-                except requests.exceptions.Timeout:
-                    print(f"⏰ 网络超时 (页面 {page}, 尝试 {retry_count + 1})")
-                    retry_count += 1
-                except requests.exceptions.ConnectionError:
-                    print(f"🔌 连接错误 (页面 {page}, 尝试 {retry_count + 1})")
-                    retry_count += 1
-                except requests.exceptions.HTTPError as e:
-                    print(f"🌐 HTTP错误: {e} (页面 {page}, 尝试 {retry_count + 1})")
-                    retry_count += 1
-                except Exception as e:
-                    print(f"❌ 抓取第 {page} 页时出错: {e} (尝试 {retry_count + 1})")
-                    retry_count += 1
-                
-                if retry_count >= max_retries:
-                    consecutive_failures += 1
-                    print(f"💥 第 {page} 页重试 {max_retries} 次后仍然失败，跳过此页")
+        def make_params(page):
+            return {
+                'name': 'ssq',  # 双色球
+                'pageNo': page,
+                'pageSize': page_size,
+                'systemType': 'PC'
+            }
+        
+        fetcher = self._make_fetcher(max_workers=max_workers, rate_limit=rate_limit)
+        # 断点只用于总页数已知的完整抓取
+        if not (plan and plan.page_count and plan.total):
+            checkpoint = None
+        page_records = {}
+        
+        def on_page(page, items):
+            page_records[page] = self._parse_items(items)
+            if checkpoint is not None:
+                checkpoint.add_page(page, page_records[page])
+        
+        next_page = 1
+        if plan and max_pages >= 1:
+            # 规划时已经拿到第一页，直接复用
+            first_records = self._parse_items(plan.first_page)
+            if checkpoint is not None:
+                page_records.update(checkpoint.begin(page_size, first_records, plan.total, resume))
+            else:
+                page_records[1] = first_records
+            next_page = 2
+        
+        if plan and plan.page_count:
+            pages = [page for page in range(next_page, max_pages + 1) if page not in page_records]
+            fetcher.fetch_pages(self.api_url, make_params, pages, on_page=on_page)
+        else:
+            # 总页数未知：每次并发抓取一批，遇到不满一页（末页）或失败时停止
+            while next_page <= max_pages:
+                batch = range(next_page, min(next_page + max_workers, max_pages + 1))
+                batch_results = fetcher.fetch_pages(self.api_url, make_params, batch, on_page=on_page)
+                if any(len(batch_results.get(page, [])) < page_size for page in batch):
                     break
-            
-            # 如果连续失败太多次，停止抓取
-            if consecutive_failures >= max_consecutive_failures:
-                print(f"🛑 连续 {max_consecutive_failures} 页失败，停止抓取以避免被封禁")
-                break
+                next_page = batch[-1] + 1
+        
+        if checkpoint is not None:
+            checkpoint.finish(page_records, plan.page_count, plan.total)
+        
+        # 按页序拼接，保证输出顺序与逐页抓取一致
+        fetched = [record for page in sorted(page_records) for record in page_records[page]]
         
-        print(f"🎉 数据抓取完成！成功抓取 {successful_pages} 页，共获取 {len(self.lottery_data)} 期开奖数据")
+        # 与已有数据合并并按期号去重（抓取期间恰好开奖时，相邻页会出现重复记录）
+        self.lottery_data = merge_records(self.lottery_data, fetched)
+        successful_pages = len(page_records)
+        print(f"🎉 数据抓取完成！成功抓取 {successful_pages} 页，共获取 {len(self.draw_store)} 期开奖数据")
         
         # 如果获取的数据太少，给出警告
-        if len(self.lottery_data) < 100:
-            print(f"⚠️  获取的数据较少 ({len(self.lottery_data)} 期)，可能存在网络问题")
+        if len(self.draw_store) < 100:
+            print(f"⚠️  获取的数据较少 ({len(self.draw_store)} 期)，可能存在网络问题")
         
         return self.lottery_data
     
@@ -366,19 +401,66 @@ class DoubleColorBallAnalyzer:
             return 0
     
     def save_data(self, filename="data/lottery_data.json"):
-        """保存数据到文件"""
+        """
+        保存完整数据到文件（临时文件 + 原子替换），同时写出二进制快照。
+        完整数据已包含追加日志中的记录，保存后清空日志（即日志压缩）。
+        """
         # 确保目录存在
         os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.lottery_data, f, ensure_ascii=False, indent=2)
+        raw = json.dumps(self.lottery_data, ensure_ascii=False, indent=2).encode('utf-8')
+        atomic_write(filename, raw)
+        self._save_sidecar(filename, raw)
+        DrawJournal(filename).clear()
+        self._save_running_stats(filename, raw)
         print(f"数据已保存到 {filename}")
     
+    def _save_running_stats(self, filename, raw=None):
+        """
+        把全量统计结果连同 JSON 数据文件的校验和保存到数据文件旁，下次加载时无需重新统计。
+        - raw: 刚写入的 JSON 内容；不给出时读取磁盘上的数据文件（只追加了日志时）
+        """
+        try:
+            if raw is None:
+                with open(filename, 'rb') as f:
+                    raw = f.read()
+            self.running_stats.save(stats_path(filename), content_checksum(raw))
+        except OSError as e:
+            print(f"⚠️  统计结果写入失败: {e}")
+    
+    def _save_sidecar(self, filename, raw):
+        """写出与 JSON 内容对应的二进制快照，失败不影响 JSON 数据本身"""
+        try:
+            self.draw_store.save_binary(sidecar_path(filename), content_checksum(raw))
+        except OSError as e:
+            print(f"⚠️  二进制快照写入失败: {e}")
+    
     def load_data(self, filename="data/lottery_data.json"):
-        """从文件加载数据"""
+        """
+        从文件加载数据：
+        1. 二进制快照与 JSON 一致时直接内存映射，否则解析 JSON 并重建快照
+        2. 再按期号合并追加日志中尚未压缩的新记录
+        """
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                self.lottery_data = json.load(f)
-            print(f"从 {filename} 加载了 {len(self.lottery_data)} 期数据")
+            with open(filename, 'rb') as f:
+                raw = f.read()
+            checksum = content_checksum(raw)
+            store = DrawStore.load_binary(sidecar_path(filename), SSQ_GAME, checksum)
+            if store is not None:
+                self.draw_store = store
+                self._reset_derived()
+                source = "（二进制快照）"
+            else:
+                self.lottery_data = json.loads(raw.decode('utf-8'))
+                self._save_sidecar(filename, raw)
+                source = ""
+            pending = DrawJournal(filename).read()
+            if pending:
+                self.merge_draws(pending)
+                source += f"（含追加日志 {len(pending)} 条）"
+            running = RunningStats.load(stats_path(filename), SSQ_GAME)
+            if running is not None and running.matches(self.draw_store, checksum):
+                self._running_stats = running
+            print(f"从 {filename} 加载了 {len(self.draw_store)} 期数据{source}")
             return True
         except FileNotFoundError:
             print(f"文件 {filename} 不存在")
@@ -387,11 +469,39 @@ class DoubleColorBallAnalyzer:
             print(f"文件 {filename} 内容解析失败")
             return False
 
-    def fetch_lottery_data_incremental(self, start_date, end_date=None):
+    def append_data(self, records, filename="data/lottery_data.json"):
+        """把新开奖记录追加到数据文件的追加日志，日志累计过多时压缩回完整 JSON"""
+        journal = DrawJournal(filename)
+        journal.append(records)
+        if journal.needs_compaction():
+            print(f"🗜️  追加日志已累计 {journal.compact_threshold} 条以上，压缩写回完整数据文件")
+            self.save_data(filename)
+        else:
+            self._save_running_stats(filename)
+            print(f"📝 {len(records)} 期新数据已追加到 {journal.path}")
+
+    def fetch_latest_period(self):
+        """只请求一条记录，返回官方最新一期期号；请求失败时返回 None"""
+        self._update_headers()
+        try:
+            data = self._make_fetcher().fetch_json(self.api_url, {
+                'name': 'ssq',
+                'pageNo': 1,
+                'pageSize': 1,
+                'systemType': 'PC'
+            }, max_retries=2)
+        except Exception as e:
+            print(f"⚠️  获取官方最新期号失败: {e}")
+            return None
+        results = data.get('result') or []
+        return results[0].get('code') if results else None
+
+    def fetch_lottery_data_incremental(self, start_date, end_date=None, data_path=None):
         """
         增量抓取双色球数据：
         - start_date: 字符串 'YYYY-MM-DD'，从该日期开始（含）抓取
         - end_date: 字符串 'YYYY-MM-DD'，默认到当前日期
+        - data_path: 数据文件路径，给出时新记录直接追加到其追加日志，不重写整份 JSON
         
         说明：
         - 在已有历史数据基础上，仅补充 start_date 之后的新数据，避免重复抓取全部历史。
@@ -402,196 +512,108 @@ class DoubleColorBallAnalyzer:
         print(f"\n开始增量抓取双色球数据：从 {start_date} 到 {end_date}")
         
         new_records = []
-        consecutive_failures = 0
-        max_consecutive_failures = 5
         page = 1
+        # 复用已有的抓取规划中的 pageSize（不为增量抓取单独发起规划请求）
+        page_size = self._fetch_plan.page_size if self._fetch_plan else 30
+        self._update_headers()
+        fetcher = self._make_fetcher(max_workers=1)
 
         while True:
             print(f"📄 增量抓取第 {page} 页数据...")
+            try:
+                data = fetcher.fetch_json(self.api_url, {
+                    'name': 'ssq',
+                    'pageNo': page,
+                    'pageSize': page_size,
+                    'systemType': 'PC',
+                    'dayStart': start_date,
+                    'dayEnd': end_date
+                })
+            except Exception as e:
+                print(f"💥 增量抓取第 {page} 页重试 {fetcher.max_retries} 次后仍然失败，停止抓取: {e}")
+                break
 
-            max_retries = 5
-            retry_count = 0
-            success = False
+            results = SSQ_API.items(data)
+            if not results:
+                print(f"📭 增量抓取第 {page} 页无数据，结束。")
+                break
+            print(f"✅ 第 {page} 页获取到 {len(results)} 条记录")
 
-            while retry_count < max_retries and not success:
+            for item in results:
                 try:
-                    # 每页或重试时更新headers
-                    if page == 1 or retry_count > 0:
-                        self._update_headers()
-
-                    params = {
-                        'name': 'ssq',
-                        'pageNo': page,
-                        'pageSize': 30,
-                        'systemType': 'PC',
-                        'dayStart': start_date,
-                        'dayEnd': end_date
-                    }
-
-                    print(f"🌐 发送增量请求到API... (页面 {page}, 尝试 {retry_count + 1})")
-                    response = self.session.get(self.api_url, params=params, timeout=30)
-
-                    print(f"📡 响应状态码: {response.status_code}")
-                    response.raise_for_status()
-
-                    data = response.json()
-                    print(f"📊 API响应解析: state={data.get('state')}")
-
-                    if data.get('state') != 0:
-                        print(f"❌ API返回错误: {data.get('message', '未知错误')}")
-                        retry_count += 1
-                        continue
-
-                    results = data.get('result', [])
-                    if not results:
-                        print(f"📭 增量抓取第 {page} 页无数据，结束。")
-                        success = True
-                        break
-
-                    print(f"✅ 第 {page} 页获取到 {len(results)} 条记录")
-                    consecutive_failures = 0
-
-                    for item in results:
-                        try:
-                            period = item.get('code', '')
-                            date_str = item.get('date', '')
-                            date_match = re.search(r'(\d{4}-\d{2}-\d{2})', date_str)
-                            if not date_match:
-                                continue
-                            draw_date = date_match.group(1)
-
-                            # 只保留 >= start_date 的记录（防御性过滤）
-                            if draw_date < start_date:
-                                continue
-
-                            red_str = item.get('red', '')
-                            if not red_str:
-                                continue
-                            red_balls = [int(x.strip()) for x in red_str.split(',')]
-
-                            blue_str = item.get('blue', '')
-                            if not blue_str:
-                                continue
-                            blue_ball = int(blue_str)
-
-                            sales_amount = self._parse_number(item.get('sales', '0'))
-                            pool_amount = self._parse_number(item.get('poolmoney', '0'))
-
-                            prizegrades = item.get('prizegrades', [])
-                            first_prize_count = 0
-                            first_prize_amount = 0
-                            second_prize_count = 0
-                            second_prize_amount = 0
-
-                            for grade in prizegrades:
-                                if grade.get('type') == 1:
-                                    first_prize_count = self._parse_number(grade.get('typenum', '0'))
-                                    first_prize_amount = self._parse_number(grade.get('typemoney', '0'))
-                                elif grade.get('type') == 2:
-                                    second_prize_count = self._parse_number(grade.get('typenum', '0'))
-                                    second_prize_amount = self._parse_number(grade.get('typemoney', '0'))
-
-                            lottery_record = {
-                                'period': period,
-                                'date': draw_date,
-                                'red_balls': red_balls,
-                                'blue_ball': blue_ball,
-                                'first_prize_count': first_prize_count,
-                                'first_prize_amount': first_prize_amount,
-                                'second_prize_count': second_prize_count,
-                                'second_prize_amount': second_prize_amount,
-                                'sales_amount': sales_amount,
-                                'pool_amount': pool_amount
-                            }
-
-                            new_records.append(lottery_record)
-
-                        except Exception as e:
-                            print(f"⚠️  解析增量记录时出错: {e}")
-                            continue
-
-                    success = True
-
-                except requests.exceptions.Timeout:
-                    print(f"⏰ 增量抓取网络超时 (页面 {page}, 尝试 {retry_count + 1})")
-                    retry_count += 1
-                except requests.exceptions.ConnectionError:
-                    print(f"🔌 增量抓取连接错误 (页面 {page}, 尝试 {retry_count + 1})")
-                    retry_count += 1
-                except requests.exceptions.HTTPError as e:
-                    print(f"🌐 增量抓取HTTP错误: {e} (页面 {page}, 尝试 {retry_count + 1})")
-                    retry_count += 1
+                    lottery_record = self._parse_api_item(item)
                 except Exception as e:
-                    print(f"❌ 增量抓取第 {page} 页时出错: {e} (尝试 {retry_count + 1})")
-                    retry_count += 1
-
-                if retry_count >= max_retries:
-                    consecutive_failures += 1
-                    print(f"💥 增量抓取第 {page} 页重试 {max_retries} 次后仍然失败，跳过此页")
-                    break
-
-            if not success or consecutive_failures >= max_consecutive_failures:
-                if consecutive_failures >= max_consecutive_failures:
-                    print(f"🛑 增量抓取连续 {max_consecutive_failures} 页失败，停止抓取以避免被封禁")
-                break
+                    print(f"⚠️  解析增量记录时出错: {e}")
+                    continue
+                # 只保留 >= start_date 的记录（防御性过滤）
+                if lottery_record and lottery_record['date'] >= start_date:
+                    new_records.append(lottery_record)
 
             # 如果本页数据条数少于 pageSize，说明已经到末尾
-            if len(results) < 30:
+            if len(results) < page_size:
                 break
-
             page += 1
 
         if not new_records:
             print("📭 本次增量抓取没有发现新数据。")
             return 0
 
-        # 将新纪录与现有数据合并，按期号排序去重（期号越大越新）
+        # 将新纪录与现有数据合并去重（期号越大越新，新期号直接拼接到最前面）
         print(f"🎉 增量抓取完成，共获取 {len(new_records)} 期新数据，开始合并去重...")
-        # 现有数据 + 新数据 合并
-        all_records = {rec['period']: rec for rec in self.lottery_data}
-        for rec in new_records:
-            all_records[rec['period']] = rec
-
-        # 期号按字符串排序即可（格式为YYYYNNN），从新到旧
-        sorted_periods = sorted(all_records.keys(), reverse=True)
-        self.lottery_data = [all_records[p] for p in sorted_periods]
+        self.merge_draws(new_records)
 
-        print(f"✅ 合并后总共有 {len(self.lottery_data)} 期数据")
+        print(f"✅ 合并后总共有 {len(self.draw_store)} 期数据")
+        if data_path:
+            self.append_data(new_records, data_path)
         return len(new_records)
 
     def init_and_update_history(
         self,
         data_path: str = "data/lottery_data.json",
-        backup_path: str = "data/initial_backup/lottery_data_initial.json"
+        backup_path: str = "data/initial_backup/lottery_data_initial.json",
+        resume: bool = False
     ):
         """
         初始化并增量更新历史数据，逻辑：
         1. 优先从 data_path 读取主数据；
         2. 若主数据不存在或为空，则尝试从 backup_path 读取初始备份数据；
         3. 若仍失败，则从最早历史完整抓取一次，并同时写入主数据和初始备份；
-        4. 在已有历史数据基础上，根据最新日期做增量抓取，仅补充新期数。
+        4. 按开奖日历判断最新一期之后是否可能有新开奖，再用一次轻量请求确认官方最新期号是否变化；
+        5. 确有新开奖时根据最新日期做增量抓取，仅补充新期数（追加写入日志，定期压缩回主数据）。
+        
+        完整抓取时每页写入断点，resume 为 True 时从上次中断的断点继续。
         
         注：初始备份只在“首次完整抓取”时写一次，后续不再覆盖，节约资源。
         """
         print("\n=== 初始化并增量更新双色球历史数据 ===")
 
+        # 上次完整抓取未完成（断点仍在）且要求继续时，不论主数据是否存在都接着抓取
+        checkpoint = BackfillCheckpoint(data_path)
+        pending_backfill = resume and checkpoint.exists()
+        if pending_backfill:
+            print(f"♻️  发现未完成的完整抓取断点 {checkpoint.path}，继续完整抓取")
+
         # 1. 尝试读取主数据
-        data_loaded = self.load_data(data_path)
-        if not data_loaded or not self.lottery_data:
+        data_loaded = not pending_backfill and self.load_data(data_path)
+        if not data_loaded or len(self.draw_store) == 0:
             print("主数据读取失败或为空，尝试从初始备份读取...")
             # 2. 尝试读取初始备份
-            backup_loaded = self.load_data(backup_path)
-            if backup_loaded and self.lottery_data:
+            backup_loaded = not pending_backfill and self.load_data(backup_path)
+            if backup_loaded and len(self.draw_store) > 0:
                 print(f"✅ 已从初始备份 {backup_path} 载入历史数据，将其保存为主数据。")
                 self.save_data(data_path)
             else:
                 print("初始备份读取失败或为空，将从最早历史开始完整抓取一次...")
                 # 3. 完整抓取一次历史数据
                 max_pages = self.get_max_pages()
-                self.fetch_lottery_data(max_pages=max_pages)
-                if not self.lottery_data:
+                self.fetch_lottery_data(max_pages=max_pages, checkpoint=checkpoint, resume=resume)
+                if len(self.draw_store) == 0:
                     print("❌ 完整抓取历史数据失败，无法继续。")
                     return
+                if checkpoint.exists():
+                    # 只抓到部分历史：保留断点，不写主数据和初始备份，避免把缺口当作完整历史保存
+                    print("⚠️  完整抓取未完成，暂不写入主数据和初始备份，请使用 --resume 继续。")
+                    return
                 # 保存主数据
                 self.save_data(data_path)
                 # 写入初始备份（只在首次完整抓取时写一次）
@@ -601,15 +623,15 @@ class DoubleColorBallAnalyzer:
                     json.dump(self.lottery_data, f, ensure_ascii=False, indent=2)
                 print("✅ 初始备份写入完成。")
 
-        if not self.lottery_data:
+        if len(self.draw_store) == 0:
             print("❌ 无可用历史数据，跳过增量更新。")
             return
 
         # 4. 基于已有历史做增量抓取
-        # 假设 self.lottery_data 已按期号从新到旧排序（现有抓取逻辑就是这样）
-        latest_record = self.lottery_data[0]
-        latest_date_str = latest_record.get('date')
-        print(f"当前历史数据最新一期: 期号 {latest_record.get('period')} 日期 {latest_date_str}")
+        # 列式存储按期号从新到旧排列，直接取第一行，不构建记录列表
+        latest_period = self.draw_store.latest_period
+        latest_date_str = self.draw_store.latest_date
+        print(f"当前历史数据最新一期: 期号 {latest_period} 日期 {latest_date_str}")
 
         try:
             latest_date = datetime.strptime(latest_date_str, '%Y-%m-%d')
@@ -618,47 +640,54 @@ class DoubleColorBallAnalyzer:
             return
 
         next_day = latest_date + timedelta(days=1)
-        today = datetime.now()
+        today = beijing_now()
 
         if next_day.date() > today.date():
             print("📭 历史数据已是最新，无需增量抓取。")
             return
 
+        # 按开奖日历判断：最新一期之后还没有到过开奖时间，则无需联网
+        pending_draws = draw_dates_since(latest_date_str, SSQ_DRAW_WEEKDAYS, today)
+        if not pending_draws:
+            print("📭 最新一期之后尚无开奖日，无需增量抓取。")
+            return
+
+        # 可能有新开奖：先用一次轻量请求确认官方最新期号是否变化
+        remote_period = self.fetch_latest_period()
+        if remote_period is not None and remote_period <= latest_period:
+            print(f"📭 官方最新期号仍为 {remote_period}，无需增量抓取。")
+            return
+
         start_date = next_day.strftime('%Y-%m-%d')
         end_date = today.strftime('%Y-%m-%d')
 
-        new_count = self.fetch_lottery_data_incremental(start_date=start_date, end_date=end_date)
-        if new_count > 0:
-            # 更新主数据
-            self.save_data(data_path)
-        else:
+        # 新数据追加写入日志，不再整份重写主数据
+        new_count = self.fetch_lottery_data_incremental(
+            start_date=start_date, end_date=end_date, data_path=data_path)
+        if new_count == 0:
             print("📭 没有新增期数，无需保存主数据。")
     
     def analyze_frequency(self):
         """分析号码出现频率"""
         print("\n=== 号码频率分析 ===")
         
-        # 红球频率分析
-        red_counter = Counter()
-        blue_counter = Counter()
-        
-        for record in self.lottery_data:
-            for red in record['red_balls']:
-                red_counter[red] += 1
-            blue_counter[record['blue_ball']] += 1
+        # 红球/蓝球频率分析（基于列式存储向量化统计）
+        red_counter = self.stats.main_counter()
+        blue_counter = self.stats.extra_counter()
+        total = len(self.draw_store)
         
         # 红球频率排序
         red_freq = sorted(red_counter.items(), key=lambda x: x[1], reverse=True)
         print("\n红球出现频率排行榜（前10）：")
         for i, (num, count) in enumerate(red_freq[:10], 1):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{i:2d}. 号码 {num:2d}: 出现 {count:3d} 次 ({percentage:.1f}%)")
         
         # 蓝球频率排序
         blue_freq = sorted(blue_counter.items(), key=lambda x: x[1], reverse=True)
         print("\n蓝球出现频率排行榜（前10）：")
         for i, (num, count) in enumerate(blue_freq[:10], 1):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{i:2d}. 号码 {num:2d}: 出现 {count:3d} 次 ({percentage:.1f}%)")
         
         return red_counter, blue_counter
@@ -667,68 +696,46 @@ class DoubleColorBallAnalyzer:
         """分析号码规律"""
         print("\n=== 号码规律分析 ===")
         
-        # 奇偶分布分析
-        odd_even_dist = defaultdict(int)
-        sum_dist = defaultdict(int)
-        span_dist = defaultdict(int)
-        
-        for record in self.lottery_data:
-            red_balls = record['red_balls']
-            
-            # 奇偶分析
-            odd_count = sum(1 for x in red_balls if x % 2 == 1)
-            even_count = 6 - odd_count
-            odd_even_dist[f"{odd_count}奇{even_count}偶"] += 1
-            
-            # 和值分析
-            total_sum = sum(red_balls)
-            sum_range = f"{(total_sum//10)*10}-{(total_sum//10)*10+9}"
-            sum_dist[sum_range] += 1
-            
-            # 跨度分析
-            span = max(red_balls) - min(red_balls)
-            span_range = f"{(span//5)*5}-{(span//5)*5+4}"
-            span_dist[span_range] += 1
+        # 奇偶、和值、跨度分布（基于红球矩阵向量化统计）
+        stats = self.stats
+        odd_even_dist, sum_dist, span_dist = stats.odd_even_dist(), stats.sum_dist(), stats.span_dist()
+        total = stats.total
         
         print("\n奇偶分布统计：")
         for pattern, count in sorted(odd_even_dist.items(), key=lambda x: x[1], reverse=True):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{pattern}: {count} 次 ({percentage:.1f}%)")
         
         print("\n和值分布统计：")
         for sum_range, count in sorted(sum_dist.items(), key=lambda x: int(x[0].split('-')[0])):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{sum_range}: {count} 次 ({percentage:.1f}%)")
         
         print("\n跨度分布统计：")
         for span_range, count in sorted(span_dist.items(), key=lambda x: int(x[0].split('-')[0])):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{span_range}: {count} 次 ({percentage:.1f}%)")
     
     def analyze_trends(self):
         """分析走势"""
         print("\n=== 走势分析 ===")
         
-        if len(self.lottery_data) < 10:
+        if len(self.draw_store) < 10:
             print("数据不足，无法进行走势分析")
             return
         
         # 最近10期的号码
-        recent_10 = self.lottery_data[:10]
+        recent_10 = self.draw_store.head(10)
+        recent_stats = self.recent_stats
         
         print("最近10期开奖号码：")
-        for record in recent_10:
+        for record in recent_10.to_records():
             red_str = " ".join([f"{x:2d}" for x in record['red_balls']])
             print(f"{record['period']}: {red_str} + {record['blue_ball']:2d}")
         
         # 冷热号分析
-        red_counter = Counter()
-        blue_counter = Counter()
-        
-        for record in recent_10:
-            for red in record['red_balls']:
-                red_counter[red] += 1
-            blue_counter[record['blue_ball']] += 1
+        red_counter = recent_stats.main_counter()
+        blue_counter = recent_stats.extra_counter()
         
         print(f"\n最近10期红球热号（出现2次及以上）：")
         hot_reds = [num for num, count in red_counter.items() if count >= 2]
@@ -750,18 +757,28 @@ class DoubleColorBallAnalyzer:
         """生成推荐号码（基于智能分析的动态推荐）"""
         print(f"\n=== 生成 {num_sets} 组推荐号码 ===")
         
-        if not self.lottery_data:
+        if not len(self.draw_store):
             print("无数据，无法生成推荐")
             return []
         
-        # 统计频率
-        red_counter = Counter()
-        blue_counter = Counter()
+        # 同一数据集版本上的推荐结果只计算一次，报告、聚合数据、README 和 Web 端共用
+        recommendations = self.analysis_snapshot.memoize(
+            ('recommendations', num_sets), lambda: self._build_recommendations(num_sets))
         
-        for record in self.lottery_data:
-            for red in record['red_balls']:
-                red_counter[red] += 1
-            blue_counter[record['blue_ball']] += 1
+        print("\n基于智能策略的推荐号码：")
+        for i, rec in enumerate(recommendations, 1):
+            red_str = " ".join([f"{x:02d}" for x in rec['red_balls']])
+            print(f"推荐 {i}: {red_str} + {rec['blue_ball']:02d}")
+            print(f"       策略: {rec['strategy']} | {rec['odd_even']} | 和值:{rec['sum']} | 跨度:{rec['span']}")
+            print(f"       说明: {rec['description']}")
+        
+        return recommendations
+    
+    def _build_recommendations(self, num_sets):
+        """按8种智能策略计算推荐号码（由 generate_recommendations 缓存调用）"""
+        # 统计频率
+        red_counter = self.stats.main_counter()
+        blue_counter = self.stats.extra_counter()
         
         # 确保所有红球都有记录（即使频率为0）
         for i in range(1, 34):
@@ -924,13 +941,6 @@ class DoubleColorBallAnalyzer:
                 'blue_freq': blue_freq
             })
         
-        print("\n基于智能策略的推荐号码：")
-        for i, rec in enumerate(recommendations, 1):
-            red_str = " ".join([f"{x:02d}" for x in rec['red_balls']])
-            print(f"推荐 {i}: {red_str} + {rec['blue_ball']:02d}")
-            print(f"       策略: {rec['strategy']} | {rec['odd_even']} | 和值:{rec['sum']} | 跨度:{rec['span']}")
-            print(f"       说明: {rec['description']}")
-        
         return recommendations
     
     def _get_zone_index(self, num):
@@ -967,17 +977,13 @@ class DoubleColorBallAnalyzer:
         """
         print(f"\n=== 覆盖优化推荐：目标组合数 {total_sets} 组 ===")
         
-        if not self.lottery_data:
+        if not len(self.draw_store):
             print("无数据，无法生成覆盖优化推荐")
             return []
         
         # 先基于历史数据做频率分析，构造候选空间
-        red_counter = Counter()
-        blue_counter = Counter()
-        for record in self.lottery_data:
-            for red in record['red_balls']:
-                red_counter[red] += 1
-            blue_counter[record['blue_ball']] += 1
+        red_counter = self.stats.main_counter()
+        blue_counter = self.stats.extra_counter()
         
         for i in range(1, 34):
             red_counter.setdefault(i, 0)
@@ -1141,7 +1147,7 @@ class DoubleColorBallAnalyzer:
         目标依旧是：在固定预算下，尽量分散号码，提升中小奖体验的稳定性。
         """
         print("\n=== 生成 7 注结构化投注方案 ===")
-        if not self.lottery_data:
+        if not len(self.draw_store):
             print("无数据，无法生成投注方案")
             return {}
 
@@ -1152,12 +1158,7 @@ class DoubleColorBallAnalyzer:
             return {}
 
         # 统计历史频率（用于挑选蓝球等）
-        red_counter = Counter()
-        blue_counter = Counter()
-        for record in self.lottery_data:
-            for r in record['red_balls']:
-                red_counter[r] += 1
-            blue_counter[record['blue_ball']] += 1
+        blue_counter = self.stats.extra_counter()
 
         # ---------- 1. 5 注 6+1 单式 ----------
         single_tickets = []
@@ -1265,7 +1266,7 @@ class DoubleColorBallAnalyzer:
         """
         if not silent:
             print("\n=== 生成增强版推荐方案：8种策略 + 2种复式 ===")
-        if not self.lottery_data:
+        if not len(self.draw_store):
             if not silent:
                 print("无数据，无法生成推荐方案")
             return {}
@@ -1331,12 +1332,8 @@ class DoubleColorBallAnalyzer:
 
         # ---------- 构建复式使用的基础信息 ----------
         # 历史频率统计，用于选额外红球/蓝球
-        red_counter = Counter()
-        blue_counter = Counter()
-        for record in self.lottery_data:
-            for r in record['red_balls']:
-                red_counter[r] += 1
-            blue_counter[record['blue_ball']] += 1
+        red_counter = self.stats.main_counter()
+        blue_counter = self.stats.extra_counter()
 
         # 以历史最低匹配策略（价值回归）的红球为基础
         base_reds = sorted(best_rec["red_balls"])
@@ -1488,66 +1485,34 @@ class DoubleColorBallAnalyzer:
         
         return selected[:count]
     
-    def visualize_frequency(self, save_plots=True):
-        """可视化频率分析"""
-        if not self.lottery_data:
+    def visualize_frequency(self, save_plots=True, renderer=None):
+        """
+        可视化频率分析（Agg 画布离屏渲染，统计结果未变化时跳过）
+        - save_plots: 为 False 时只返回图表描述，不渲染
+        - renderer: 可选的 ChartRenderer，给出时提交到后台进程池渲染，由调用方统一等待
+        """
+        if not len(self.draw_store):
             print("无数据，无法生成图表")
-            return
+            return None
         
         # 统计频率
-        red_counter = Counter()
-        blue_counter = Counter()
-        
-        for record in self.lottery_data:
-            for red in record['red_balls']:
-                red_counter[red] += 1
-            blue_counter[record['blue_ball']] += 1
-        
-        # 创建图表
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
-        
-        # 红球频率图
-        red_nums = list(range(1, 34))
-        red_freqs = [red_counter.get(num, 0) for num in red_nums]
-        
-        bars1 = ax1.bar(red_nums, red_freqs, color='red', alpha=0.7)
-        ax1.set_title('红球出现频率分布', fontsize=16, fontweight='bold')
-        ax1.set_xlabel('红球号码', fontsize=12)
-        ax1.set_ylabel('出现次数', fontsize=12)
-        ax1.set_xticks(red_nums)
-        ax1.grid(True, alpha=0.3)
-        
-        # 添加数值标签
-        for bar, freq in zip(bars1, red_freqs):
-            if freq > 0:
-                ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-                        str(freq), ha='center', va='bottom', fontsize=8)
-        
-        # 蓝球频率图
-        blue_nums = list(range(1, 17))
-        blue_freqs = [blue_counter.get(num, 0) for num in blue_nums]
-        
-        bars2 = ax2.bar(blue_nums, blue_freqs, color='blue', alpha=0.7)
-        ax2.set_title('蓝球出现频率分布', fontsize=16, fontweight='bold')
-        ax2.set_xlabel('蓝球号码', fontsize=12)
-        ax2.set_ylabel('出现次数', fontsize=12)
-        ax2.set_xticks(blue_nums)
-        ax2.grid(True, alpha=0.3)
-        
-        # 添加数值标签
-        for bar, freq in zip(bars2, blue_freqs):
-            if freq > 0:
-                ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-                        str(freq), ha='center', va='bottom', fontsize=10)
-        
-        plt.tight_layout()
+        red_counter = self.stats.main_counter()
+        blue_counter = self.stats.extra_counter()
+        
+        spec = ChartSpec('pics/lottery_frequency_analysis.png', (
+            BarPanel('红球出现频率分布', '红球号码', list(range(1, 34)),
+                     [red_counter.get(num, 0) for num in range(1, 34)], 'red', 8),
+            BarPanel('蓝球出现频率分布', '蓝球号码', list(range(1, 17)),
+                     [blue_counter.get(num, 0) for num in range(1, 17)], 'blue', 10),
+        ), (15, 10), 300)
         
         if save_plots:
-            # 确保目录存在
-            os.makedirs('pics', exist_ok=True)
-            plt.savefig('pics/lottery_frequency_analysis.png', dpi=300, bbox_inches='tight')
-            print("频率分析图表已保存为 pics/lottery_frequency_analysis.png")
-    
+            if renderer is not None:
+                renderer.submit(spec)
+            elif render_if_changed(spec):
+                print("频率分析图表已保存为 pics/lottery_frequency_analysis.png")
+        return spec
+
     def get_lottery_rules(self):
         """获取双色球游戏规则"""
         rules = """
@@ -1788,54 +1753,28 @@ class DoubleColorBallAnalyzer:
     
     def _get_frequency_analysis(self):
         """内部方法：获取频率分析数据"""
-        red_counter = Counter()
-        blue_counter = Counter()
-        
-        for record in self.lottery_data:
-            for red in record['red_balls']:
-                red_counter[red] += 1
-            blue_counter[record['blue_ball']] += 1
-        
-        return red_counter, blue_counter
+        return self.stats.main_counter(), self.stats.extra_counter()
     
     def _get_patterns_analysis(self):
         """内部方法：获取规律分析数据"""
-        odd_even_dist = defaultdict(int)
-        sum_dist = defaultdict(int)
-        span_dist = defaultdict(int)
-        
-        for record in self.lottery_data:
-            red_balls = record['red_balls']
-            
-            # 奇偶分析
-            odd_count = sum(1 for x in red_balls if x % 2 == 1)
-            even_count = 6 - odd_count
-            odd_even_dist[f"{odd_count}奇{even_count}偶"] += 1
-            
-            # 和值分析
-            total_sum = sum(red_balls)
-            sum_range = f"{(total_sum//10)*10}-{(total_sum//10)*10+9}"
-            sum_dist[sum_range] += 1
-            
-            # 跨度分析
-            span = max(red_balls) - min(red_balls)
-            span_range = f"{(span//5)*5}-{(span//5)*5+4}"
-            span_dist[span_range] += 1
+        stats = self.stats
+        odd_even_dist, sum_dist, span_dist = stats.odd_even_dist(), stats.sum_dist(), stats.span_dist()
+        total = stats.total
         
         # 格式化数据
         odd_even_result = "| 分布类型 | 出现次数 | 出现频率 |\n|----------|----------|----------|\n"
         for pattern, count in sorted(odd_even_dist.items(), key=lambda x: x[1], reverse=True):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             odd_even_result += f"| {pattern} | {count} | {percentage:.1f}% |\n"
         
         sum_result = "| 和值范围 | 出现次数 | 出现频率 |\n|----------|----------|----------|\n"
         for sum_range, count in sorted(sum_dist.items(), key=lambda x: int(x[0].split('-')[0])):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             sum_result += f"| {sum_range} | {count} | {percentage:.1f}% |\n"
         
         span_result = "| 跨度范围 | 出现次数 | 出现频率 |\n|----------|----------|----------|\n"
         for span_range, count in sorted(span_dist.items(), key=lambda x: int(x[0].split('-')[0])):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             span_result += f"| {span_range} | {count} | {percentage:.1f}% |\n"
         
         return {
@@ -1846,29 +1785,25 @@ class DoubleColorBallAnalyzer:
     
     def _get_trends_analysis(self):
         """内部方法：获取趋势分析数据"""
-        if len(self.lottery_data) < 10:
+        if len(self.draw_store) < 10:
             return {
                 'recent_draws': '数据不足',
                 'hot_reds': '无',
                 'hot_blues': '无'
             }
         
-        recent_10 = self.lottery_data[:10]
+        recent_10 = self.draw_store.head(10)
+        recent_stats = self.recent_stats
         
         # 格式化最近10期
         recent_draws = "| 期号 | 开奖日期 | 红球号码 | 蓝球 |\n|------|----------|----------|------|\n"
-        for record in recent_10:
+        for record in recent_10.to_records():
             red_str = " ".join([f"{x:02d}" for x in record['red_balls']])
             recent_draws += f"| {record['period']} | {record['date']} | {red_str} | **{record['blue_ball']:02d}** |\n"
         
         # 冷热号分析
-        red_counter = Counter()
-        blue_counter = Counter()
-        
-        for record in recent_10:
-            for red in record['red_balls']:
-                red_counter[red] += 1
-            blue_counter[record['blue_ball']] += 1
+        red_counter = recent_stats.main_counter()
+        blue_counter = recent_stats.extra_counter()
         
         hot_reds = [num for num, count in red_counter.items() if count >= 2]
         hot_blues = [num for num, count in blue_counter.items() if count >= 2]
@@ -2072,48 +2007,23 @@ class DoubleColorBallAnalyzer:
     
     def _get_patterns_analysis_raw(self):
         """内部方法：获取原始规律分析数据"""
-        odd_even_dist = defaultdict(int)
-        sum_dist = defaultdict(int)
-        span_dist = defaultdict(int)
-        
-        for record in self.lottery_data:
-            red_balls = record['red_balls']
-            
-            # 奇偶分析
-            odd_count = sum(1 for x in red_balls if x % 2 == 1)
-            even_count = 6 - odd_count
-            odd_even_dist[f"{odd_count}奇{even_count}偶"] += 1
-            
-            # 和值分析
-            total_sum = sum(red_balls)
-            sum_range = f"{(total_sum//10)*10}-{(total_sum//10)*10+9}"
-            sum_dist[sum_range] += 1
-            
-            # 跨度分析
-            span = max(red_balls) - min(red_balls)
-            span_range = f"{(span//5)*5}-{(span//5)*5+4}"
-            span_dist[span_range] += 1
-        
-        return {
-            'odd_even_dist': dict(odd_even_dist),
-            'sum_dist': dict(sum_dist),
-            'span_dist': dict(span_dist)
-        }
+        return self.stats.patterns_raw()
     
     def _get_trends_analysis_raw(self):
         """内部方法：获取原始趋势分析数据"""
-        if len(self.lottery_data) < 10:
+        if len(self.draw_store) < 10:
             return {
                 'recent_draws': [],
                 'hot_reds': [],
                 'hot_blues': []
             }
         
-        recent_10 = self.lottery_data[:10]
+        recent_10 = self.draw_store.head(10)
+        recent_stats = self.recent_stats
         
         # 最近10期数据
         recent_draws = []
-        for record in recent_10:
+        for record in recent_10.to_records():
             recent_draws.append({
                 'period': record['period'],
                 'date': record['date'],
@@ -2122,13 +2032,8 @@ class DoubleColorBallAnalyzer:
             })
         
         # 冷热号分析
-        red_counter = Counter()
-        blue_counter = Counter()
-        
-        for record in recent_10:
-            for red in record['red_balls']:
-                red_counter[red] += 1
-            blue_counter[record['blue_ball']] += 1
+        red_counter = recent_stats.main_counter()
+        blue_counter = recent_stats.extra_counter()
         
         hot_reds = [num for num, count in red_counter.items() if count >= 2]
         hot_blues = [num for num, count in blue_counter.items() if count >= 2]
@@ -2225,8 +2130,12 @@ class DoubleColorBallAnalyzer:
         except Exception as e:
             print(f"更新README推荐号码失败: {e}")
 
-def main():
+def main(argv=None):
     """主函数"""
+    parser = argparse.ArgumentParser(description="双色球数据分析系统")
+    parser.add_argument("--resume", action="store_true", help="从上次中断的完整抓取断点继续，只抓取缺少的页")
+    args = parser.parse_args(argv)
+    
     # 显示免责声明
     print("=" * 80)
     print("🎯 双色球数据分析系统")
@@ -2246,7 +2155,9 @@ def main():
     # 始终抓取最新数据，覆盖现有文件
     print("⚠️  正在抓取最新数据，请确保网络连接正常...")
     max_pages = analyzer.get_max_pages()
-    analyzer.fetch_lottery_data(max_pages=max_pages)
+    # 每页写入断点，中途失败时可用 --resume 继续
+    analyzer.fetch_lottery_data(max_pages=max_pages, checkpoint=BackfillCheckpoint("data/lottery_data.json"),
+                                resume=args.resume)
     analyzer.save_data()
     
     if not analyzer.lottery_data:
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟开奖接口（离线调试 / 基准测试）
+
+在本机回放中国福彩网（双色球）与体彩网（大乐透）的分页接口：
+- 数据来自 data/ 下已保存的开奖记录，按官方接口的字段格式还原成响应
+- 路径与官方接口相同，只需把分析器的 api_url / base_url 指向本服务
+- 可配置响应延迟（latency + 随机 jitter）、HTTP 500 比例和 567（反爬）比例，
+  以及每秒请求数上限（超过时返回 567，模拟官网的频率限制），
+  用来在不访问官网的情况下调优并发数、限速、重试和退避参数
+
+用法：
+    python scripts/mock_lottery_server.py serve --port 8765 --latency 0.2 --rate-567 0.1
+    python scripts/mock_lottery_server.py bench --game dlt --backend async --workers 8 --rate-limit 5 --max-rps 10
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from scripts.fetchers import (DLT_API, FETCHER_BACKENDS, SSQ_API, host_breaker, host_limiter,
+                                  make_fetcher, reset_host_controls)
+except ImportError:  # 直接在 scripts/ 目录下运行本脚本时
+    from fetchers import (DLT_API, FETCHER_BACKENDS, SSQ_API, host_breaker, host_limiter,
+                          make_fetcher, reset_host_controls)
+
+WEEKDAY_NAMES = '一二三四五六日'
+
+
+def ssq_api_item(rec):
+    """把双色球记录还原成中国福彩网接口返回的一条开奖信息"""
+    weekday = WEEKDAY_NAMES[time.strptime(rec['date'], '%Y-%m-%d').tm_wday]
+    return {
+        'code': rec['period'],
+        'date': f"{rec['date']}({weekday})",
+        'red': ','.join(f"{x:02d}" for x in rec['red_balls']),
+        'blue': f"{rec['blue_ball']:02d}",
+        'sales': str(rec.get('sales_amount', 0)),
+        'poolmoney': str(rec.get('pool_amount', 0)),
+        'prizegrades': [
+            {'type': 1, 'typenum': str(rec.get('first_prize_count', 0)), 'typemoney': str(rec.get('first_prize_amount', 0))},
+            {'type': 2, 'typenum': str(rec.get('second_prize_count', 0)), 'typemoney': str(rec.get('second_prize_amount', 0))},
+        ],
+    }
+
+
+def dlt_api_item(rec):
+    """把大乐透记录还原成体彩网接口返回的一条开奖信息"""
+    return {
+        'lotteryDrawNum': rec['period'],
+        'lotteryDrawTime': rec['date'],
+        'lotteryDrawResult': ' '.join(f"{x:02d}" for x in rec['front_balls'] + rec['back_balls']),
+        'prizeLevelList': [
+            {'awardLevel': '一等奖', 'awardLevelNum': rec.get('first_prize_count', 0), 'awardMoney': rec.get('first_prize_amount', 0)},
+            {'awardLevel': '二等奖', 'awardLevelNum': rec.get('second_prize_count', 0), 'awardMoney': rec.get('second_prize_amount', 0)},
+        ],
+        'drawMoney': rec.get('sales_amount', 0),
+        'poolBalanceAfterdraw': rec.get('pool_amount', 0),
+    }
+
+
+def _load_records(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.mock.handle(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockLotteryServer:
+    """
+    在后台线程中运行的模拟接口服务，支持 with 语句。
+    - ssq_records / dlt_records: 按期号从新到旧排列的开奖记录
+    - latency / jitter: 每个请求的基础延迟与额外随机延迟（秒）
+    - error_rate / rate_567: 返回 HTTP 500 / 567 的概率
+    - max_rps: 最近 1 秒内的请求数达到该值时返回 567，None 为不限制
+    - max_page_size: 双色球接口 pageSize 的上限（超过时截断，与官网行为一致）
+    stats 记录各状态码的响应次数。
+    """
+
+    def __init__(self, ssq_records=None, dlt_records=None, host='127.0.0.1', port=0,
+                 latency=0.0, jitter=0.0, error_rate=0.0, rate_567=0.0, max_rps=None,
+                 max_page_size=100, seed=None):
+        self.ssq_items = [ssq_api_item(rec) for rec in (ssq_records or [])]
+        self.ssq_dates = [rec['date'] for rec in (ssq_records or [])]
+        self.dlt_items = [dlt_api_item(rec) for rec in (dlt_records or [])]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_567 = rate_567
+        self.max_rps = max_rps
+        self.max_page_size = max_page_size
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._recent = deque()  # 最近 1 秒内请求的到达时间
+        self._lock = threading.Lock()
+        self._routes = {
+            urlparse(SSQ_API.url).path: self._ssq_page,
+            urlparse(DLT_API.url).path: self._dlt_page,
+        }
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @classmethod
+    def from_data_files(cls, ssq_path='data/lottery_data.json', dlt_path='data/super_lotto_data.json', **kwargs):
+        """用 data/ 下保存的开奖数据创建"""
+        return cls(_load_records(ssq_path), _load_records(dlt_path), **kwargs)
+
+    def url(self, game):
+        """game（'ssq' / 'dlt'）对应接口在本服务上的完整 URL"""
+        api = SSQ_API if game == 'ssq' else DLT_API
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{urlparse(api.url).path}"
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-lottery-server', daemon=True)
+            self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """在当前线程中提供服务（命令行 serve 模式）"""
+        self._httpd.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _ssq_page(self, query):
+        items = self.ssq_items
+        day_start, day_end = query.get('dayStart'), query.get('dayEnd')
+        if day_start or day_end:
+            items = [item for item, date in zip(items, self.ssq_dates)
+                     if (not day_start or date >= day_start) and (not day_end or date <= day_end)]
+        page = int(query.get('pageNo', 1))
+        size = min(int(query.get('pageSize', 30)), self.max_page_size)
+        return {
+            'state': 0,
+            'message': '查询成功',
+            'total': len(items),
+            'pageNum': page,
+            'result': items[(page - 1) * size:page * size],
+        }
+
+    def _dlt_page(self, query):
+        page = int(query.get('pageNo', 1))
+        size = int(query.get('pageSize', 30))
+        return {
+            'isSuccess': True,
+            'errorMessage': '处理成功',
+            'value': {
+                'pageNo': page,
+                'pageSize': size,
+                'pages': -(-len(self.dlt_items) // size),
+                'total': len(self.dlt_items),
+                'list': self.dlt_items[(page - 1) * size:page * size],
+            },
+        }
+
+    def handle(self, request):
+        url = urlparse(request.path)
+        route = self._routes.get(url.path)
+        with self._lock:
+            roll = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            now = time.monotonic()
+            while self._recent and self._recent[0] <= now - 1.0:
+                self._recent.popleft()
+            too_fast = self.max_rps is not None and len(self._recent) >= self.max_rps
+            self._recent.append(now)
+        if delay > 0:
+            time.sleep(delay)
+
+        if route is None:
+            status, body = 404, b''
+        elif too_fast or roll < self.rate_567:
+            status, body = 567, b''
+        elif roll < self.rate_567 + self.error_rate:
+            status, body = 500, b''
+        else:
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            status, body = 200, json.dumps(route(query), ensure_ascii=False).encode('utf-8')
+
+        with self._lock:
+            self.stats[status] += 1
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json;charset=UTF-8')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+
+# 基准测试使用的请求参数（与两个分析器一致）
+BENCH_PARAMS = {
+    'ssq': lambda page, page_size: {'name': 'ssq', 'pageNo': page, 'pageSize': page_size, 'systemType': 'PC'},
+    'dlt': lambda page, page_size: {'gameNo': '85', 'provinceId': '0', 'pageSize': str(page_size),
+                                    'isVerify': '1', 'pageNo': str(page)},
+}
+
+
+def run_benchmark(server, game, backend='sync', workers=4, rate_limit=0.0, max_retries=5, backoff=0.0, page_size=30):
+    """用指定的抓取后端和参数从 server 抓取全部页，返回统计字典"""
+    import requests
+
+    api = SSQ_API if game == 'ssq' else DLT_API
+    url = server.url(game)
+    host = urlparse(url).netloc
+    fetcher = make_fetcher(backend, requests.Session(), api=api, max_workers=workers, rate_limit=rate_limit,
+                           max_retries=max_retries, backoff=backoff, max_failed_pages=10 ** 6)
+    make_params = BENCH_PARAMS[game]
+    server.stats.clear()
+    reset_host_controls()
+
+    start = time.perf_counter()
+    first = fetcher.fetch_json(url, make_params(1, page_size))
+    page_count = -(-int(api.total(first) or 0) // page_size)
+    pages = fetcher.fetch_pages(url, lambda page: make_params(page, page_size), range(2, page_count + 1))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'game': game,
+        'backend': backend,
+        'pages': page_count,
+        'failed_pages': max(page_count - 1, 0) - len(pages),
+        'records': len(api.items(first)) + sum(len(items) for items in pages.values()),
+        'requests': sum(server.stats.values()),
+        'status': dict(server.stats),
+        'final_rate': round(host_limiter(host, rate_limit).rate, 2) if rate_limit else None,
+        'breaker_trips': host_breaker(host).trips,
+        'seconds': round(elapsed, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地模拟双色球 / 大乐透开奖接口")
+    parser.add_argument("command", choices=("serve", "bench"), help="serve 启动服务 / bench 运行一次抓取基准测试")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="serve 监听端口（bench 使用随机端口）")
+    parser.add_argument("--latency", type=float, default=0.05, help="每个请求的基础延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.05, help="额外随机延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 HTTP 500 的概率")
+    parser.add_argument("--rate-567", type=float, default=0.0, help="返回 HTTP 567（反爬）的概率")
+    parser.add_argument("--max-rps", type=float, default=None, help="每秒请求数上限，超过时返回 567")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，固定后故障注入可复现")
+    parser.add_argument("--game", choices=("ssq", "dlt"), default="ssq", help="bench：抓取的玩法")
+    parser.add_argument("--backend", choices=tuple(FETCHER_BACKENDS), default="sync", help="bench：抓取后端")
+    parser.add_argument("--workers", type=int, default=4, help="bench：并发数")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="bench：初始每秒请求数（随后自适应调整），0 为不限速")
+    parser.add_argument("--retries", type=int, default=5, help="bench：每页最多尝试次数")
+    parser.add_argument("--backoff", type=float, default=0.0, help="bench：重试退避基数（秒）")
+    parser.add_argument("--page-size", type=int, default=30, help="bench：pageSize")
+    args = parser.parse_args(argv)
+
+    server = MockLotteryServer.from_data_files(
+        host=args.host, port=args.port if args.command == "serve" else 0,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_567=args.rate_567, max_rps=args.max_rps, seed=args.seed)
+
+    if args.command == "bench":
+        with server:
+            result = run_benchmark(server, args.game, args.backend, args.workers, args.rate_limit,
+                                   args.retries, args.backoff, args.page_size)
+        print(json.dumps(result, ensure_ascii=False))
+        return 0
+
+    print(f"🧪 模拟接口已启动:\n  双色球: {server.url('ssq')}\n  大乐透: {server.url('dlt')}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web 页面渲染缓存
+
+首页、历史页等页面在下一次开奖之前对所有访客都完全相同。
+PageCache 以数据集版本为粒度缓存渲染好的页面（字节 + ETag + Last-Modified）：
+- 同一版本上每个页面只渲染一次，之后直接从内存返回
+- 数据集版本变化（合并了新开奖）时整体作废，下一次访问重新渲染
+- ETag 由页面内容计算，多个 worker 渲染出的同一页面 ETag 相同，浏览器可用 304 复用
+- 渲染时顺带预压缩 gzip（安装了 brotli 时还有 br），请求时按 Accept-Encoding 直接返回
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只提供 gzip
+    brotli = None
+
+
+# encodings: {内容编码: 压缩后的字节}，例如 {'br': ..., 'gzip': ...}，按优先顺序排列
+RenderedPage = namedtuple('RenderedPage', ['body', 'etag', 'last_modified', 'encodings'])
+
+
+def _precompress(body):
+    encodings = {}
+    if brotli is not None:
+        encodings['br'] = brotli.compress(body, quality=11)
+    encodings['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+    return encodings
+
+
+def rendered_page(html, last_modified=None):
+    """把渲染好的 HTML 打包成 RenderedPage：ETag 取内容的 sha256，并预压缩各编码版本"""
+    body = html.encode('utf-8')
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    return RenderedPage(body, etag, last_modified, _precompress(body))
+
+
+def choose_encoding(page, accept_encodings):
+    """
+    按页面已有的预压缩版本和客户端支持的编码选出响应体。
+    - accept_encodings: 客户端支持的编码集合（Accept-Encoding 中 q > 0 的值）
+    返回 (内容编码或 None, 响应体, ETag)；不同编码的表示使用不同的强 ETag。
+    """
+    for encoding, data in page.encodings.items():
+        if encoding in accept_encodings:
+            return encoding, data, f"{page.etag}-{encoding}"
+    return None, page.body, page.etag
+
+
+class PageCache:
+    """按数据集版本缓存渲染好的页面，超过 max_entries 时淘汰最久未访问的页面"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._pages = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get_or_render(self, version, name, render):
+        """
+        读取 version 版本上名为 name 的页面，未命中时调用 render() 渲染并保存。
+        - render: 无参回调，返回 RenderedPage
+        """
+        with self._lock:
+            if self._version != version:
+                self._pages.clear()
+                self._version = version
+            page = self._pages.get(name)
+            if page is not None:
+                self._pages.move_to_end(name)
+                return page
+
+            # 渲染放在锁内：同一时刻只渲染一次，并发请求等待结果而不是重复渲染
+            page = render()
+            self._pages[name] = page
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+            return page
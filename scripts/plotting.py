@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+频率图表渲染
+
+1. 延迟加载：matplotlib 导入一次要几百毫秒，只在真正渲染图表时才导入
+2. 不使用 pyplot 全局状态：显式创建 Figure，用非交互的 Agg 画布输出 PNG，
+   保存后立即释放，长时间运行的进程不会积累未关闭的图表
+3. 内容哈希缓存：图表完全由 ChartSpec（号码、次数、标题、尺寸）决定，
+   其 SHA-256 写入 PNG 的文本块；已有图片的哈希一致时直接跳过渲染
+4. ChartRenderer 在进程池中渲染，主流程提交后继续生成报告等，最后统一等待
+"""
+
+import hashlib
+import json
+import os
+import struct
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# 绘图代码（样式、布局）变化时递增，使已有图片的哈希全部失效
+CHART_STYLE_VERSION = 1
+
+# PNG 文本块中保存内容哈希的关键字
+HASH_KEY = 'ContentHash'
+
+# 一个柱状图面板：标题、横轴名、号码、对应次数、颜色、数值标签字号
+BarPanel = namedtuple('BarPanel', ['title', 'xlabel', 'numbers', 'counts', 'color', 'label_fontsize'])
+
+# 一张图表：输出路径、自上而下的面板、尺寸（英寸）、分辨率
+ChartSpec = namedtuple('ChartSpec', ['path', 'panels', 'figsize', 'dpi'])
+
+
+def chart_digest(spec):
+    """图表内容哈希（不含输出路径）"""
+    payload = json.dumps([CHART_STYLE_VERSION, spec.panels, spec.figsize, spec.dpi], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _png_text(path):
+    """读取 PNG 图像数据之前的 tEXt 文本块，不依赖图像库"""
+    text = {}
+    try:
+        with open(path, 'rb') as f:
+            if f.read(8) != b'\x89PNG\r\n\x1a\n':
+                return text
+            while True:
+                head = f.read(8)
+                if len(head) < 8:
+                    break
+                length, chunk_type = struct.unpack('>I4s', head)
+                if chunk_type in (b'IDAT', b'IEND'):
+                    break
+                data = f.read(length)
+                f.seek(4, os.SEEK_CUR)  # CRC
+                if chunk_type == b'tEXt':
+                    key, _, value = data.partition(b'\0')
+                    text[key.decode('latin-1')] = value.decode('latin-1')
+    except OSError:
+        pass
+    return text
+
+
+def is_up_to_date(spec):
+    """已有图片是否由相同内容渲染而来"""
+    return _png_text(spec.path).get(HASH_KEY) == chart_digest(spec)
+
+
+def _matplotlib():
+    """导入 Figure 与 Agg 画布，并设置中文字体"""
+    import matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    return Figure, FigureCanvasAgg
+
+
+def render_chart(spec):
+    """渲染并保存一张图表，返回输出路径（可在子进程中执行）"""
+    Figure, FigureCanvasAgg = _matplotlib()
+
+    fig = Figure(figsize=spec.figsize)
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(len(spec.panels), 1, squeeze=False)[:, 0]
+    for ax, panel in zip(axes, spec.panels):
+        bars = ax.bar(panel.numbers, panel.counts, color=panel.color, alpha=0.7)
+        ax.set_title(panel.title, fontsize=16, fontweight='bold')
+        ax.set_xlabel(panel.xlabel, fontsize=12)
+        ax.set_ylabel('出现次数', fontsize=12)
+        ax.set_xticks(panel.numbers)
+        ax.grid(True, alpha=0.3)
+        # 数值标签（次数为 0 的不标）
+        ax.bar_label(bars, labels=[str(c) if c > 0 else '' for c in panel.counts],
+                     fontsize=panel.label_fontsize)
+    fig.tight_layout()
+
+    os.makedirs(os.path.dirname(spec.path) or '.', exist_ok=True)
+    fig.savefig(spec.path, dpi=spec.dpi, bbox_inches='tight', metadata={HASH_KEY: chart_digest(spec)})
+    fig.clear()
+    return spec.path
+
+
+def render_if_changed(spec):
+    """内容变化时才渲染，返回是否重新渲染"""
+    if is_up_to_date(spec):
+        print(f"♻️  图表数据未变化，跳过重新绘制: {spec.path}")
+        return False
+    render_chart(spec)
+    return True
+
+
+class ChartRenderer:
+    """在进程池中渲染图表：submit 后立即返回，wait 时等待全部完成"""
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self._executor = None
+        self._futures = []
+
+    def submit(self, spec):
+        """提交一张图表；内容未变化时直接跳过"""
+        if is_up_to_date(spec):
+            print(f"♻️  图表数据未变化，跳过重新绘制: {spec.path}")
+            return
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        print(f"🎨 图表已提交后台渲染: {spec.path}")
+        self._futures.append(self._executor.submit(render_chart, spec))
+
+    def wait(self):
+        """等待全部图表渲染完成，返回成功保存的路径列表"""
+        saved = []
+        for future in self._futures:
+            try:
+                path = future.result()
+            except Exception as e:
+                print(f"⚠️  图表生成失败: {e}")
+                continue
+            print(f"频率分析图表已保存为 {path}")
+            saved.append(path)
+        self._futures = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        return saved
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web 接口响应缓存
+
+/api/recommend 的结果只取决于数据集版本和规范化后的请求参数
+（推荐使用固定随机种子，完全可复现），因此可以直接缓存序列化好的 JSON 响应：
+- 进程内 LRU：热门查询直接命中内存
+- SQLite 文件：多个 gunicorn worker 共享，某个 worker 算过的结果其它 worker 直接读取
+- 每条缓存带数据集版本，新开奖合并后版本变化，新版本的请求不会读到旧版本的缓存
+- 旧版本的条目不在写入时立即删除：各 worker 切换到新数据的时间前后相差一个检查周期，
+  期间新旧版本的 worker 同时写入，立即删除会互相清掉对方的缓存；
+  旧条目不再被读取，由过期（ttl 秒）和按最近使用时间的淘汰（总数超过 max_entries）自然清除
+  （进程内命中不回写 SQLite，共享层的“最近使用”只记录从 SQLite 读取的时间）
+
+缓存只是加速手段：SQLite 出错时打印警告并按未命中处理，不影响接口本身。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """按 (数据集版本, 请求键) 缓存 JSON 响应文本，进程内 LRU + SQLite 多进程共享"""
+
+    def __init__(self, path="data/response_cache.sqlite3", max_entries=512, ttl=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._memory_version = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self):
+        """每个线程（以及 fork 后的每个进程）使用各自的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' version TEXT NOT NULL, key TEXT NOT NULL, payload TEXT NOT NULL,'
+            ' created REAL NOT NULL, last_used REAL NOT NULL,'
+            ' PRIMARY KEY (version, key))'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _memory_get(self, version, key, now):
+        with self._lock:
+            if self._memory_version != version:
+                self._memory.clear()
+                self._memory_version = version
+                return None
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            payload, created = entry
+            if now - created > self.ttl:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return payload
+
+    def _memory_put(self, version, key, payload, created):
+        with self._lock:
+            if self._memory_version != version:
+                self._memory.clear()
+                self._memory_version = version
+            self._memory[key] = (payload, created)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, version, key):
+        """读取缓存的响应文本，未命中或已过期时返回 None"""
+        now = time.time()
+        payload = self._memory_get(version, key, now)
+        if payload is not None:
+            return payload
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT payload, created FROM responses WHERE version = ? AND key = ?',
+                (version, key)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                return None
+            conn.execute(
+                'UPDATE responses SET last_used = ? WHERE version = ? AND key = ?',
+                (now, version, key)
+            )
+        except sqlite3.Error as e:
+            print(f"⚠️  读取响应缓存失败: {e}")
+            return None
+        self._memory_put(version, key, row[0], row[1])
+        return row[0]
+
+    def put(self, version, key, payload):
+        """保存响应文本；同时清掉已过期的条目，并淘汰超出上限的最久未使用条目"""
+        now = time.time()
+        self._memory_put(version, key, payload, now)
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute('DELETE FROM responses WHERE created < ?', (now - self.ttl,))
+                conn.execute(
+                    'INSERT OR REPLACE INTO responses (version, key, payload, created, last_used)'
+                    ' VALUES (?, ?, ?, ?, ?)',
+                    (version, key, payload, now, now)
+                )
+                conn.execute(
+                    'DELETE FROM responses WHERE rowid IN ('
+                    ' SELECT rowid FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️  写入响应缓存失败: {e}")
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_version = None
+        try:
+            self._connect().execute('DELETE FROM responses')
+        except sqlite3.Error as e:
+            print(f"⚠️  清空响应缓存失败: {e}")
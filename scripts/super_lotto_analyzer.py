@@ -16,41 +16,60 @@
 3. 基于统计分析生成推荐号码
 """
 
-import requests
-import time
+import argparse
 import json
 import re
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, timezone
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import Counter, defaultdict
 import warnings
 import os
 import hjson
+import importlib.util
 import random
 
-# 添加DrissionPage导入
 try:
-    from DrissionPage import Chromium, ChromiumOptions
-    DRISSIONPAGE_AVAILABLE = True
+    from scripts.draw_store import DrawStore, DLT_GAME, sidecar_path, content_checksum
+    from scripts.draw_stats import RunningStats, stats_path
+    from scripts.analysis_cache import AnalysisSnapshot, dataset_key
+    from scripts.draw_journal import DrawJournal, atomic_write, merge_records
+    from scripts.plotting import BarPanel, ChartSpec, render_if_changed
+    from scripts.draw_calendar import DLT_DRAW_WEEKDAYS, beijing_now, draw_dates_since
+    from scripts.browser_session import BrowserSession
+    from scripts.fetchers import DLT_API, make_fetcher
+    from scripts.backfill_checkpoint import BackfillCheckpoint
+except ImportError:  # 直接在 scripts/ 目录下运行本脚本时
+    from draw_store import DrawStore, DLT_GAME, sidecar_path, content_checksum
+    from draw_stats import RunningStats, stats_path
+    from analysis_cache import AnalysisSnapshot, dataset_key
+    from draw_journal import DrawJournal, atomic_write, merge_records
+    from plotting import BarPanel, ChartSpec, render_if_changed
+    from draw_calendar import DLT_DRAW_WEEKDAYS, beijing_now, draw_dates_since
+    from browser_session import BrowserSession
+    from fetchers import DLT_API, make_fetcher
+    from backfill_checkpoint import BackfillCheckpoint
+
+# 官方接口每页条数
+DLT_PAGE_SIZE = 30
+
+# 体彩接口的初始请求速率（次/秒）：requests 与浏览器两种方式共用该主机的自适应限速器
+DLT_RATE_LIMIT = 0.3
+
+# DrissionPage 只检查是否已安装，真正启动浏览器时才导入
+DRISSIONPAGE_AVAILABLE = importlib.util.find_spec('DrissionPage') is not None
+if DRISSIONPAGE_AVAILABLE:
     print("✅ DrissionPage 可用，将使用浏览器模式获取数据")
-except ImportError:
-    DRISSIONPAGE_AVAILABLE = False
+else:
     print("⚠️  DrissionPage 不可用，将使用传统requests模式")
 
 warnings.filterwarnings('ignore')
 
-# 设置中文字体支持
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-
 class SuperLottoAnalyzer:
     """大乐透分析器"""
     
     def __init__(self):
-        self.base_url = "https://webapi.sporttery.cn/gateway/lottery/getHistoryPageListV1.qry"
+        self.base_url = DLT_API.url
+        # 抓取后端：'sync'（线程池）或 'async'（asyncio），见 fetchers.py
+        self.fetcher_backend = 'sync'
         
         # 多个真实的User-Agent，用于轮换
         self.user_agents = [
@@ -62,23 +81,111 @@ class SuperLottoAnalyzer:
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0'
         ]
         
-        self.session = requests.Session()
-        self.lottery_data = []
+        # requests 会话在首次抓取时才创建（见 session 属性），只做分析时不导入 requests
+        self._session = None
+        # 列式存储（前区矩阵、后区矩阵、奖金列、期号索引），所有分析都基于它进行
+        self.draw_store = DrawStore.from_records([], DLT_GAME)
+        self._snapshot = None
+        # 增量维护的统计：全量历史 / 最近10期
+        self._running_stats = None
+        self._recent_running = None
         # 设置UTC+8时区
         self.utc8_tz = timezone(timedelta(hours=8))
         
-        # DrissionPage相关初始化
+        # DrissionPage 浏览器会话：首次使用时启动，之后复用，close() 或 with 块结束时关闭
         self.browser = None
-        self.tab = None
         self.use_drissionpage = DRISSIONPAGE_AVAILABLE
+    
+    @property
+    def session(self):
+        """requests 会话（连接池 + 随机 User-Agent），首次使用时才导入 requests 并创建"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+            self._setup_session()
+        return self._session
+    
+    @property
+    def lottery_data(self):
+        """历史开奖数据的 list-of-dicts 视图（模板渲染、JSON 兼容），按期号从新到旧"""
+        return self.draw_store.to_records()
+    
+    @lottery_data.setter
+    def lottery_data(self, records):
+        """整体替换历史数据时一次性重建列式存储"""
+        self.draw_store = DrawStore.from_records(records or [], DLT_GAME)
+        self._reset_derived()
+    
+    def _reset_derived(self):
+        """数据整体替换后丢弃所有派生结果（分析快照、增量统计）"""
+        self._snapshot = None
+        self._running_stats = None
+        self._recent_running = None
+    
+    def merge_draws(self, records):
+        """
+        合并新开奖记录：新期号拼接到最前面、重叠期号按行替换，期号索引只追加新期号；
+        各列仍会整体复制一次（写时复制，O(N)，见 DrawStore.prepend），但不再逐条解析和排序。
+        仅在需要补历史缺口时才整体排序重建。
+        """
+        old = self.draw_store
+        store = old.prepend(records)
+        if store is None:
+            self.lottery_data = merge_records(self.lottery_data, records)
+            return
         
-        # 配置session
-        self._setup_session()
+        # 只有新期号拼接在最前面（没有替换已有期号）时，统计才能按新开奖逐期增量更新；
+        # 否则统计与数据集不再对应，下次访问时重新完整统计
+        if all(old.index_of(rec['period']) is None for rec in records):
+            for running in (self._running_stats, self._recent_running):
+                if running is not None and running.matches(old):
+                    for i in range(len(store) - len(old) - 1, -1, -1):
+                        running.add_draw(store.periods[i], store.main[i], store.extra[i])
+        else:
+            self._running_stats = None
+            self._recent_running = None
+        self.draw_store = store
+        self._snapshot = None
+    
+    @property
+    def analysis_snapshot(self):
+        """当前数据集版本的分析结果快照，期数或最新期号变化时自动重建"""
+        key = dataset_key(self.draw_store)
+        if self._snapshot is None or self._snapshot.key != key:
+            self._snapshot = AnalysisSnapshot(key)
+        return self._snapshot
+    
+    @property
+    def running_stats(self):
+        """全量历史的增量统计，与当前数据集不对应时重新完整统计一次"""
+        if self._running_stats is None or not self._running_stats.matches(self.draw_store):
+            self._running_stats = RunningStats.from_store(self.draw_store)
+        return self._running_stats
+    
+    @property
+    def recent_running_stats(self):
+        """最近10期的增量统计（新开奖加入时移出最旧一期）"""
+        if self._recent_running is None or not self._recent_running.matches(self.draw_store):
+            self._recent_running = RunningStats.from_store(self.draw_store, window=10)
+        return self._recent_running
+    
+    @property
+    def stats(self):
+        """当前数据集的核心统计结果（DrawStats，不可变），同一数据集版本只生成一次"""
+        return self.analysis_snapshot.memoize(
+            'stats', lambda: self.running_stats.to_stats(), copy_result=False)
+    
+    @property
+    def recent_stats(self):
+        """最近10期的统计结果（趋势分析使用）"""
+        return self.analysis_snapshot.memoize(
+            'recent_stats', lambda: self.recent_running_stats.to_stats(), copy_result=False)
         
     def _setup_session(self):
         """配置session的基本设置"""
         # 设置连接池
-        adapter = requests.adapters.HTTPAdapter(
+        from requests.adapters import HTTPAdapter
+        adapter = HTTPAdapter(
             pool_connections=10,
             pool_maxsize=20,
             max_retries=3
@@ -129,321 +236,237 @@ class SuperLottoAnalyzer:
             dt = self.get_current_time_utc8()
         return dt.strftime('%Y年%m月%d日 %H:%M:%S')
     
+    def _make_fetcher(self, max_workers=2, rate_limit=DLT_RATE_LIMIT):
+        """
+        创建复用本 session 连接池的分页抓取器（后端由 fetcher_backend 决定）。
+        体彩接口对频繁请求返回 567，默认低速起步（遇到 567 自动降速）、失败后指数退避。
+        """
+        return make_fetcher(
+            self.fetcher_backend,
+            self.session,
+            api=DLT_API,
+            max_workers=max_workers,
+            rate_limit=rate_limit,
+            max_retries=6,
+            backoff=3.0,
+            timeout=45,
+            user_agents=self.user_agents
+        )
+    
+    def _page_params(self, page):
+        """官方接口第 page 页的请求参数"""
+        return {
+            'gameNo': '85',  # 大乐透
+            'provinceId': '0',
+            'pageSize': str(DLT_PAGE_SIZE),
+            'isVerify': '1',
+            'pageNo': str(page)
+        }
+    
+    def _page_count(self, data):
+        """由接口响应得到总页数"""
+        value = data.get('value') or {}
+        if value.get('pages'):
+            return int(value['pages'])
+        return max(1, -(-int(DLT_API.total(data) or 0) // DLT_PAGE_SIZE))
+    
     def get_max_pages(self):
-        """获取总页数，增强错误处理"""
+        """请求第 1 页获取总页数，失败时使用默认页数 100"""
         print("正在获取总页数...")
+        self._update_headers()
+        try:
+            data = self._make_fetcher().fetch_json(self.base_url, self._page_params(1))
+        except Exception as e:
+            print(f"⚠️  获取总页数失败，使用默认页数 100: {e}")
+            return 100
+        total_pages = self._page_count(data)
+        print(f"✅ 成功获取页数信息: 总记录 {DLT_API.total(data)} 条，共 {total_pages} 页")
+        return total_pages
+    
+    def _parse_api_item(self, item):
+        """把官方接口返回的一条开奖信息解析为记录字典，关键字段缺失时返回 None"""
+        # 解析期号
+        period = item.get('lotteryDrawNum', '')
+        
+        # 解析开奖时间，提取日期部分
+        date_match = re.search(r'(\d{4}-\d{2}-\d{2})', item.get('lotteryDrawTime', ''))
+        if not date_match:
+            return None
+        draw_date = date_match.group(1)
+        
+        # 解析开奖号码：前5个是前区，后2个是后区
+        draw_result = item.get('lotteryDrawResult', '')
+        if not draw_result:
+            return None
+        numbers = draw_result.split(' ')
+        if len(numbers) < 7:
+            return None
+        front_balls = [int(x) for x in numbers[:5]]
+        back_balls = [int(x) for x in numbers[5:7]]
+        
+        # 解析奖级信息
+        first_prize_count = 0
+        first_prize_amount = 0
+        second_prize_count = 0
+        second_prize_amount = 0
+        
+        for prize in item.get('prizeLevelList', []):
+            if prize.get('awardLevel') == '一等奖':
+                first_prize_count = prize.get('awardLevelNum', 0)
+                first_prize_amount = prize.get('awardMoney', 0)
+            elif prize.get('awardLevel') == '二等奖':
+                second_prize_count = prize.get('awardLevelNum', 0)
+                second_prize_amount = prize.get('awardMoney', 0)
         
-        max_retries = 8  # 增加重试次数
-        base_delay = 3   # 增加基础延时
-        
-        for attempt in range(max_retries):
-            try:
-                # 每次尝试都更新headers
-                self._update_headers()
-                
-                params = {
-                    'gameNo': '85',  # 大乐透
-                    'provinceId': '0',
-                    'pageSize': '30',
-                    'isVerify': '1',
-                    'pageNo': '1'
-                }
-                
-                # 增加延时，特别是对567错误
-                if attempt > 0:
-                    if attempt <= 2:
-                        delay = base_delay * (2 ** attempt) + random.uniform(0, 2)
-                    else:
-                        # 对于后续重试，使用更长的延时
-                        delay = 15 + random.uniform(0, 10)
-                    print(f"⏳ 第 {attempt + 1} 次尝试，等待 {delay:.1f} 秒...")
-                    time.sleep(delay)
-                else:
-                    # 初始延时也增加
-                    time.sleep(random.uniform(3, 6))
-                
-                print(f"🌐 正在请求API... (尝试 {attempt + 1}/{max_retries})")
-                response = self.session.get(self.base_url, params=params, timeout=45)  # 增加超时时间
-                
-                print(f"📡 响应状态码: {response.status_code}")
-                
-                # 特殊处理567错误
-                if response.status_code == 567:
-                    print(f"⚠️  遇到567错误，这通常是服务器反爬虫机制")
-                    if attempt < max_retries - 1:
-                        print(f"🔄 将在更长延时后重试...")
-                        continue
-                    else:
-                        print("❌ 多次尝试后仍然是567错误，使用默认页数")
-                        return 100
-                
-                # 处理其他HTTP错误
-                if response.status_code == 429:
-                    print(f"🚫 遇到429限流错误，延长等待时间...")
-                    time.sleep(20 + random.uniform(0, 10))
-                    continue
-                elif response.status_code == 403:
-                    print(f"🚫 遇到403禁止访问错误，可能需要更换请求头...")
-                    continue
-                
-                response.raise_for_status()
-                
-                data = response.json()
-                print(f"📊 API响应: isSuccess={data.get('isSuccess')}, errorMessage={data.get('errorMessage')}")
-                
-                # 特殊处理：某些情况下errorMessage是"处理成功"但isSuccess是false
-                if not data.get('isSuccess', False):
-                    error_msg = data.get('errorMessage', '未知错误')
-                    if error_msg == '处理成功':
-                        print("✅ API返回'处理成功'，继续处理数据")
-                    else:
-                        print(f"❌ API返回错误: {error_msg}")
-                        if attempt < max_retries - 1:
-                            continue
-                        else:
-                            return 100
-                
-                value = data.get('value', {})
-                total_pages = value.get('pages', 100)
-                total_records = value.get('total', 0)
-                
-                print(f"✅ 成功获取页数信息: 总记录 {total_records} 条，共 {total_pages} 页")
-                return total_pages
-                
-            except requests.exceptions.Timeout:
-                print(f"⏰ 请求超时 (尝试 {attempt + 1}/{max_retries})")
-            except requests.exceptions.ConnectionError:
-                print(f"🔌 连接错误 (尝试 {attempt + 1}/{max_retries})")
-            except requests.exceptions.HTTPError as e:
-                print(f"🌐 HTTP错误: {e} (尝试 {attempt + 1}/{max_retries})")
-            except Exception as e:
-                print(f"❌ 获取总页数时出错: {e} (尝试 {attempt + 1}/{max_retries})")
-            
-            if attempt < max_retries - 1:
-                print("🔄 准备重试...")
-        
-        print("⚠️  所有尝试都失败，使用默认页数 100")
-        return 100
+        return {
+            'period': period,
+            'date': draw_date,
+            'front_balls': front_balls,
+            'back_balls': back_balls,
+            'first_prize_count': first_prize_count,
+            'first_prize_amount': first_prize_amount,
+            'second_prize_count': second_prize_count,
+            'second_prize_amount': second_prize_amount,
+            'sales_amount': item.get('drawMoney', 0),
+            'pool_amount': item.get('poolBalanceAfterdraw', 0)
+        }
     
-    def fetch_lottery_data(self, max_pages=None):
-        """抓取大乐透数据，优先使用DrissionPage，失败时回退到requests"""
+    def fetch_lottery_data(self, max_pages=None, stop_at_known=False, checkpoint=None, resume=False):
+        """
+        抓取大乐透数据，优先使用DrissionPage，失败时回退到requests
+        - stop_at_known: 增量模式，遇到已保存的期号即停止翻页，不替换已有数据，
+          返回新记录列表（可能为空）；抓取失败时返回 False
+        - checkpoint: BackfillCheckpoint，完整抓取时每页到达即写入断点，全部完成后删除
+        - resume: 从 checkpoint 中已完成的页继续，只抓取缺少的页
+        """
         print("🎯 开始抓取大乐透数据...")
         
         # 优先尝试DrissionPage模式
         if self.use_drissionpage:
             print("🚀 尝试使用DrissionPage模式...")
-            success = self.fetch_lottery_data_with_drissionpage(max_pages)
-            if success:
+            success = self.fetch_lottery_data_with_drissionpage(max_pages, stop_at_known, checkpoint, resume)
+            if success is not False:
                 print("✅ DrissionPage模式成功获取数据")
-                return True
+                # 增量模式下原样返回新记录列表
+                return success
             else:
                 print("⚠️  DrissionPage模式失败，回退到requests模式")
                 self.use_drissionpage = False
+                # DrissionPage 已抓到的页保存在断点中，requests 模式接着抓
+                resume = checkpoint is not None
         
         # 回退到原有的requests模式
         print("🔄 使用传统requests模式...")
-        return self.fetch_lottery_data_with_requests(max_pages)
+        return self.fetch_lottery_data_with_requests(max_pages, stop_at_known, checkpoint, resume)
     
-    def fetch_lottery_data_with_requests(self, max_pages=None):
-        """使用requests抓取大乐透数据（原有方法重命名）"""
-        print("🎯 使用requests模式抓取大乐透数据...")
-        
-        if max_pages is None:
-            max_pages = self.get_max_pages()
-        
-        print(f"📄 计划抓取 {max_pages} 页数据")
-        
-        all_data = []
+    def _fetch_pages_in_order(self, fetch_batch, batch_size, max_pages=None, stop_at_known=False,
+                              checkpoint=None, resume=False):
+        """
+        按页序抓取并解析，requests 与 DrissionPage 两种方式共用：
+        - fetch_batch(pages): 返回 {页码: 接口响应 JSON}，失败的页不出现在结果中
+        - 总页数未知、增量模式或使用断点时先只取第 1 页（从响应得到总页数 / 通常就遇到已有期号 /
+          校验断点），之后每批并发取 batch_size 页
+        - stop_at_known: 遇到已保存的期号即停止，之后的页都是旧数据
+        - checkpoint / resume: 见 fetch_lottery_data（增量模式不使用断点）
+        返回 (记录列表, 失败页列表, 是否遇到已有期号)
+        """
+        if stop_at_known:
+            checkpoint = None
+        page_records = {}
         failed_pages = []
-        consecutive_failures = 0
-        max_consecutive_failures = 5  # 连续失败阈值
-        
-        for page in range(1, max_pages + 1):
-            print(f"\n📖 正在抓取第 {page}/{max_pages} 页...")
-            
-            # 每次请求前更新headers
-            if page % 10 == 1:  # 每10页更新一次headers
-                self._update_headers()
-            
-            max_retries = 6  # 增加单页重试次数
-            page_success = False
+        reached_known = False
+        pages_known = max_pages is not None
+        total = page_count = None
+        pending = list(range(1, max_pages + 1)) if pages_known else [1]
+        
+        while pending and not reached_known:
+            if pending[0] == 1 and (stop_at_known or not pages_known or checkpoint is not None):
+                batch, pending = pending[:1], pending[1:]
+            else:
+                batch, pending = pending[:batch_size], pending[batch_size:]
+            print(f"\n📖 正在抓取第 {batch[0]}-{batch[-1]} 页...")
             
-            for attempt in range(max_retries):
-                try:
-                    params = {
-                        'gameNo': '85',
-                        'provinceId': '0',
-                        'pageSize': '30',
-                        'isVerify': '1',
-                        'pageNo': str(page)
-                    }
-                    
-                    # 增加延时策略
-                    if attempt > 0:
-                        if attempt <= 2:
-                            delay = 3 * (2 ** attempt) + random.uniform(0, 2)
-                        else:
-                            delay = 20 + random.uniform(0, 10)
-                        print(f"⏳ 第 {attempt + 1} 次尝试，等待 {delay:.1f} 秒...")
-                        time.sleep(delay)
-                    else:
-                        # 页面间的基础延时
-                        base_delay = random.uniform(2, 5)
-                        if consecutive_failures > 0:
-                            base_delay += consecutive_failures * 2  # 连续失败时增加延时
-                        time.sleep(base_delay)
-                    
-                    response = self.session.get(self.base_url, params=params, timeout=45)
-                    
-                    # 特殊处理567错误
-                    if response.status_code == 567:
-                        print(f"⚠️  第{page}页遇到567错误")
-                        if attempt < max_retries - 1:
-                            print(f"🔄 将延长等待时间后重试...")
-                            time.sleep(15 + random.uniform(0, 10))
-                            continue
-                        else:
-                            print(f"❌ 第{page}页多次567错误，跳过此页")
-                            failed_pages.append(page)
-                            break
-                    
-                    # 处理其他HTTP错误
-                    if response.status_code == 429:
-                        print(f"🚫 第{page}页遇到429限流错误")
-                        time.sleep(25 + random.uniform(0, 15))
-                        continue
-                    elif response.status_code == 403:
-                        print(f"🚫 第{page}页遇到403错误，更新请求头...")
-                        self._update_headers()
-                        time.sleep(10 + random.uniform(0, 5))
+            responses = fetch_batch(batch)
+            for page_no in batch:
+                data = responses.get(page_no)
+                if data is None or not DLT_API.items(data):
+                    print(f"❌ 第{page_no}页获取失败或无数据")
+                    failed_pages.append(page_no)
+                    continue
+                if page_no == 1:
+                    total = int(DLT_API.total(data) or 0)
+                    page_count = self._page_count(data)
+                    if not pages_known:
+                        max_pages = page_count
+                        pages_known = True
+                        pending = list(range(2, max_pages + 1))
+                        print(f"📄 共 {total} 条记录，{max_pages} 页")
+                
+                records = []
+                for item in DLT_API.items(data):
+                    try:
+                        lottery_record = self._parse_api_item(item)
+                    except Exception as e:
+                        print(f"⚠️  解析记录时出错: {e}")
                         continue
-                    
-                    response.raise_for_status()
-                    
-                    data = response.json()
-                    
-                    # 检查API响应
-                    if not data.get('isSuccess', False):
-                        error_msg = data.get('errorMessage', '未知错误')
-                        if error_msg == '处理成功':
-                            print("✅ API返回'处理成功'，继续处理")
-                        else:
-                            print(f"❌ 第{page}页API错误: {error_msg}")
-                            if attempt < max_retries - 1:
-                                continue
-                            else:
-                                failed_pages.append(page)
-                                break
-                    
-                    # 处理数据
-                    value = data.get('value', {})
-                    page_data = value.get('list', [])
-                    
-                    if not page_data:
-                        print(f"⚠️  第{page}页无数据")
-                        if attempt < max_retries - 1:
-                            continue
-                        else:
-                            failed_pages.append(page)
-                            break
-                    
-                    # 解析并存储数据
-                    parsed_count = 0
-                    for item in page_data:
-                        try:
-                            # 解析期号
-                            period = item.get('lotteryDrawNum', '')
-                            
-                            # 解析开奖时间
-                            draw_time = item.get('lotteryDrawTime', '')
-                            # 提取日期部分
-                            date_match = re.search(r'(\d{4}-\d{2}-\d{2})', draw_time)
-                            if not date_match:
-                                continue
-                            draw_date = date_match.group(1)
-                            
-                            # 解析开奖号码
-                            draw_result = item.get('lotteryDrawResult', '')
-                            if not draw_result:
-                                continue
-                            
-                            # 分割号码：前5个是前区，后2个是后区
-                            numbers = draw_result.split(' ')
-                            if len(numbers) < 7:
-                                continue
-                            
-                            front_balls = [int(x) for x in numbers[:5]]
-                            back_balls = [int(x) for x in numbers[5:7]]
-                            
-                            # 解析奖级信息
-                            prize_list = item.get('prizeLevelList', [])
-                            first_prize_count = 0
-                            first_prize_amount = 0
-                            second_prize_count = 0
-                            second_prize_amount = 0
-                            
-                            for prize in prize_list:
-                                if prize.get('awardLevel') == '一等奖':
-                                    first_prize_count = prize.get('awardLevelNum', 0)
-                                    first_prize_amount = prize.get('awardMoney', 0)
-                                elif prize.get('awardLevel') == '二等奖':
-                                    second_prize_count = prize.get('awardLevelNum', 0)
-                                    second_prize_amount = prize.get('awardMoney', 0)
-                            
-                            # 解析其他信息
-                            sales_amount = item.get('drawMoney', 0)
-                            pool_amount = item.get('poolBalanceAfterdraw', 0)
-                            
-                            # 存储数据
-                            lottery_record = {
-                                'period': period,
-                                'date': draw_date,
-                                'front_balls': front_balls,
-                                'back_balls': back_balls,
-                                'first_prize_count': first_prize_count,
-                                'first_prize_amount': first_prize_amount,
-                                'second_prize_count': second_prize_count,
-                                'second_prize_amount': second_prize_amount,
-                                'sales_amount': sales_amount,
-                                'pool_amount': pool_amount
-                            }
-                            
-                            all_data.append(lottery_record)
-                            parsed_count += 1
-                            
-                        except Exception as e:
-                            print(f"⚠️  解析记录时出错: {e}")
-                            continue
-                    
-                    page_success = True
-                    consecutive_failures = 0  # 重置连续失败计数
-                    print(f"✅ 第{page}页成功，解析 {parsed_count} 条有效记录")
-                    break
-                    
-                except requests.exceptions.Timeout:
-                    print(f"⏰ 第{page}页请求超时 (尝试 {attempt + 1}/{max_retries})")
-                except requests.exceptions.ConnectionError:
-                    print(f"🔌 第{page}页连接错误 (尝试 {attempt + 1}/{max_retries})")
-                except Exception as e:
-                    print(f"❌ 第{page}页出错: {e} (尝试 {attempt + 1}/{max_retries})")
-            
-            if not page_success:
-                consecutive_failures += 1
-                print(f"❌ 第{page}页最终失败 (连续失败: {consecutive_failures})")
+                    if lottery_record:
+                        records.append(lottery_record)
+                parsed_count = len(records)
                 
-                # 如果连续失败太多，提前结束
-                if consecutive_failures >= max_consecutive_failures:
-                    print(f"⚠️  连续失败 {consecutive_failures} 页，提前结束抓取")
+                if stop_at_known:
+                    new_records = [rec for rec in records if self.draw_store.index_of(rec['period']) is None]
+                    reached_known = len(new_records) < len(records)
+                    records = new_records
+                if page_no == 1 and checkpoint is not None:
+                    # 用最新的第 1 页开始（或校验并继续）断点，跳过断点中已完成的页
+                    page_records.update(checkpoint.begin(DLT_PAGE_SIZE, records, total, resume))
+                    pending = [page for page in pending if page not in page_records]
+                else:
+                    page_records[page_no] = records
+                    if checkpoint is not None:
+                        checkpoint.add_page(page_no, records)
+                print(f"✅ 第{page_no}页成功，解析 {parsed_count} 条有效记录")
+                if reached_known:
                     break
+            
+            if not pages_known or (checkpoint is not None and 1 not in page_records):
+                break  # 第 1 页失败，无法确定总页数 / 无法校验断点
         
-        print(f"\n📊 requests数据抓取完成:")
+        if checkpoint is not None and 1 in page_records:
+            checkpoint.finish(page_records, page_count, total)
+        all_data = [rec for page in sorted(page_records) for rec in page_records[page]]
+        return all_data, failed_pages, reached_known
+    
+    def _finish_fetch(self, mode, all_data, failed_pages, reached_known, stop_at_known):
+        """汇总抓取结果：全量模式替换已有数据并返回是否成功；增量模式返回新记录（失败时为 False）"""
+        print(f"\n📊 {mode}数据抓取完成:")
         print(f"✅ 成功获取 {len(all_data)} 条记录")
         if failed_pages:
             print(f"❌ 失败页面: {failed_pages[:10]}{'...' if len(failed_pages) > 10 else ''} (共{len(failed_pages)}页)")
         
+        if stop_at_known:
+            # 增量模式下任何一页失败都放弃本次结果，避免在历史数据中留下缺口
+            return all_data if (all_data or reached_known) and not failed_pages else False
         self.lottery_data = all_data
         return len(all_data) > 0
     
+    def fetch_lottery_data_with_requests(self, max_pages=None, stop_at_known=False, checkpoint=None, resume=False,
+                                         **fetch_options):
+        """
+        使用requests抓取大乐透数据（经 fetchers 抓取后端限速、重试），其余参数见 fetch_lottery_data
+        - fetch_options: 传给 _make_fetcher 的参数（max_workers、rate_limit），用于调优
+        """
+        print("🎯 使用requests模式抓取大乐透数据...")
+        self._update_headers()
+        fetcher = self._make_fetcher(**fetch_options)
+        
+        def fetch_batch(pages):
+            return fetcher.fetch_pages(self.base_url, self._page_params, pages, raw=True)
+        
+        result = self._fetch_pages_in_order(fetch_batch, fetcher.max_workers, max_pages, stop_at_known,
+                                            checkpoint, resume)
+        return self._finish_fetch("requests", *result, stop_at_known)
+    
     def _parse_number(self, text):
         """解析数字，移除逗号等格式符号"""
         if not text or text == '-' or text == '---':
@@ -456,50 +479,197 @@ class SuperLottoAnalyzer:
             return 0
     
     def save_data(self, filename="data/super_lotto_data.json"):
-        """保存数据到文件"""
+        """
+        保存完整数据到文件（临时文件 + 原子替换），同时写出二进制快照。
+        完整数据已包含追加日志中的记录，保存后清空日志（即日志压缩）。
+        """
         # 确保目录存在
         os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.lottery_data, f, ensure_ascii=False, indent=2)
+        raw = json.dumps(self.lottery_data, ensure_ascii=False, indent=2).encode('utf-8')
+        atomic_write(filename, raw)
+        self._save_sidecar(filename, raw)
+        DrawJournal(filename).clear()
+        self._save_running_stats(filename, raw)
         print(f"数据已保存到 {filename}")
     
+    def _save_running_stats(self, filename, raw=None):
+        """
+        把全量统计结果连同 JSON 数据文件的校验和保存到数据文件旁，下次加载时无需重新统计。
+        - raw: 刚写入的 JSON 内容；不给出时读取磁盘上的数据文件（只追加了日志时）
+        """
+        try:
+            if raw is None:
+                with open(filename, 'rb') as f:
+                    raw = f.read()
+            self.running_stats.save(stats_path(filename), content_checksum(raw))
+        except OSError as e:
+            print(f"⚠️  统计结果写入失败: {e}")
+    
+    def _save_sidecar(self, filename, raw):
+        """写出与 JSON 内容对应的二进制快照，失败不影响 JSON 数据本身"""
+        try:
+            self.draw_store.save_binary(sidecar_path(filename), content_checksum(raw))
+        except OSError as e:
+            print(f"⚠️  二进制快照写入失败: {e}")
+    
     def load_data(self, filename="data/super_lotto_data.json"):
-        """从文件加载数据"""
+        """
+        从文件加载数据：
+        1. 二进制快照与 JSON 一致时直接内存映射，否则解析 JSON 并重建快照
+        2. 再按期号合并追加日志中尚未压缩的新记录
+        """
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                self.lottery_data = json.load(f)
-            print(f"从 {filename} 加载了 {len(self.lottery_data)} 期数据")
+            with open(filename, 'rb') as f:
+                raw = f.read()
+            checksum = content_checksum(raw)
+            store = DrawStore.load_binary(sidecar_path(filename), DLT_GAME, checksum)
+            if store is not None:
+                self.draw_store = store
+                self._reset_derived()
+                source = "（二进制快照）"
+            else:
+                self.lottery_data = json.loads(raw.decode('utf-8'))
+                self._save_sidecar(filename, raw)
+                source = ""
+            pending = DrawJournal(filename).read()
+            if pending:
+                self.merge_draws(pending)
+                source += f"（含追加日志 {len(pending)} 条）"
+            running = RunningStats.load(stats_path(filename), DLT_GAME)
+            if running is not None and running.matches(self.draw_store, checksum):
+                self._running_stats = running
+            print(f"从 {filename} 加载了 {len(self.draw_store)} 期数据{source}")
             return True
         except FileNotFoundError:
             print(f"文件 {filename} 不存在")
             return False
+        except json.JSONDecodeError:
+            print(f"文件 {filename} 内容解析失败")
+            return False
+
+    def append_data(self, records, filename="data/super_lotto_data.json"):
+        """把新开奖记录追加到数据文件的追加日志，日志累计过多时压缩回完整 JSON"""
+        journal = DrawJournal(filename)
+        journal.append(records)
+        if journal.needs_compaction():
+            print(f"🗜️  追加日志已累计 {journal.compact_threshold} 条以上，压缩写回完整数据文件")
+            self.save_data(filename)
+        else:
+            self._save_running_stats(filename)
+            print(f"📝 {len(records)} 期新数据已追加到 {journal.path}")
+
+    def fetch_lottery_data_incremental(self, data_path=None):
+        """
+        增量抓取大乐透数据：
+        - 从第 1 页（最新一期）开始翻页，遇到已保存的期号即停止，只合并新期号
+        - data_path: 数据文件路径，给出时新记录直接追加到其追加日志，不重写整份 JSON
+        
+        说明：
+        - 正常情况下只需请求第 1 页；返回新增期数，抓取失败时返回 0 且不改动已有数据。
+        """
+        print("\n开始增量抓取大乐透数据（遇到已有期号即停止翻页）")
+        new_records = self.fetch_lottery_data(stop_at_known=True)
+        if not new_records:
+            print("📭 本次增量抓取没有发现新数据。")
+            return 0
+
+        print(f"🎉 增量抓取完成，共获取 {len(new_records)} 期新数据，开始合并...")
+        self.merge_draws(new_records)
+
+        print(f"✅ 合并后总共有 {len(self.draw_store)} 期数据")
+        if data_path:
+            self.append_data(new_records, data_path)
+        return len(new_records)
+
+    def init_and_update_history(
+        self,
+        data_path: str = "data/super_lotto_data.json",
+        backup_path: str = "data/initial_backup/super_lotto_data_initial.json",
+        resume: bool = False
+    ):
+        """
+        初始化并增量更新历史数据，流程与双色球分析器一致：
+        1. 优先从 data_path 读取主数据，失败时尝试 backup_path 的初始备份；
+        2. 都没有时从头完整抓取一次，并同时写入主数据和初始备份；
+        3. 按开奖日历判断最新一期之后是否已有开奖，没有则不联网；
+        4. 有则增量抓取，遇到已有期号即停止翻页，新期号追加写入日志（定期压缩回主数据）。
+        完整抓取时每页写入断点，resume 为 True 时从上次中断的断点继续。
+        """
+        print("\n=== 初始化并增量更新大乐透历史数据 ===")
+
+        # 上次完整抓取未完成（断点仍在）且要求继续时，不论主数据是否存在都接着抓取
+        checkpoint = BackfillCheckpoint(data_path)
+        pending_backfill = resume and checkpoint.exists()
+        if pending_backfill:
+            print(f"♻️  发现未完成的完整抓取断点 {checkpoint.path}，继续完整抓取")
+
+        # 1. 尝试读取主数据 / 初始备份
+        data_loaded = not pending_backfill and self.load_data(data_path)
+        if not data_loaded or len(self.draw_store) == 0:
+            print("主数据读取失败或为空，尝试从初始备份读取...")
+            backup_loaded = not pending_backfill and self.load_data(backup_path)
+            if backup_loaded and len(self.draw_store) > 0:
+                print(f"✅ 已从初始备份 {backup_path} 载入历史数据，将其保存为主数据。")
+                self.save_data(data_path)
+            else:
+                # 2. 完整抓取一次历史数据
+                print("初始备份读取失败或为空，将从最早历史开始完整抓取一次...")
+                self.fetch_lottery_data(checkpoint=checkpoint, resume=resume)
+                if len(self.draw_store) == 0:
+                    print("❌ 完整抓取历史数据失败，无法继续。")
+                    return
+                if checkpoint.exists():
+                    # 只抓到部分历史：保留断点，不写主数据和初始备份，避免把缺口当作完整历史保存
+                    print("⚠️  完整抓取未完成，暂不写入主数据和初始备份，请使用 --resume 继续。")
+                    return
+                self.save_data(data_path)
+                # 写入初始备份（只在首次完整抓取时写一次）
+                os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+                print(f"🔄 正在写入初始备份数据到 {backup_path}")
+                with open(backup_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.lottery_data, f, ensure_ascii=False, indent=2)
+                print("✅ 初始备份写入完成。")
+                return
+
+        # 3. 按开奖日历判断：最新一期之后还没有到过开奖时间，则无需联网
+        latest_period = self.draw_store.periods[0]
+        latest_date = self.draw_store.dates[0]
+        print(f"当前历史数据最新一期: 期号 {latest_period} 日期 {latest_date}")
+        try:
+            pending_draws = draw_dates_since(latest_date, DLT_DRAW_WEEKDAYS, beijing_now())
+        except ValueError:
+            print("⚠️ 最新日期字段格式异常，跳过增量抓取。")
+            return
+        if not pending_draws:
+            print("📭 最新一期之后尚无开奖日，无需增量抓取。")
+            return
+
+        # 4. 增量抓取，新数据追加写入日志，不再整份重写主数据
+        new_count = self.fetch_lottery_data_incremental(data_path=data_path)
+        if new_count == 0:
+            print("📭 没有新增期数，无需保存主数据。")
     
     def analyze_frequency(self):
         """分析号码出现频率"""
         print("\n=== 号码频率分析 ===")
         
-        # 前区和后区频率分析
-        front_counter = Counter()
-        back_counter = Counter()
-        
-        for record in self.lottery_data:
-            for front in record['front_balls']:
-                front_counter[front] += 1
-            for back in record['back_balls']:
-                back_counter[back] += 1
+        # 前区和后区频率分析（基于列式存储向量化统计）
+        front_counter = self.stats.main_counter()
+        back_counter = self.stats.extra_counter()
+        total = len(self.draw_store)
         
         # 前区频率排序
         front_freq = sorted(front_counter.items(), key=lambda x: x[1], reverse=True)
         print("\n前区号码出现频率排行榜（前15）：")
         for i, (num, count) in enumerate(front_freq[:15], 1):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{i:2d}. 号码 {num:2d}: 出现 {count:3d} 次 ({percentage:.1f}%)")
         
         # 后区频率排序
         back_freq = sorted(back_counter.items(), key=lambda x: x[1], reverse=True)
         print("\n后区号码出现频率排行榜：")
         for i, (num, count) in enumerate(back_freq, 1):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{i:2d}. 号码 {num:2d}: 出现 {count:3d} 次 ({percentage:.1f}%)")
         
         return front_counter, back_counter
@@ -508,70 +678,47 @@ class SuperLottoAnalyzer:
         """分析号码规律"""
         print("\n=== 号码规律分析 ===")
         
-        # 奇偶分布分析（前区）
-        odd_even_dist = defaultdict(int)
-        sum_dist = defaultdict(int)
-        span_dist = defaultdict(int)
-        
-        for record in self.lottery_data:
-            front_balls = record['front_balls']
-            
-            # 奇偶分析
-            odd_count = sum(1 for x in front_balls if x % 2 == 1)
-            even_count = 5 - odd_count
-            odd_even_dist[f"{odd_count}奇{even_count}偶"] += 1
-            
-            # 和值分析
-            total_sum = sum(front_balls)
-            sum_range = f"{(total_sum//10)*10}-{(total_sum//10)*10+9}"
-            sum_dist[sum_range] += 1
-            
-            # 跨度分析
-            span = max(front_balls) - min(front_balls)
-            span_range = f"{(span//5)*5}-{(span//5)*5+4}"
-            span_dist[span_range] += 1
+        # 前区奇偶、和值、跨度分布（基于前区矩阵向量化统计）
+        stats = self.stats
+        odd_even_dist, sum_dist, span_dist = stats.odd_even_dist(), stats.sum_dist(), stats.span_dist()
+        total = stats.total
         
         print("\n前区奇偶分布统计：")
         for pattern, count in sorted(odd_even_dist.items(), key=lambda x: x[1], reverse=True):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{pattern}: {count} 次 ({percentage:.1f}%)")
         
         print("\n前区和值分布统计：")
         for sum_range, count in sorted(sum_dist.items(), key=lambda x: int(x[0].split('-')[0])):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{sum_range}: {count} 次 ({percentage:.1f}%)")
         
         print("\n前区跨度分布统计：")
         for span_range, count in sorted(span_dist.items(), key=lambda x: int(x[0].split('-')[0])):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             print(f"{span_range}: {count} 次 ({percentage:.1f}%)")
     
     def analyze_trends(self):
         """分析走势"""
         print("\n=== 走势分析 ===")
         
-        if len(self.lottery_data) < 10:
+        if len(self.draw_store) < 10:
             print("数据不足，无法进行走势分析")
             return
         
         # 最近10期的号码
-        recent_10 = self.lottery_data[:10]
+        recent_10 = self.draw_store.head(10)
+        recent_stats = self.recent_stats
         
         print("最近10期开奖号码：")
-        for record in recent_10:
+        for record in recent_10.to_records():
             front_str = " ".join([f"{x:2d}" for x in record['front_balls']])
             back_str = " ".join([f"{x:2d}" for x in record['back_balls']])
             print(f"{record['period']}: {front_str} | {back_str}")
         
         # 冷热号分析
-        front_counter = Counter()
-        back_counter = Counter()
-        
-        for record in recent_10:
-            for front in record['front_balls']:
-                front_counter[front] += 1
-            for back in record['back_balls']:
-                back_counter[back] += 1
+        front_counter = recent_stats.main_counter()
+        back_counter = recent_stats.extra_counter()
         
         print(f"\n最近10期前区热号（出现2次及以上）：")
         hot_fronts = [num for num, count in front_counter.items() if count >= 2]
@@ -593,19 +740,29 @@ class SuperLottoAnalyzer:
         """生成推荐号码（基于智能分析的动态推荐）"""
         print(f"\n=== 生成 {num_sets} 组推荐号码 ===")
         
-        if not self.lottery_data:
+        if not len(self.draw_store):
             print("无数据，无法生成推荐")
             return []
         
-        # 统计频率
-        front_counter = Counter()
-        back_counter = Counter()
+        # 同一数据集版本上的推荐结果只计算一次，报告、聚合数据、README 和 Web 端共用
+        recommendations = self.analysis_snapshot.memoize(
+            ('recommendations', num_sets), lambda: self._build_recommendations(num_sets))
+        
+        print("\n基于智能策略的推荐号码：")
+        for i, rec in enumerate(recommendations, 1):
+            front_str = " ".join([f"{x:02d}" for x in rec['front_balls']])
+            back_str = " ".join([f"{x:02d}" for x in rec['back_balls']])
+            print(f"推荐 {i}: {front_str} | {back_str}")
+            print(f"       策略: {rec['strategy']} | {rec['odd_even']} | 和值:{rec['sum']} | 跨度:{rec['span']}")
+            print(f"       说明: {rec['description']}")
         
-        for record in self.lottery_data:
-            for front in record['front_balls']:
-                front_counter[front] += 1
-            for back in record['back_balls']:
-                back_counter[back] += 1
+        return recommendations
+    
+    def _build_recommendations(self, num_sets):
+        """按8种智能策略计算推荐号码（由 generate_recommendations 缓存调用）"""
+        # 统计频率
+        front_counter = self.stats.main_counter()
+        back_counter = self.stats.extra_counter()
         
         # 确保所有号码都有记录
         for i in range(1, 36):  # 前区1-35
@@ -773,14 +930,6 @@ class SuperLottoAnalyzer:
                 'span': span
             })
         
-        print("\n基于智能策略的推荐号码：")
-        for i, rec in enumerate(recommendations, 1):
-            front_str = " ".join([f"{x:02d}" for x in rec['front_balls']])
-            back_str = " ".join([f"{x:02d}" for x in rec['back_balls']])
-            print(f"推荐 {i}: {front_str} | {back_str}")
-            print(f"       策略: {rec['strategy']} | {rec['odd_even']} | 和值:{rec['sum']} | 跨度:{rec['span']}")
-            print(f"       说明: {rec['description']}")
-        
         return recommendations
     
     def _select_with_odd_even_balance(self, pool, count, existing_numbers, target_total=5):
@@ -821,67 +970,34 @@ class SuperLottoAnalyzer:
         
         return selected[:count]
     
-    def visualize_frequency(self, save_plots=True):
-        """可视化频率分析"""
-        if not self.lottery_data:
+    def visualize_frequency(self, save_plots=True, renderer=None):
+        """
+        可视化频率分析（Agg 画布离屏渲染，统计结果未变化时跳过）
+        - save_plots: 为 False 时只返回图表描述，不渲染
+        - renderer: 可选的 ChartRenderer，给出时提交到后台进程池渲染，由调用方统一等待
+        """
+        if not len(self.draw_store):
             print("无数据，无法生成图表")
-            return
+            return None
         
         # 统计频率
-        front_counter = Counter()
-        back_counter = Counter()
-        
-        for record in self.lottery_data:
-            for front in record['front_balls']:
-                front_counter[front] += 1
-            for back in record['back_balls']:
-                back_counter[back] += 1
-        
-        # 创建图表
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 10))
-        
-        # 前区频率图
-        front_nums = list(range(1, 36))
-        front_freqs = [front_counter.get(num, 0) for num in front_nums]
-        
-        bars1 = ax1.bar(front_nums, front_freqs, color='red', alpha=0.7)
-        ax1.set_title('前区号码出现频率分布', fontsize=16, fontweight='bold')
-        ax1.set_xlabel('前区号码', fontsize=12)
-        ax1.set_ylabel('出现次数', fontsize=12)
-        ax1.set_xticks(front_nums)
-        ax1.grid(True, alpha=0.3)
-        
-        # 添加数值标签
-        for bar, freq in zip(bars1, front_freqs):
-            if freq > 0:
-                ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-                        str(freq), ha='center', va='bottom', fontsize=8)
-        
-        # 后区频率图
-        back_nums = list(range(1, 13))
-        back_freqs = [back_counter.get(num, 0) for num in back_nums]
-        
-        bars2 = ax2.bar(back_nums, back_freqs, color='blue', alpha=0.7)
-        ax2.set_title('后区号码出现频率分布', fontsize=16, fontweight='bold')
-        ax2.set_xlabel('后区号码', fontsize=12)
-        ax2.set_ylabel('出现次数', fontsize=12)
-        ax2.set_xticks(back_nums)
-        ax2.grid(True, alpha=0.3)
-        
-        # 添加数值标签
-        for bar, freq in zip(bars2, back_freqs):
-            if freq > 0:
-                ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-                        str(freq), ha='center', va='bottom', fontsize=10)
-        
-        plt.tight_layout()
+        front_counter = self.stats.main_counter()
+        back_counter = self.stats.extra_counter()
+        
+        spec = ChartSpec('pics/super_lotto_frequency_analysis.png', (
+            BarPanel('前区号码出现频率分布', '前区号码', list(range(1, 36)),
+                     [front_counter.get(num, 0) for num in range(1, 36)], 'red', 8),
+            BarPanel('后区号码出现频率分布', '后区号码', list(range(1, 13)),
+                     [back_counter.get(num, 0) for num in range(1, 13)], 'blue', 10),
+        ), (16, 10), 300)
         
         if save_plots:
-            # 确保目录存在
-            os.makedirs('pics', exist_ok=True)
-            plt.savefig('pics/super_lotto_frequency_analysis.png', dpi=300, bbox_inches='tight')
-            print("频率分析图表已保存为 pics/super_lotto_frequency_analysis.png")
-    
+            if renderer is not None:
+                renderer.submit(spec)
+            elif render_if_changed(spec):
+                print("频率分析图表已保存为 pics/super_lotto_frequency_analysis.png")
+        return spec
+
     def get_lottery_rules(self):
         """获取大乐透游戏规则"""
         rules = """
@@ -1097,55 +1213,28 @@ class SuperLottoAnalyzer:
     
     def _get_frequency_analysis(self):
         """内部方法：获取频率分析数据"""
-        front_counter = Counter()
-        back_counter = Counter()
-        
-        for record in self.lottery_data:
-            for front in record['front_balls']:
-                front_counter[front] += 1
-            for back in record['back_balls']:
-                back_counter[back] += 1
-        
-        return front_counter, back_counter
+        return self.stats.main_counter(), self.stats.extra_counter()
     
     def _get_patterns_analysis(self):
         """内部方法：获取规律分析数据"""
-        odd_even_dist = defaultdict(int)
-        sum_dist = defaultdict(int)
-        span_dist = defaultdict(int)
-        
-        for record in self.lottery_data:
-            front_balls = record['front_balls']
-            
-            # 奇偶分析
-            odd_count = sum(1 for x in front_balls if x % 2 == 1)
-            even_count = 5 - odd_count
-            odd_even_dist[f"{odd_count}奇{even_count}偶"] += 1
-            
-            # 和值分析
-            total_sum = sum(front_balls)
-            sum_range = f"{(total_sum//10)*10}-{(total_sum//10)*10+9}"
-            sum_dist[sum_range] += 1
-            
-            # 跨度分析
-            span = max(front_balls) - min(front_balls)
-            span_range = f"{(span//5)*5}-{(span//5)*5+4}"
-            span_dist[span_range] += 1
+        stats = self.stats
+        odd_even_dist, sum_dist, span_dist = stats.odd_even_dist(), stats.sum_dist(), stats.span_dist()
+        total = stats.total
         
         # 格式化数据
         odd_even_result = "| 分布类型 | 出现次数 | 出现频率 |\n|----------|----------|----------|\n"
         for pattern, count in sorted(odd_even_dist.items(), key=lambda x: x[1], reverse=True):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             odd_even_result += f"| {pattern} | {count} | {percentage:.1f}% |\n"
         
         sum_result = "| 和值范围 | 出现次数 | 出现频率 |\n|----------|----------|----------|\n"
         for sum_range, count in sorted(sum_dist.items(), key=lambda x: int(x[0].split('-')[0])):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             sum_result += f"| {sum_range} | {count} | {percentage:.1f}% |\n"
         
         span_result = "| 跨度范围 | 出现次数 | 出现频率 |\n|----------|----------|----------|\n"
         for span_range, count in sorted(span_dist.items(), key=lambda x: int(x[0].split('-')[0])):
-            percentage = (count / len(self.lottery_data)) * 100
+            percentage = (count / total) * 100
             span_result += f"| {span_range} | {count} | {percentage:.1f}% |\n"
         
         return {
@@ -1156,31 +1245,26 @@ class SuperLottoAnalyzer:
     
     def _get_trends_analysis(self):
         """内部方法：获取趋势分析数据"""
-        if len(self.lottery_data) < 10:
+        if len(self.draw_store) < 10:
             return {
                 'recent_draws': '数据不足',
                 'hot_fronts': '无',
                 'hot_backs': '无'
             }
         
-        recent_10 = self.lottery_data[:10]
+        recent_10 = self.draw_store.head(10)
+        recent_stats = self.recent_stats
         
         # 格式化最近10期
         recent_draws = "| 期号 | 开奖日期 | 前区号码 | 后区号码 |\n|------|----------|----------|----------|\n"
-        for record in recent_10:
+        for record in recent_10.to_records():
             front_str = " ".join([f"{x:02d}" for x in record['front_balls']])
             back_str = " ".join([f"{x:02d}" for x in record['back_balls']])
             recent_draws += f"| {record['period']} | {record['date']} | {front_str} | **{back_str}** |\n"
         
         # 冷热号分析
-        front_counter = Counter()
-        back_counter = Counter()
-        
-        for record in recent_10:
-            for front in record['front_balls']:
-                front_counter[front] += 1
-            for back in record['back_balls']:
-                back_counter[back] += 1
+        front_counter = recent_stats.main_counter()
+        back_counter = recent_stats.extra_counter()
         
         hot_fronts = [num for num, count in front_counter.items() if count >= 2]
         hot_backs = [num for num, count in back_counter.items() if count >= 2]
@@ -1387,48 +1471,23 @@ class SuperLottoAnalyzer:
     
     def _get_patterns_analysis_raw(self):
         """内部方法：获取原始规律分析数据"""
-        odd_even_dist = defaultdict(int)
-        sum_dist = defaultdict(int)
-        span_dist = defaultdict(int)
-        
-        for record in self.lottery_data:
-            front_balls = record['front_balls']
-            
-            # 奇偶分析
-            odd_count = sum(1 for x in front_balls if x % 2 == 1)
-            even_count = 5 - odd_count
-            odd_even_dist[f"{odd_count}奇{even_count}偶"] += 1
-            
-            # 和值分析
-            total_sum = sum(front_balls)
-            sum_range = f"{(total_sum//10)*10}-{(total_sum//10)*10+9}"
-            sum_dist[sum_range] += 1
-            
-            # 跨度分析
-            span = max(front_balls) - min(front_balls)
-            span_range = f"{(span//5)*5}-{(span//5)*5+4}"
-            span_dist[span_range] += 1
-        
-        return {
-            'odd_even_dist': dict(odd_even_dist),
-            'sum_dist': dict(sum_dist),
-            'span_dist': dict(span_dist)
-        }
+        return self.stats.patterns_raw()
     
     def _get_trends_analysis_raw(self):
         """内部方法：获取原始趋势分析数据"""
-        if len(self.lottery_data) < 10:
+        if len(self.draw_store) < 10:
             return {
                 'recent_draws': [],
                 'hot_fronts': [],
                 'hot_backs': []
             }
         
-        recent_10 = self.lottery_data[:10]
+        recent_10 = self.draw_store.head(10)
+        recent_stats = self.recent_stats
         
         # 最近10期数据
         recent_draws = []
-        for record in recent_10:
+        for record in recent_10.to_records():
             recent_draws.append({
                 'period': record['period'],
                 'date': record['date'],
@@ -1437,14 +1496,8 @@ class SuperLottoAnalyzer:
             })
         
         # 冷热号分析
-        front_counter = Counter()
-        back_counter = Counter()
-        
-        for record in recent_10:
-            for front in record['front_balls']:
-                front_counter[front] += 1
-            for back in record['back_balls']:
-                back_counter[back] += 1
+        front_counter = recent_stats.main_counter()
+        back_counter = recent_stats.extra_counter()
         
         hot_fronts = [num for num, count in front_counter.items() if count >= 2]
         hot_backs = [num for num, count in back_counter.items() if count >= 2]
@@ -1552,311 +1605,91 @@ class SuperLottoAnalyzer:
         except Exception as e:
             print(f"更新README大乐透推荐号码失败: {e}")
     
-    def _setup_drissionpage(self):
-        """初始化DrissionPage浏览器"""
-        if not DRISSIONPAGE_AVAILABLE:
-            return False
-            
+    def _browser_session(self):
+        """
+        返回已启动并预热的浏览器会话，同一个分析器内复用（获取页数、翻页、多次增量同步）。
+        启动失败时返回 None，并切换到requests模式。
+        """
+        if self.browser is None:
+            if not DRISSIONPAGE_AVAILABLE:
+                return None
+            self.browser = BrowserSession(self._page_url(1), user_agent=random.choice(self.user_agents),
+                                          rate_limit=DLT_RATE_LIMIT)
         try:
-            # 配置浏览器选项
-            options = ChromiumOptions()
-            options.headless(True)  # 无头模式，适合服务器环境
-            options.set_argument('--no-sandbox')
-            options.set_argument('--disable-dev-shm-usage')
-            options.set_argument('--disable-gpu')
-            options.set_argument('--disable-web-security')
-            options.set_argument('--disable-features=VizDisplayCompositor')
-            options.set_argument('--disable-extensions')
-            options.set_argument('--disable-plugins')
-            options.set_argument('--disable-images')  # 禁用图片加载，提高速度
-            options.set_argument('--disable-javascript')  # 对于API请求，可以禁用JS
-            
-            # 设置用户代理
-            user_agent = random.choice(self.user_agents)
-            options.set_user_agent(user_agent)
-            
-            print(f"🚀 正在启动浏览器... (User-Agent: {user_agent[:50]}...)")
-            
-            # 创建浏览器实例
-            self.browser = Chromium(options)
-            self.tab = self.browser.latest_tab
-            
-            print("✅ 浏览器启动成功")
-            return True
-            
+            return self.browser.start()
         except Exception as e:
             print(f"❌ 浏览器启动失败: {e}")
+            self.close()
             self.use_drissionpage = False
-            return False
+            return None
     
-    def _close_drissionpage(self):
-        """关闭DrissionPage浏览器"""
-        try:
-            if self.browser:
-                self.browser.quit()
-                print("🔒 浏览器已关闭")
-        except Exception as e:
-            print(f"⚠️  关闭浏览器时出错: {e}")
+    def close(self):
+        """关闭浏览器会话（未启动时无操作）"""
+        if self.browser is not None:
+            self.browser.close()
+            self.browser = None
     
-    def fetch_lottery_data_with_drissionpage(self, max_pages=None):
-        """使用DrissionPage获取大乐透数据"""
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _page_url(self, page):
+        """官方接口第 page 页的完整 URL"""
+        return f"{self.base_url}?{'&'.join(f'{k}={v}' for k, v in self._page_params(page).items())}"
+    
+    def _browser_fetch_batch(self, session, pages):
+        """用浏览器会话并发请求多页，返回 {页码: 接口响应 JSON}（只含成功的页）"""
+        responses = {}
+        for page, data in zip(pages, session.fetch_json(self._page_url(p) for p in pages)):
+            error = DLT_API.check(data) if data else "无法获取JSON数据"
+            if error:
+                print(f"❌ 第{page}页: {error}")
+            else:
+                responses[page] = data
+        return responses
+    
+    def fetch_lottery_data_with_drissionpage(self, max_pages=None, stop_at_known=False, checkpoint=None, resume=False):
+        """
+        使用DrissionPage获取大乐透数据，参数见 fetch_lottery_data。
+        复用预热过的浏览器会话，每批在页面内并发请求多页。
+        """
         print("🎯 使用DrissionPage模式抓取大乐透数据...")
         
-        if not self._setup_drissionpage():
+        session = self._browser_session()
+        if session is None:
             print("❌ DrissionPage初始化失败，回退到requests模式")
-            return self.fetch_lottery_data(max_pages)
+            return self.fetch_lottery_data(max_pages, stop_at_known, checkpoint, resume)
         
         try:
-            if max_pages is None:
-                max_pages = self.get_max_pages_with_drissionpage()
-            
-            print(f"📄 计划抓取 {max_pages} 页数据")
-            
-            all_data = []
-            failed_pages = []
-            
-            for page in range(1, max_pages + 1):
-                print(f"\n📖 正在抓取第 {page}/{max_pages} 页...")
-                
-                try:
-                    # 构建API URL
-                    params = {
-                        'gameNo': '85',
-                        'provinceId': '0',
-                        'pageSize': '30',
-                        'isVerify': '1',
-                        'pageNo': str(page)
-                    }
-                    
-                    # 构建完整URL
-                    url_params = '&'.join([f"{k}={v}" for k, v in params.items()])
-                    full_url = f"{self.base_url}?{url_params}"
-                    
-                    print(f"🌐 访问URL: {full_url}")
-                    
-                    # 使用浏览器访问API
-                    self.tab.get(full_url, retry=3, interval=2, timeout=30)
-                    
-                    # 等待页面加载
-                    self.tab.wait.load_start()
-                    time.sleep(random.uniform(2, 4))
-                    
-                    # 获取页面内容
-                    page_content = self.tab.html
-                    
-                    # 尝试从页面中提取JSON数据
-                    json_data = None
-                    
-                    # 方法1: 查找<pre>标签中的JSON
-                    pre_element = self.tab.ele('tag:pre')
-                    if pre_element:
-                        json_text = pre_element.text
-                        try:
-                            json_data = json.loads(json_text)
-                        except:
-                            pass
-                    
-                    # 方法2: 直接从页面源码中提取JSON
-                    if not json_data:
-                        # 查找JSON格式的数据
-                        json_pattern = r'\{.*"isSuccess".*\}'
-                        matches = re.findall(json_pattern, page_content, re.DOTALL)
-                        if matches:
-                            try:
-                                json_data = json.loads(matches[0])
-                            except:
-                                pass
-                    
-                    # 方法3: 执行JavaScript获取数据
-                    if not json_data:
-                        try:
-                            # 执行JavaScript来获取响应数据
-                            js_code = """
-                            return fetch(arguments[0])
-                                .then(response => response.json())
-                                .then(data => data)
-                                .catch(error => null);
-                            """
-                            json_data = self.tab.run_js(js_code, full_url)
-                        except:
-                            pass
-                    
-                    if not json_data:
-                        print(f"❌ 第{page}页无法获取JSON数据")
-                        failed_pages.append(page)
-                        continue
-                    
-                    # 检查API响应
-                    if not json_data.get('isSuccess', False):
-                        error_msg = json_data.get('errorMessage', '未知错误')
-                        if error_msg == '处理成功':
-                            print("✅ API返回'处理成功'，继续处理")
-                        else:
-                            print(f"❌ 第{page}页API错误: {error_msg}")
-                            failed_pages.append(page)
-                            continue
-                    
-                    # 处理数据
-                    value = json_data.get('value', {})
-                    page_data = value.get('list', [])
-                    
-                    if not page_data:
-                        print(f"⚠️  第{page}页无数据")
-                        failed_pages.append(page)
-                        continue
-                    
-                    # 解析并存储数据
-                    parsed_count = 0
-                    for item in page_data:
-                        try:
-                            # 解析期号
-                            period = item.get('lotteryDrawNum', '')
-                            
-                            # 解析开奖时间
-                            draw_time = item.get('lotteryDrawTime', '')
-                            date_match = re.search(r'(\d{4}-\d{2}-\d{2})', draw_time)
-                            if not date_match:
-                                continue
-                            draw_date = date_match.group(1)
-                            
-                            # 解析开奖号码
-                            draw_result = item.get('lotteryDrawResult', '')
-                            if not draw_result:
-                                continue
-                            
-                            numbers = draw_result.split(' ')
-                            if len(numbers) < 7:
-                                continue
-                            
-                            front_balls = [int(x) for x in numbers[:5]]
-                            back_balls = [int(x) for x in numbers[5:7]]
-                            
-                            # 解析奖级信息
-                            prize_list = item.get('prizeLevelList', [])
-                            first_prize_count = 0
-                            first_prize_amount = 0
-                            second_prize_count = 0
-                            second_prize_amount = 0
-                            
-                            for prize in prize_list:
-                                if prize.get('awardLevel') == '一等奖':
-                                    first_prize_count = prize.get('awardLevelNum', 0)
-                                    first_prize_amount = prize.get('awardMoney', 0)
-                                elif prize.get('awardLevel') == '二等奖':
-                                    second_prize_count = prize.get('awardLevelNum', 0)
-                                    second_prize_amount = prize.get('awardMoney', 0)
-                            
-                            # 解析其他信息
-                            sales_amount = item.get('drawMoney', 0)
-                            pool_amount = item.get('poolBalanceAfterdraw', 0)
-                            
-                            # 存储数据
-                            lottery_record = {
-                                'period': period,
-                                'date': draw_date,
-                                'front_balls': front_balls,
-                                'back_balls': back_balls,
-                                'first_prize_count': first_prize_count,
-                                'first_prize_amount': first_prize_amount,
-                                'second_prize_count': second_prize_count,
-                                'second_prize_amount': second_prize_amount,
-                                'sales_amount': sales_amount,
-                                'pool_amount': pool_amount
-                            }
-                            
-                            all_data.append(lottery_record)
-                            parsed_count += 1
-                            
-                        except Exception as e:
-                            print(f"⚠️  解析记录时出错: {e}")
-                            continue
-                    
-                    print(f"✅ 第{page}页成功，解析 {parsed_count} 条有效记录")
-                    
-                    # 页面间延时
-                    time.sleep(random.uniform(3, 6))
-                    
-                except Exception as e:
-                    print(f"❌ 第{page}页出错: {e}")
-                    failed_pages.append(page)
-                    continue
-            
-            print(f"\n📊 DrissionPage数据抓取完成:")
-            print(f"✅ 成功获取 {len(all_data)} 条记录")
-            if failed_pages:
-                print(f"❌ 失败页面: {failed_pages[:10]}{'...' if len(failed_pages) > 10 else ''} (共{len(failed_pages)}页)")
-            
-            self.lottery_data = all_data
-            return len(all_data) > 0
-            
+            result = self._fetch_pages_in_order(
+                lambda pages: self._browser_fetch_batch(session, pages),
+                session.max_concurrency, max_pages, stop_at_known, checkpoint, resume)
+            return self._finish_fetch("DrissionPage", *result, stop_at_known)
         except Exception as e:
             print(f"❌ DrissionPage抓取过程出错: {e}")
             return False
-        finally:
-            self._close_drissionpage()
     
     def get_max_pages_with_drissionpage(self):
         """使用DrissionPage获取总页数"""
         print("正在使用DrissionPage获取总页数...")
-        
-        try:
-            params = {
-                'gameNo': '85',
-                'provinceId': '0',
-                'pageSize': '30',
-                'isVerify': '1',
-                'pageNo': '1'
-            }
-            
-            url_params = '&'.join([f"{k}={v}" for k, v in params.items()])
-            full_url = f"{self.base_url}?{url_params}"
-            
-            print(f"🌐 访问URL: {full_url}")
-            
-            # 使用浏览器访问API
-            self.tab.get(full_url, retry=3, interval=2, timeout=30)
-            self.tab.wait.load_start()
-            time.sleep(3)
-            
-            # 获取JSON数据
-            json_data = None
-            
-            # 尝试多种方法获取数据
-            pre_element = self.tab.ele('tag:pre')
-            if pre_element:
-                json_text = pre_element.text
-                try:
-                    json_data = json.loads(json_text)
-                except:
-                    pass
-            
-            if not json_data:
-                page_content = self.tab.html
-                json_pattern = r'\{.*"isSuccess".*\}'
-                matches = re.findall(json_pattern, page_content, re.DOTALL)
-                if matches:
-                    try:
-                        json_data = json.loads(matches[0])
-                    except:
-                        pass
-            
-            if json_data:
-                value = json_data.get('value', {})
-                total_pages = value.get('pages', 100)
-                total_records = value.get('total', 0)
-                
-                print(f"✅ 成功获取页数信息: 总记录 {total_records} 条，共 {total_pages} 页")
+        session = self._browser_session()
+        if session is not None:
+            data = self._browser_fetch_batch(session, [1]).get(1)
+            if data is not None:
+                total_pages = self._page_count(data)
+                print(f"✅ 成功获取页数信息: 总记录 {DLT_API.total(data)} 条，共 {total_pages} 页")
                 return total_pages
-            else:
-                print("⚠️  无法获取页数信息，使用默认值")
-                return 100
-                
-        except Exception as e:
-            print(f"❌ 获取总页数时出错: {e}")
-            return 100
+        print("⚠️  无法获取页数信息，使用默认值")
+        return 100
 
-def main():
+def main(argv=None):
     """主函数"""
+    parser = argparse.ArgumentParser(description="大乐透数据分析系统")
+    parser.add_argument("--resume", action="store_true", help="从上次中断的完整抓取断点继续，只抓取缺少的页")
+    args = parser.parse_args(argv)
+    
     # 显示免责声明
     print("=" * 80)
     print("🎯 大乐透数据分析系统")
@@ -1873,11 +1706,11 @@ def main():
     print("\n大乐透开奖数据分析系统")
     print("=" * 50)
     
-    # 始终抓取最新数据，覆盖现有文件
-    print("⚠️  正在抓取最新数据，请确保网络连接正常...")
-    max_pages = analyzer.get_max_pages()
-    analyzer.fetch_lottery_data(max_pages=max_pages)
-    analyzer.save_data()
+    # 载入已有数据并增量抓取最新开奖
+    print("⚠️  正在更新最新数据，请确保网络连接正常...")
+    # 浏览器会话只在同步数据时使用，with 块结束即关闭
+    with analyzer:
+        analyzer.init_and_update_history(resume=args.resume)
     
     if not analyzer.lottery_data:
         print("❌ 无法获取数据，程序退出")
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+pytest 公共夹具
+"""
+
+import pytest
+
+from scripts.fetchers import reset_host_controls
+
+
+@pytest.fixture(autouse=True)
+def _reset_host_controls():
+    """每个测试前清空按主机共享的限速器与熔断器，避免前一个测试的熔断状态影响后续测试"""
+    reset_host_controls()
+    yield
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析结果快照缓存测试脚本
+"""
+
+import json
+
+from scripts.draw_stats import compute_stats
+from scripts.super_lotto_analyzer import SuperLottoAnalyzer
+
+
+def _make_analyzer():
+    analyzer = SuperLottoAnalyzer()
+    with open('test/test_super_lotto_data.json', 'r', encoding='utf-8') as f:
+        analyzer.lottery_data = json.load(f)
+    return analyzer
+
+
+def test_snapshot_reused_for_same_dataset():
+    """同一数据集版本上重复分析直接复用快照，返回值互不影响"""
+    analyzer = _make_analyzer()
+    snapshot = analyzer.analysis_snapshot
+    assert snapshot.key == ('dlt', 60, analyzer.lottery_data[0]['period'])
+
+    first = analyzer.generate_recommendations(num_sets=8)
+    first[0]['history_score'] = 999
+    second = analyzer.generate_recommendations(num_sets=8)
+
+    assert analyzer.analysis_snapshot is snapshot
+    assert analyzer.stats is analyzer.stats
+    assert 'history_score' not in second[0]
+    assert [rec['front_balls'] for rec in first] == [rec['front_balls'] for rec in second]
+
+
+def test_snapshot_invalidated_by_new_draw():
+    """合并新开奖后快照自动失效并按新数据重新计算"""
+    analyzer = _make_analyzer()
+    old_snapshot = analyzer.analysis_snapshot
+    old_total = analyzer.stats.total
+
+    new_record = dict(analyzer.lottery_data[0])
+    new_record['period'] = str(int(new_record['period']) + 1)
+    analyzer.lottery_data = [new_record] + analyzer.lottery_data
+
+    assert analyzer.analysis_snapshot is not old_snapshot
+    assert analyzer.analysis_snapshot.key[2] == new_record['period']
+    assert analyzer.stats.total == old_total + 1
+
+
+def test_merge_feeds_running_stats():
+    """增量合并新开奖时统计按期更新，不重新完整统计"""
+    analyzer = _make_analyzer()
+    running = analyzer.running_stats
+    analyzer.recent_stats
+
+    new_record = dict(analyzer.lottery_data[3])
+    new_record['period'] = str(int(analyzer.lottery_data[0]['period']) + 1)
+    analyzer.merge_draws([new_record])
+
+    assert analyzer.running_stats is running
+    assert analyzer.stats == compute_stats(analyzer.draw_store)
+    assert analyzer.recent_stats == compute_stats(analyzer.draw_store.head(10))
+
+
+if __name__ == "__main__":
+    test_snapshot_reused_for_same_dataset()
+    test_snapshot_invalidated_by_new_draw()
+    test_merge_feeds_running_stats()
+    print("🎉 分析快照缓存测试通过！")
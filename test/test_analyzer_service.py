@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web 端分析器服务测试脚本（不访问网络）
+"""
+
+import json
+import os
+import tempfile
+
+from scripts.analyzer_service import AnalyzerService
+from scripts.draw_store import DrawStore
+from scripts.lottery_analyzer import DoubleColorBallAnalyzer
+from scripts.mock_lottery_server import MockLotteryServer
+
+
+def test_service_hot_swaps_on_new_data():
+    """数据文件更新后切换到新快照，已发布的旧快照保持不变"""
+    with open('data/lottery_data.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)[:40]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'lottery_data.json')
+        writer = DoubleColorBallAnalyzer()
+        writer.lottery_data = records[5:]
+        writer.save_data(data_path)
+
+        service = AnalyzerService(DoubleColorBallAnalyzer, data_path=data_path,
+                                  check_interval=3600, sync_interval=3600)
+        try:
+            old = service.current()
+            assert len(old.draw_store) == 35
+            assert not service.reload_if_changed()
+
+            writer.append_data(records[:5], data_path)
+            assert service.reload_if_changed()
+
+            new = service.current()
+            assert new is not old
+            assert new.draw_store.latest_period == records[0]['period']
+            assert len(new.draw_store) == 40
+            assert len(old.draw_store) == 35
+        finally:
+            service.stop()
+
+
+def test_preload_warms_without_starting_thread():
+    """预加载只加载数据并预计算，不在 master 中启动后台线程"""
+    warmed = []
+    service = AnalyzerService(DoubleColorBallAnalyzer, check_interval=3600, sync_interval=3600)
+    analyzer = service.preload(warm=lambda a: warmed.append(a.stats))
+    try:
+        assert service._thread is None
+        assert warmed[0] is analyzer.stats
+        assert service.current() is analyzer
+    finally:
+        service.stop()
+
+
+def test_sync_without_new_draws_does_not_build_records():
+    """没有新开奖时的同步只读列式存储，不构建 list-of-dicts 视图"""
+    with open('data/lottery_data.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)[:40]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'lottery_data.json')
+        writer = DoubleColorBallAnalyzer()
+        writer.lottery_data = records
+        writer.save_data(data_path)
+
+        to_records = DrawStore.to_records
+        DrawStore.to_records = lambda self: (_ for _ in ()).throw(AssertionError("不应构建记录列表"))
+        try:
+            with MockLotteryServer(ssq_records=records) as server:
+                analyzer = DoubleColorBallAnalyzer()
+                analyzer.api_url = server.url('ssq')
+                analyzer.init_and_update_history(data_path=data_path)
+                assert server.stats[200] == 1  # 只确认了一次官方最新期号
+        finally:
+            DrawStore.to_records = to_records
+        assert len(analyzer.draw_store) == len(records)
+
+
+if __name__ == "__main__":
+    test_service_hot_swaps_on_new_data()
+    test_preload_warms_without_starting_thread()
+    test_sync_without_new_draws_does_not_build_records()
+    print("🎉 分析器服务测试通过！")
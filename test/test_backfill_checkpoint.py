@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+完整抓取断点测试脚本（使用本地模拟接口，不访问网络）
+"""
+
+import json
+import os
+import tempfile
+
+from scripts.backfill_checkpoint import BackfillCheckpoint, rebase_pages
+from scripts.lottery_analyzer import DoubleColorBallAnalyzer
+from scripts.mock_lottery_server import MockLotteryServer
+from scripts.super_lotto_analyzer import SuperLottoAnalyzer
+
+
+def _records(count):
+    return [{'period': str(25100 - i)} for i in range(count)]
+
+
+def test_rebase_shifts_pages_after_new_draws():
+    """中断期间新增开奖时按位移重新对齐页码；重叠部分期号不一致时断点作废"""
+    old = _records(25)[2:]  # 断点写入时共 23 期
+    pages = {1: old[0:10], 2: old[10:20], 3: old[20:23]}
+    meta = {'page_size': 10, 'total': 23}
+    fresh_first = _records(25)[:10]
+
+    # 记录整体后移 2 位：新的第 2 页由旧第 1 页末尾 2 期和旧第 2 页前 8 期组成
+    rebased = rebase_pages(meta, pages, 10, fresh_first, 25)
+    assert sorted(rebased) == [1, 2, 3]
+    assert rebased[2] == _records(25)[10:20]
+    assert rebased[3] == _records(25)[20:25]
+
+    # 旧第 3 页未完成时，新的第 3 页缺少记录，需要重新抓取
+    del pages[3]
+    assert sorted(rebase_pages(meta, pages, 10, fresh_first, 25)) == [1, 2]
+    # 没有新开奖时原样复用
+    assert sorted(rebase_pages(meta, pages, 10, old[:10], 23)) == [1, 2]
+    # pageSize 变化、期号对不上时放弃断点
+    assert rebase_pages(meta, pages, 20, fresh_first, 25) is None
+    assert rebase_pages(meta, pages, 10, _records(40)[10:20], 25) is None
+
+
+def test_ssq_backfill_resumes_missing_pages():
+    """抓取中断后继续：只抓取缺少的页，期间的新开奖也能对齐，完成后删除断点"""
+    with open('data/lottery_data.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)[:95]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint = BackfillCheckpoint(os.path.join(tmp_dir, 'lottery_data.json'))
+
+        # 第一次只抓到前 2 页就中断（此时还没有最新的 2 期）
+        with MockLotteryServer(ssq_records=records[2:], max_page_size=30) as server:
+            analyzer = DoubleColorBallAnalyzer()
+            analyzer.api_url = server.url('ssq')
+            analyzer.fetch_lottery_data(max_pages=2, rate_limit=0, checkpoint=checkpoint)
+        meta, pages = checkpoint.read()
+        assert (meta['page_size'], meta['total'], sorted(pages)) == (30, 93, [1, 2])
+
+        with MockLotteryServer(ssq_records=records, max_page_size=30) as server:
+            analyzer = DoubleColorBallAnalyzer()
+            analyzer.api_url = server.url('ssq')
+            analyzer.fetch_lottery_data(rate_limit=0, checkpoint=checkpoint, resume=True)
+            # 规划请求（同时拿到第 1 页）+ 错位后不完整的第 3、4 页
+            assert server.stats[200] == 3
+
+        assert [rec['period'] for rec in analyzer.lottery_data] == [rec['period'] for rec in records]
+        assert not os.path.exists(checkpoint.path)
+
+
+def test_super_lotto_backfill_resumes_missing_pages():
+    """大乐透完整抓取同样按页写入断点并可继续"""
+    with open('data/super_lotto_data.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)[:70]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint = BackfillCheckpoint(os.path.join(tmp_dir, 'super_lotto_data.json'))
+
+        with MockLotteryServer(dlt_records=records) as server:
+            analyzer = SuperLottoAnalyzer()
+            analyzer.base_url = server.url('dlt')
+            analyzer.fetch_lottery_data_with_requests(max_pages=2, checkpoint=checkpoint, rate_limit=0)
+            assert sorted(checkpoint.read()[1]) == [1, 2]
+
+            server.stats.clear()
+            analyzer = SuperLottoAnalyzer()
+            analyzer.base_url = server.url('dlt')
+            assert analyzer.fetch_lottery_data_with_requests(checkpoint=checkpoint, resume=True, rate_limit=0)
+            assert server.stats[200] == 2  # 第 1 页（校验断点）+ 第 3 页
+
+        assert [rec['period'] for rec in analyzer.lottery_data] == [rec['period'] for rec in records]
+        assert not os.path.exists(checkpoint.path)
+
+
+def test_interrupted_backfill_not_saved_and_resumed():
+    """完整抓取中断时不写主数据和初始备份；之后 --resume 接着断点抓完并保存完整历史"""
+    with open('data/lottery_data.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)[:150]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'lottery_data.json')
+        backup_path = os.path.join(tmp_dir, 'backup', 'lottery_data_initial.json')
+        checkpoint = BackfillCheckpoint(data_path)
+
+        with MockLotteryServer(ssq_records=records, max_page_size=30) as server:
+            # 第一次只抓到前 1 页就中断
+            analyzer = DoubleColorBallAnalyzer()
+            analyzer.api_url = server.url('ssq')
+            analyzer.get_max_pages = lambda: 1
+            analyzer.init_and_update_history(data_path=data_path, backup_path=backup_path)
+            assert checkpoint.exists()
+            assert not os.path.exists(data_path) and not os.path.exists(backup_path)
+
+            analyzer = DoubleColorBallAnalyzer()
+            analyzer.api_url = server.url('ssq')
+            analyzer.init_and_update_history(data_path=data_path, backup_path=backup_path, resume=True)
+
+        assert not checkpoint.exists()
+        for path in (data_path, backup_path):
+            with open(path, 'r', encoding='utf-8') as f:
+                assert [rec['period'] for rec in json.load(f)] == [rec['period'] for rec in records]
+
+        # 旧版本曾把部分历史写成主数据：断点仍在时 --resume 同样接着完整抓取
+        with open(data_path, 'w', encoding='utf-8') as f:
+            json.dump(records[:30], f, ensure_ascii=False)
+        checkpoint.begin(30, records[:30], len(records))
+        with MockLotteryServer(ssq_records=records, max_page_size=30) as server:
+            analyzer = DoubleColorBallAnalyzer()
+            analyzer.api_url = server.url('ssq')
+            analyzer.init_and_update_history(data_path=data_path, backup_path=backup_path, resume=True)
+        assert not checkpoint.exists()
+        assert len(analyzer.draw_store) == len(records)
+
+
+if __name__ == "__main__":
+    test_rebase_shifts_pages_after_new_draws()
+    test_ssq_backfill_resumes_missing_pages()
+    test_super_lotto_backfill_resumes_missing_pages()
+    test_interrupted_backfill_not_saved_and_resumed()
+    print("🎉 完整抓取断点测试通过！")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+开奖日历测试脚本
+"""
+
+from datetime import date, datetime, timezone
+
+from scripts.draw_calendar import (
+    BEIJING_TZ, DLT_DRAW_WEEKDAYS, SSQ_DRAW_WEEKDAYS, draw_dates_since, draw_possible_since,
+    next_draw_datetime
+)
+
+
+def _beijing(*args):
+    return datetime(*args, tzinfo=BEIJING_TZ)
+
+
+def test_no_draw_between_draw_days():
+    """周日开奖后到周二开奖前，双色球不可能有新开奖"""
+    latest = '2025-06-01'  # 周日
+    assert not draw_possible_since(latest, SSQ_DRAW_WEEKDAYS, _beijing(2025, 6, 2, 23, 0))
+    assert not draw_possible_since(latest, SSQ_DRAW_WEEKDAYS, _beijing(2025, 6, 3, 20, 0))
+    assert draw_dates_since(latest, SSQ_DRAW_WEEKDAYS, _beijing(2025, 6, 3, 23, 0)) == [date(2025, 6, 3)]
+
+
+def test_utc_clock_is_converted_to_beijing_time():
+    """UTC 15:00 即北京时间 23:00，已过当天开奖时间"""
+    now = datetime(2025, 6, 5, 15, 0, tzinfo=timezone.utc)  # 周四
+    assert draw_dates_since('2025-06-03', SSQ_DRAW_WEEKDAYS, now) == [date(2025, 6, 5)]
+    assert draw_dates_since('2025-06-03', DLT_DRAW_WEEKDAYS, now) == [date(2025, 6, 4)]
+
+
+def test_next_draw_datetime():
+    """开奖当天开奖前取当天，开奖后取下一个开奖日"""
+    assert next_draw_datetime(SSQ_DRAW_WEEKDAYS, _beijing(2025, 6, 3, 20, 0)) == _beijing(2025, 6, 3, 21, 15)
+    assert next_draw_datetime(SSQ_DRAW_WEEKDAYS, _beijing(2025, 6, 3, 21, 15)) == _beijing(2025, 6, 5, 21, 15)
+
+
+if __name__ == "__main__":
+    test_no_draw_between_draw_days()
+    test_utc_clock_is_converted_to_beijing_time()
+    test_next_draw_datetime()
+    print("🎉 开奖日历测试通过！")
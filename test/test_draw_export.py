@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+开奖数据流式导出测试脚本
+"""
+
+import csv
+import io
+import json
+import subprocess
+import sys
+
+from scripts.draw_export import iter_csv, iter_ndjson, iter_stats
+from scripts.draw_stats import compute_stats
+from scripts.draw_store import DrawStore, DLT_GAME
+
+
+def _store():
+    with open('test/test_super_lotto_data.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    return records, DrawStore.from_records(records, DLT_GAME)
+
+
+def test_ndjson_and_csv_match_records():
+    """分块导出的 NDJSON 与原始记录一致，CSV 把号码列表展开为多列"""
+    records, store = _store()
+
+    chunks = list(iter_ndjson(store, chunk_rows=7))
+    assert len(chunks) > 1
+    assert [json.loads(line) for line in ''.join(chunks).splitlines()] == records
+
+    rows = list(csv.DictReader(io.StringIO(''.join(iter_csv(store, ['period', 'back_balls'], chunk_rows=7)))))
+    assert len(rows) == len(records)
+    assert rows[0] == {
+        'period': records[0]['period'],
+        'back_balls_1': str(records[0]['back_balls'][0]),
+        'back_balls_2': str(records[0]['back_balls'][1]),
+    }
+
+
+def test_stats_export_totals():
+    """统计导出包含总期数，号码出现次数之和等于期数乘以每期号码个数"""
+    _, store = _store()
+    lines = [json.loads(line) for line in iter_stats(compute_stats(store), 'ndjson')]
+
+    assert lines[0] == {'metric': 'total', 'value': '', 'count': len(store)}
+    assert sum(x['count'] for x in lines if x['metric'] == 'front_balls') == len(store) * 5
+    assert sum(x['count'] for x in lines if x['metric'] == 'odd_even') == len(store)
+
+
+def test_cli_stdout_contains_only_data():
+    """命令行导出到标准输出时只有数据行，导入与加载日志都在标准错误"""
+    result = subprocess.run(
+        [sys.executable, 'scripts/draw_export.py', '--game', 'dlt', '--format', 'ndjson', '--fields', 'period'],
+        capture_output=True, text=True, check=True)
+    lines = result.stdout.splitlines()
+    assert lines
+    assert all(set(json.loads(line)) == {'period'} for line in lines)
+
+
+if __name__ == "__main__":
+    test_ndjson_and_csv_match_records()
+    test_stats_export_totals()
+    test_cli_stdout_contains_only_data()
+    print("🎉 流式导出测试通过！")
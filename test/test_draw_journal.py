@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+追加日志测试脚本
+"""
+
+import json
+import os
+import tempfile
+
+from scripts.draw_journal import DrawJournal
+from scripts.lottery_analyzer import DoubleColorBallAnalyzer
+
+
+def _next_record(record, step=1):
+    """构造一条期号更新的模拟记录"""
+    return dict(record, period=str(int(record['period']) + step))
+
+
+def test_journal_skips_torn_line():
+    """写入中断留下的残行被忽略，且不影响之后追加的记录"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal = DrawJournal(os.path.join(tmp_dir, 'lottery_data.json'))
+        journal.append([{'period': '2025001', 'blue_ball': 1}])
+        with open(journal.path, 'a', encoding='utf-8') as f:
+            f.write('{"period": "2025002", "blu')
+        journal.append([{'period': '2025003', 'blue_ball': 3}])
+
+        assert [rec['period'] for rec in journal.read()] == ['2025001', '2025003']
+
+
+def test_analyzer_appends_then_compacts():
+    """增量数据只写追加日志，加载时合并，保存完整数据后日志被压缩清空"""
+    with open('data/lottery_data.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)[:30]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'lottery_data.json')
+        analyzer = DoubleColorBallAnalyzer()
+        analyzer.lottery_data = records
+        analyzer.save_data(data_path)
+        base_size = os.path.getsize(data_path)
+
+        new_records = [_next_record(records[0], 2), _next_record(records[0], 1)]
+        analyzer.append_data(new_records, data_path)
+        assert os.path.getsize(data_path) == base_size
+
+        reloaded = DoubleColorBallAnalyzer()
+        assert reloaded.load_data(data_path)
+        assert len(reloaded.lottery_data) == len(records) + 2
+        assert reloaded.lottery_data[0]['period'] == new_records[0]['period']
+
+        reloaded.save_data(data_path)
+        assert not os.path.exists(DrawJournal(data_path).path)
+        with open(data_path, 'r', encoding='utf-8') as f:
+            assert len(json.load(f)) == len(records) + 2
+
+
+if __name__ == "__main__":
+    test_journal_skips_torn_line()
+    test_analyzer_appends_then_compacts()
+    print("🎉 追加日志测试通过！")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式存储测试脚本
+"""
+
+import json
+import os
+import tempfile
+from collections import Counter
+
+from scripts.draw_journal import merge_records
+from scripts.draw_store import DrawStore, SSQ_GAME, DLT_GAME, content_checksum
+from scripts.draw_stats import RunningStats, compute_stats
+from scripts.lottery_analyzer import DoubleColorBallAnalyzer
+
+
+def _load(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_ssq_store_matches_records():
+    """双色球列式存储与逐条统计结果一致"""
+    records = _load('data/lottery_data.json')
+    store = DrawStore.from_records(records, SSQ_GAME)
+
+    assert len(store) == len(records)
+    assert store.main.shape == (len(records), 6)
+    assert store.latest_period == records[0]['period']
+    assert store.index_of(records[5]['period']) == 5
+
+    red_counter = Counter()
+    blue_counter = Counter()
+    for record in records:
+        for red in record['red_balls']:
+            red_counter[red] += 1
+        blue_counter[record['blue_ball']] += 1
+
+    # 不仅计数相同，键的顺序（并列排序时的先后）也必须相同
+    stats = compute_stats(store)
+    assert list(stats.main_counter().items()) == list(red_counter.items())
+    assert list(stats.extra_counter().items()) == list(blue_counter.items())
+
+
+def test_dlt_patterns_match_records():
+    """大乐透奇偶、和值、跨度、分区分布与逐条统计结果一致"""
+    records = _load('test/test_super_lotto_data.json')
+    stats = compute_stats(DrawStore.from_records(records, DLT_GAME))
+
+    odd_even, sums, spans, zones = {}, {}, {}, {}
+    for record in records:
+        balls = record['front_balls']
+        odd = sum(1 for ball in balls if ball % 2 == 1)
+        key = f"{odd}奇{5 - odd}偶"
+        odd_even[key] = odd_even.get(key, 0) + 1
+        total = sum(balls)
+        key = f"{total // 10 * 10}-{total // 10 * 10 + 9}"
+        sums[key] = sums.get(key, 0) + 1
+        span = max(balls) - min(balls)
+        key = f"{span // 5 * 5}-{span // 5 * 5 + 4}"
+        spans[key] = spans.get(key, 0) + 1
+        key = "-".join(str(sum(1 for ball in balls if (ball - 1) // 5 == z)) for z in range(7))
+        zones[key] = zones.get(key, 0) + 1
+
+    assert stats.total == len(records)
+    assert list(stats.odd_even_dist().items()) == list(odd_even.items())
+    assert list(stats.sum_dist().items()) == list(sums.items())
+    assert list(stats.span_dist().items()) == list(spans.items())
+    assert list(stats.zone_dist().items()) == list(zones.items())
+
+
+def test_dlt_store_round_trip():
+    """大乐透列式存储可以还原出与原始记录一致的字典视图"""
+    records = _load('test/test_super_lotto_data.json')
+    store = DrawStore.from_records(records, DLT_GAME)
+    rebuilt = DrawStore(store.game, store.periods, store.dates, store.main, store.extra, store.columns)
+
+    assert rebuilt.to_records() == records
+    assert store.head(10).to_records() == records[:10]
+
+
+def test_binary_sidecar_round_trip():
+    """二进制快照内存映射后与原始记录一致，校验和不匹配时拒绝加载"""
+    records = _load('test/test_super_lotto_data.json')
+    # 大乐透奖池在 JSON 中是 '1,415,654,588.90' 形式的字符串，快照需原样还原
+    records = [dict(rec, pool_amount=f"{rec['pool_amount']:,}.90") for rec in records]
+    records[0]['pool_amount'] = '1,415,654,588.90'
+    store = DrawStore.from_records(records, DLT_GAME)
+    checksum = content_checksum(json.dumps(records).encode('utf-8'))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'super_lotto_data.bin')
+        assert store.save_binary(path, checksum)
+
+        loaded = DrawStore.load_binary(path, DLT_GAME, checksum)
+        assert loaded is not None
+        assert loaded.to_records() == records
+        assert loaded.columns['pool_amount'][0] == 1415654588
+        assert loaded.latest_period == records[0]['period']
+
+        assert DrawStore.load_binary(path, DLT_GAME, 'stale') is None
+        assert DrawStore.load_binary(path, SSQ_GAME, checksum) is None
+        del loaded
+
+
+def test_prepend_matches_full_merge():
+    """新开奖拼接到最前面、重叠期号原位替换，结果与整体排序合并一致"""
+    records = _load('data/lottery_data.json')
+    base, newer = records[3:], records[:3]
+    store = DrawStore.from_records(base, SSQ_GAME)
+    store.to_records()
+
+    corrected = dict(base[0], sales_amount=base[0]['sales_amount'] + 1)
+    updates = [newer[1], corrected, newer[2], newer[0]]
+    merged = store.prepend(updates)
+
+    expected = merge_records(base, updates)
+    assert merged.to_records() == expected
+    assert [merged._build_record(i) for i in range(len(merged))] == expected
+    assert merged.index_of(newer[0]['period']) == 0
+    assert merged.index_of(base[-1]['period']) == len(expected) - 1
+    # 原存储保持不变
+    assert len(store) == len(base) and store.index_of(newer[0]['period']) is None
+
+    # 补历史缺口时交给调用方整体重建
+    gap = dict(base[10], period=str(int(base[10]['period']) - 100000))
+    assert store.prepend([gap]) is None
+
+
+def test_running_stats_match_full_recompute():
+    """逐期增量更新的统计（含最近10期窗口）与完整重算结果一致"""
+    records = _load('test/test_super_lotto_data.json')
+    store = DrawStore.from_records(records, DLT_GAME)
+    older = DrawStore.from_records(records[12:], DLT_GAME)
+
+    running = RunningStats.from_store(older)
+    recent = RunningStats.from_store(older, window=10)
+    for i in range(11, -1, -1):
+        running.add_draw(store.periods[i], store.main[i], store.extra[i])
+        recent.add_draw(store.periods[i], store.main[i], store.extra[i])
+
+    assert running.matches(store) and recent.matches(store)
+    assert running.to_stats() == compute_stats(store)
+    assert recent.to_stats() == compute_stats(store.head(10))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'super_lotto_data.stats.json')
+        running.save(path, 'checksum')
+        loaded = RunningStats.load(path, DLT_GAME)
+        assert loaded.to_stats() == running.to_stats()
+        assert loaded.matches(store, 'checksum') and not loaded.matches(store, 'other')
+        assert RunningStats.load(path, SSQ_GAME) is None
+
+
+def test_column_projection_matches_records():
+    """按列切片取值与字典视图一致（含以字符串保存的奖池字段）"""
+    records = _load('test/test_super_lotto_data.json')
+    store = DrawStore.from_records(records, DLT_GAME)
+    assert store.field_names() == list(records[0])
+
+    rows = store.select_rows(period_from=records[20]['period'], date_to=records[5]['date'])
+    assert rows.tolist() == list(range(5, 21))
+    for name in store.field_names():
+        assert store.column(name, rows) == [records[i][name] for i in rows]
+
+
+def test_snapshot_load_does_not_build_records():
+    """从二进制快照加载时不构建 list-of-dicts 视图"""
+    records = _load('data/lottery_data.json')[:50]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'lottery_data.json')
+        with open(data_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False)
+        assert DoubleColorBallAnalyzer().load_data(data_path)  # 首次加载写出快照
+
+        to_records = DrawStore.to_records
+        DrawStore.to_records = lambda self: (_ for _ in ()).throw(AssertionError("不应构建记录列表"))
+        try:
+            analyzer = DoubleColorBallAnalyzer()
+            assert analyzer.load_data(data_path)
+        finally:
+            DrawStore.to_records = to_records
+        assert len(analyzer.draw_store) == len(records)
+        del analyzer
+
+
+def test_saved_stats_checked_against_data_checksum():
+    """保存的统计结果只在数据文件校验和一致时沿用：历史记录被改动但期数和最新期号不变时重新统计"""
+    records = _load('data/lottery_data.json')[:50]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'lottery_data.json')
+        analyzer = DoubleColorBallAnalyzer()
+        analyzer.lottery_data = records[1:]
+        analyzer.save_data(data_path)
+        analyzer.merge_draws(records[:1])
+        analyzer.append_data(records[:1], data_path)  # 只追加日志时同样保存统计
+
+        analyzer = DoubleColorBallAnalyzer()
+        assert analyzer.load_data(data_path)
+        assert analyzer._running_stats is not None  # 数据未变，直接沿用保存的统计
+
+        # 改动一期历史开奖的蓝球，期数和最新期号都不变
+        edited = [dict(rec) for rec in records[1:]]
+        edited[10]['blue_ball'] = edited[10]['blue_ball'] % 16 + 1
+        with open(data_path, 'w', encoding='utf-8') as f:
+            json.dump(edited, f, ensure_ascii=False)
+
+        analyzer = DoubleColorBallAnalyzer()
+        assert analyzer.load_data(data_path)
+        assert analyzer._running_stats is None
+        assert analyzer.stats == compute_stats(analyzer.draw_store)
+        del analyzer
+
+
+if __name__ == "__main__":
+    test_ssq_store_matches_records()
+    test_dlt_patterns_match_records()
+    test_dlt_store_round_trip()
+    test_binary_sidecar_round_trip()
+    test_prepend_matches_full_merge()
+    test_running_stats_match_full_recompute()
+    test_column_projection_matches_records()
+    test_snapshot_load_does_not_build_records()
+    test_saved_stats_checked_against_data_checksum()
+    print("🎉 列式存储测试通过！")
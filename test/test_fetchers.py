@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分页抓取器测试脚本（使用本地适配器模拟官方接口，不访问网络）
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from scripts.fetchers import (FAILED, OK, THROTTLED, AdaptiveRateLimiter, AsyncPageFetcher, CircuitBreaker,
+                              CircuitOpenError, DLT_API, PageFetcher, host_breaker, host_limiter, plan_fetch,
+                              reset_host_controls)
+from scripts.mock_lottery_server import MockLotteryServer
+from scripts.lottery_analyzer import DoubleColorBallAnalyzer
+from scripts import browser_session
+from scripts.browser_session import BrowserSession
+from scripts.super_lotto_analyzer import SuperLottoAnalyzer
+
+
+class FakeDrawAdapter(requests.adapters.BaseAdapter):
+    """按 pageNo/pageSize 从给定记录中切片返回，模拟官方分页接口（pageSize 超过上限时被截断）"""
+
+    def __init__(self, items, max_page_size=None):
+        super().__init__()
+        self.items = items
+        self.max_page_size = max_page_size
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.calls += 1
+        query = parse_qs(urlparse(request.url).query)
+        page = int(query['pageNo'][0])
+        size = int(query['pageSize'][0])
+        if self.max_page_size:
+            size = min(size, self.max_page_size)
+        body = {
+            'state': 0,
+            'message': '查询成功',
+            'total': len(self.items),
+            'result': self.items[(page - 1) * size:page * size],
+        }
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode('utf-8')
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def _api_items(records):
+    """把本地记录还原成官方接口的返回格式"""
+    return [{
+        'code': rec['period'],
+        'date': rec['date'] + '(二)',
+        'red': ','.join(f"{x:02d}" for x in rec['red_balls']),
+        'blue': f"{rec['blue_ball']:02d}",
+        'sales': str(rec['sales_amount']),
+        'poolmoney': str(rec['pool_amount']),
+        'prizegrades': [
+            {'type': 1, 'typenum': str(rec['first_prize_count']), 'typemoney': str(rec['first_prize_amount'])},
+            {'type': 2, 'typenum': str(rec['second_prize_count']), 'typemoney': str(rec['second_prize_amount'])},
+        ],
+    } for rec in records]
+
+
+def test_concurrent_fetch_is_ordered_and_deduplicated():
+    """并发抓取的结果按期号从新到旧排列且无重复，并复用同一个连接池适配器"""
+    with open('data/lottery_data.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)[:95]
+
+    analyzer = DoubleColorBallAnalyzer()
+    adapter = FakeDrawAdapter(_api_items(records), max_page_size=30)
+    analyzer.session.mount('https://', adapter)
+
+    # 已有的前几期与抓取结果重叠，合并后不应出现重复期号
+    analyzer.lottery_data = records[:3]
+    analyzer.fetch_lottery_data(max_workers=4, rate_limit=0)
+
+    assert analyzer.lottery_data == records
+    # 规划请求（pageSize 被截断为 30，同时拿到第一页）+ 其余 3 页
+    assert analyzer.get_fetch_plan().page_count == 4
+    assert adapter.calls == 4
+
+
+def test_plan_uses_largest_accepted_page_size():
+    """接口接受大 pageSize 时一次请求即可拿到全部历史"""
+    session = requests.Session()
+    adapter = FakeDrawAdapter([{'code': str(i)} for i in range(95)])
+    session.mount('https://', adapter)
+    plan = plan_fetch(
+        PageFetcher(session, rate_limit=0),
+        'https://example.invalid/api',
+        lambda page, page_size: {'pageNo': page, 'pageSize': page_size},
+    )
+
+    assert (plan.page_size, plan.total, plan.page_count) == (100, 95, 1)
+    assert len(plan.first_page) == 95
+    assert adapter.calls == 1
+
+
+def test_page_fetcher_reports_failed_pages():
+    """失败的页不出现在结果中，其余页正常返回"""
+
+    class FlakyAdapter(FakeDrawAdapter):
+        def send(self, request, **kwargs):
+            if 'pageNo=2' in request.url:
+                raise requests.exceptions.ConnectionError('boom')
+            return super().send(request, **kwargs)
+
+    session = requests.Session()
+    session.mount('https://', FlakyAdapter([{'code': str(i)} for i in range(10)]))
+    fetcher = PageFetcher(session, max_workers=2, rate_limit=0, max_retries=2)
+    pages = fetcher.fetch_pages(
+        'https://example.invalid/api',
+        lambda page: {'pageNo': page, 'pageSize': 4},
+        [1, 2, 3],
+    )
+
+    assert sorted(pages) == [1, 3]
+    assert [item['code'] for item in pages[3]] == ['8', '9']
+
+
+def test_sync_stops_after_latest_period_check():
+    """官方最新期号未变化时，只发起一次轻量请求，不翻页也不写文件"""
+    with open('data/lottery_data.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)[:40]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'lottery_data.json')
+        with open(data_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+
+        analyzer = DoubleColorBallAnalyzer()
+        adapter = FakeDrawAdapter(_api_items(records))
+        analyzer.session.mount('https://', adapter)
+        analyzer.init_and_update_history(data_path=data_path, backup_path=os.path.join(tmp_dir, 'backup.json'))
+
+        assert adapter.calls == 1
+        assert len(analyzer.lottery_data) == len(records)
+        assert not os.path.exists(os.path.join(tmp_dir, 'lottery_data.journal.jsonl'))
+
+
+class FakeSuperLottoAdapter(requests.adapters.BaseAdapter):
+    """按 pageNo 从给定记录中切片返回（每页 30 条），模拟大乐透官方分页接口"""
+
+    def __init__(self, records):
+        super().__init__()
+        self.records = records
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        page = int(parse_qs(urlparse(request.url).query)['pageNo'][0])
+        body = {
+            'isSuccess': True,
+            'errorMessage': '处理成功',
+            'value': {
+                'pages': (len(self.records) + 29) // 30,
+                'total': len(self.records),
+                'list': [{
+                    'lotteryDrawNum': rec['period'],
+                    'lotteryDrawTime': rec['date'],
+                    'lotteryDrawResult': ' '.join(f"{x:02d}" for x in rec['front_balls'] + rec['back_balls']),
+                    'prizeLevelList': [],
+                    'drawMoney': rec['sales_amount'],
+                    'poolBalanceAfterdraw': rec['pool_amount'],
+                } for rec in self.records[(page - 1) * 30:page * 30]],
+            },
+        }
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode('utf-8')
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def test_super_lotto_incremental_stops_at_known_period():
+    """大乐透增量同步：第 1 页遇到已有期号即停止翻页，只把新期号追加到日志"""
+    with open('data/super_lotto_data.json', 'r', encoding='utf-8') as f:
+        records = [dict(rec, first_prize_count=0, first_prize_amount=0,
+                        second_prize_count=0, second_prize_amount=0)
+                   for rec in json.load(f)[:40]]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'super_lotto_data.json')
+        with open(data_path, 'w', encoding='utf-8') as f:
+            json.dump(records[5:], f, ensure_ascii=False, indent=2)
+
+        analyzer = SuperLottoAnalyzer()
+        analyzer.use_drissionpage = False
+        adapter = FakeSuperLottoAdapter(records)
+        analyzer.session.mount('https://', adapter)
+        analyzer.init_and_update_history(data_path=data_path, backup_path=os.path.join(tmp_dir, 'backup.json'))
+
+        assert adapter.calls == 1
+        assert analyzer.lottery_data == records
+        with open(os.path.join(tmp_dir, 'super_lotto_data.journal.jsonl'), encoding='utf-8') as f:
+            assert len(f.readlines()) == 5
+
+
+class FakeTab:
+    """模拟 DrissionPage 标签页：run_js 按 URL 返回 FakeSuperLottoAdapter 的响应，指定的 URL 首次请求失败"""
+
+    class _Wait:
+        def doc_loaded(self, timeout=None):
+            return True
+
+    def __init__(self, records, flaky_urls=()):
+        self.adapter = FakeSuperLottoAdapter(records)
+        self.flaky_urls = set(flaky_urls)
+        self.batches = []
+        self.warm_count = 0
+        self.wait = self._Wait()
+
+    def get(self, url, **kwargs):
+        self.warm_count += 1
+
+    def run_js(self, script, urls, timeout_ms, timeout=None):
+        self.batches.append(list(urls))
+        results = []
+        for url in urls:
+            if url in self.flaky_urls:
+                self.flaky_urls.discard(url)
+                results.append({'__status': 567})
+            else:
+                results.append(self.adapter.send(requests.Request('GET', url).prepare()).json())
+        return results
+
+
+def test_browser_session_batches_and_retries():
+    """浏览器会话按并发上限分批请求，失败的 URL 重新预热后重试，结果保持输入顺序"""
+    urls = [f"https://example.invalid/api?pageNo={page}" for page in range(1, 6)]
+    session = BrowserSession(urls[0], max_concurrency=2)
+    session.tab = FakeTab([{'period': str(i), 'date': '2025-01-01', 'front_balls': [1, 2, 3, 4, 5],
+                            'back_balls': [1, 2], 'sales_amount': 0, 'pool_amount': 0} for i in range(150)],
+                          flaky_urls=[urls[3]])
+
+    sleep = browser_session.time.sleep
+    browser_session.time.sleep = lambda seconds: None
+    try:
+        results = session.fetch_json(urls)
+    finally:
+        browser_session.time.sleep = sleep
+
+    assert [len(r['value']['list']) for r in results] == [30] * 5
+    assert [r['value']['list'][0]['lotteryDrawNum'] for r in results] == ['0', '30', '60', '90', '120']
+    assert session.tab.batches == [urls[0:2], urls[2:4], urls[4:5], [urls[3]]]
+    assert session.tab.warm_count == 1
+
+
+def test_browser_session_shares_host_breaker():
+    """浏览器会话与 requests 抓取器共用主机熔断器：熔断后不再发出页面内请求"""
+    url = "https://example.invalid/api?pageNo=1"
+    breaker = host_breaker('example.invalid')
+    breaker.max_trips = 1
+    for _ in range(breaker.failure_threshold):
+        breaker.record(FAILED)
+
+    session = BrowserSession(url, max_retries=1)
+    session.tab = FakeTab([])
+    try:
+        assert session.fetch_json([url]) == [None]
+        assert session.tab.batches == []
+    finally:
+        reset_host_controls()
+
+
+def test_super_lotto_browser_fetch_reuses_session():
+    """DrissionPage 模式：全量抓取先取第 1 页确定页数，其余页并发；同一会话用于后续增量同步"""
+    with open('data/super_lotto_data.json', 'r', encoding='utf-8') as f:
+        records = [dict(rec, first_prize_count=0, first_prize_amount=0,
+                        second_prize_count=0, second_prize_amount=0)
+                   for rec in json.load(f)[:100]]
+
+    analyzer = SuperLottoAnalyzer()
+    analyzer.browser = BrowserSession(analyzer._page_url(1), max_concurrency=4)
+    analyzer.browser.tab = FakeTab(records[3:])
+    assert analyzer.fetch_lottery_data_with_drissionpage() is True
+    assert analyzer.lottery_data == records[3:]
+    assert [len(batch) for batch in analyzer.browser.tab.batches] == [1, 3]
+
+    analyzer.browser.tab = FakeTab(records)
+    assert analyzer.fetch_lottery_data_with_drissionpage(stop_at_known=True) == records[:3]
+    assert [len(batch) for batch in analyzer.browser.tab.batches] == [1]
+
+
+def test_super_lotto_incremental_sync_with_drissionpage():
+    """DrissionPage 为默认方式时，增量同步拿到的是新记录列表并合并进已有数据"""
+    with open('data/super_lotto_data.json', 'r', encoding='utf-8') as f:
+        records = [dict(rec, first_prize_count=0, first_prize_amount=0,
+                        second_prize_count=0, second_prize_amount=0)
+                   for rec in json.load(f)[:100]]
+
+    analyzer = SuperLottoAnalyzer()
+    analyzer.use_drissionpage = True
+    analyzer.lottery_data = records[3:]
+    analyzer.browser = BrowserSession(analyzer._page_url(1), max_concurrency=4)
+    analyzer.browser.tab = FakeTab(records)
+
+    assert analyzer.fetch_lottery_data_incremental() == 3
+    assert analyzer.lottery_data == records
+
+
+def test_mock_server_with_both_backends():
+    """本地模拟接口注入 567 时，两种抓取后端都能重试拿全数据；大乐透走统一的抓取后端"""
+    with open('data/lottery_data.json', 'r', encoding='utf-8') as f:
+        ssq_records = json.load(f)[:95]
+    with open('data/super_lotto_data.json', 'r', encoding='utf-8') as f:
+        dlt_records = json.load(f)[:70]
+
+    with MockLotteryServer(ssq_records, dlt_records, rate_567=0.2, seed=3) as server:
+        for backend in ('sync', 'async'):
+            analyzer = DoubleColorBallAnalyzer()
+            analyzer.api_url = server.url('ssq')
+            analyzer.fetcher_backend = backend
+            analyzer.fetch_lottery_data(max_workers=4, rate_limit=0)
+            assert [rec['period'] for rec in analyzer.lottery_data] == [rec['period'] for rec in ssq_records]
+            assert [rec['red_balls'] for rec in analyzer.lottery_data] == [rec['red_balls'] for rec in ssq_records]
+
+        server.rate_567 = 0
+        server.stats.clear()
+        analyzer = SuperLottoAnalyzer()
+        analyzer.base_url = server.url('dlt')
+        analyzer.fetcher_backend = 'async'
+        assert analyzer.fetch_lottery_data_with_requests(max_workers=4, rate_limit=0) is True
+        assert [rec['period'] for rec in analyzer.lottery_data] == [rec['period'] for rec in dlt_records]
+        assert [rec['back_balls'] for rec in analyzer.lottery_data] == [rec['back_balls'] for rec in dlt_records]
+        assert server.stats[200] == 1 + 2  # 第 1 页确定页数，其余 2 页并发
+
+
+def test_rate_limiter_aimd():
+    """成功时加性提速，限流时减半；降速前发出的请求返回的限流信号不重复降速"""
+    limiter = AdaptiveRateLimiter(4, min_rate=1, max_rate=6, increase=2)
+    limiter.record(OK, 0.1, time.monotonic())
+    assert limiter.rate == 4.5
+
+    before = time.monotonic()
+    limiter.record(THROTTLED, 0.1, time.monotonic())
+    assert limiter.rate == 2.25
+    limiter.record(THROTTLED, 0.1, before)
+    assert limiter.rate == 2.25
+    # 响应过慢同样降速，且不低于 min_rate
+    limiter.record(OK, 30.0, time.monotonic())
+    limiter.record(THROTTLED, 0.1, time.monotonic())
+    assert limiter.rate == 1
+
+    for _ in range(100):
+        limiter.record(OK, 0.1, time.monotonic())
+    assert limiter.rate == 6
+
+    # 令牌用完后按当前速率预约等待时间
+    first = limiter.reserve()
+    assert abs(limiter.reserve() - first - 1 / 6) < 0.01
+    assert AdaptiveRateLimiter(0).reserve() == 0
+
+
+def test_circuit_breaker_opens_and_probes():
+    """连续失败后熔断，到期只放行一个探测请求，探测失败则加倍等待，多次熔断后直接拒绝"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05, max_trips=2)
+    breaker.record(FAILED)
+    assert breaker.acquire() == 0
+    breaker.record(THROTTLED)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.acquire() > 0
+
+    time.sleep(0.06)
+    assert breaker.acquire() == 0  # 探测请求
+    assert breaker.acquire() > 0   # 其余请求等待探测结果
+    breaker.record(FAILED)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 2
+    try:
+        breaker.acquire()
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("连续熔断后应直接拒绝请求")
+
+    time.sleep(0.11)
+    assert breaker.acquire() == 0
+    breaker.record(OK)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.trips == 0
+
+
+def _half_open_breaker(host):
+    """把 host 的共享熔断器置于刚放行探测请求的半开状态"""
+    breaker = host_breaker(host)
+    breaker.reset_timeout = breaker._timeout = 0.05
+    for _ in range(breaker.failure_threshold):
+        breaker.record(FAILED)
+    time.sleep(0.06)
+    return breaker
+
+
+def test_circuit_breaker_probe_times_out():
+    """探测请求的结果迟迟没有反馈时，等待同样长的时间后放行新的探测请求"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record(FAILED)
+    time.sleep(0.06)
+    assert breaker.acquire() == 0  # 探测请求（结果丢失）
+    assert 0 < breaker.acquire() <= 0.05
+    time.sleep(0.06)
+    assert breaker.acquire() == 0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_failed_probe_reopens_breaker():
+    """探测请求抛出异常、返回格式不对或被取消时都按失败反馈，熔断器重新打开而不是停在半开"""
+    url = "https://example.invalid/api?pageNo=1"
+
+    class RaisingTab(FakeTab):
+        def run_js(self, script, urls, timeout_ms, timeout=None):
+            raise RuntimeError("页面已崩溃")
+
+    class MalformedTab(FakeTab):
+        def run_js(self, script, urls, timeout_ms, timeout=None):
+            return None
+
+    for tab in (RaisingTab([]), MalformedTab([])):
+        breaker = _half_open_breaker('example.invalid')
+        session = BrowserSession(url, max_retries=1)
+        session.tab = tab
+        assert session.fetch_json([url]) == [None]
+        assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 2
+        reset_host_controls()
+
+    # requests 抓取器：非网络类异常
+    breaker = _half_open_breaker('example.invalid')
+    fetcher = PageFetcher(requests.Session(), rate_limit=0)
+    fetcher._request = lambda *args: (_ for _ in ()).throw(RuntimeError("解析器崩溃"))
+    try:
+        fetcher.fetch_json(url, {})
+    except RuntimeError:
+        pass
+    assert breaker.state == CircuitBreaker.OPEN
+    reset_host_controls()
+
+    # 协程后端：探测请求在途时被取消
+    breaker = _half_open_breaker('example.invalid')
+    fetcher = AsyncPageFetcher(requests.Session(), rate_limit=0)
+    fetcher._request = lambda *args: time.sleep(0.3)
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(fetcher.fetch_json_async(url, {}))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(cancel_probe())
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_mock_server_rate_limit_adapts():
+    """模拟接口按每秒请求数限流时，抓取器自动降速并拿到全部数据"""
+    with open('data/super_lotto_data.json', 'r', encoding='utf-8') as f:
+        dlt_records = json.load(f)[:120]
+
+    with MockLotteryServer(dlt_records=dlt_records, max_rps=6) as server:
+        fetcher = PageFetcher(requests.Session(), api=DLT_API, max_workers=4, rate_limit=20, max_retries=5)
+        pages = fetcher.fetch_pages(server.url('dlt'), lambda page: {'pageNo': page, 'pageSize': 10}, range(1, 13))
+        limiter = host_limiter(urlparse(server.url('dlt')).netloc, 20)
+
+    assert sorted(pages) == list(range(1, 13))
+    assert server.stats[567] > 0
+    assert limiter.rate < 20
+
+
+if __name__ == "__main__":
+    test_concurrent_fetch_is_ordered_and_deduplicated()
+    test_plan_uses_largest_accepted_page_size()
+    test_page_fetcher_reports_failed_pages()
+    test_sync_stops_after_latest_period_check()
+    test_super_lotto_incremental_stops_at_known_period()
+    test_browser_session_batches_and_retries()
+    test_browser_session_shares_host_breaker()
+    test_super_lotto_browser_fetch_reuses_session()
+    test_super_lotto_incremental_sync_with_drissionpage()
+    test_mock_server_with_both_backends()
+    test_rate_limiter_aimd()
+    test_circuit_breaker_opens_and_probes()
+    test_circuit_breaker_probe_times_out()
+    test_failed_probe_reopens_breaker()
+    test_mock_server_rate_limit_adapts()
+    print("🎉 分页抓取器测试通过！")
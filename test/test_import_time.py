@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时测试脚本：冷启动导入 web_app / main 不加载绘图、抓取、pandas 等重依赖
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 冷启动 import web_app 的耗时上限（秒），较慢的 CI 机器可通过环境变量放宽
+IMPORT_BUDGET_SECONDS = float(os.environ.get('SSQ_IMPORT_BUDGET_SECONDS', 1.0))
+
+# 只有绘图、抓取、DataFrame 导出时才需要的依赖
+HEAVY_MODULES = ('matplotlib', 'pandas', 'seaborn', 'bs4', 'requests', 'DrissionPage')
+
+
+def _cold_import(module):
+    """在全新的解释器中导入 module，返回 (耗时秒数, 已加载的重依赖列表)"""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    elapsed, loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def test_web_app_import_is_light():
+    """Web 端只做分析与推荐，导入时不加载重依赖，且耗时在预算之内"""
+    elapsed, loaded = _cold_import('web_app')
+    assert loaded == []
+    assert elapsed < IMPORT_BUDGET_SECONDS, f"import web_app 耗时 {elapsed:.2f}s，超过预算 {IMPORT_BUDGET_SECONDS}s"
+
+
+def test_cli_import_is_light():
+    """命令行入口导入时同样不加载重依赖（抓取、绘图时才导入）"""
+    _, loaded = _cold_import('main')
+    assert loaded == []
+
+
+if __name__ == "__main__":
+    test_web_app_import_is_light()
+    test_cli_import_is_light()
+    print("🎉 启动耗时测试通过！")
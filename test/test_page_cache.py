@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web 页面渲染缓存测试脚本
+"""
+
+import gzip
+
+from scripts.page_cache import PageCache, choose_encoding, rendered_page
+
+
+def test_page_rendered_once_per_version():
+    """同一数据集版本只渲染一次；版本变化后重新渲染，ETag 随内容变化"""
+    cache = PageCache()
+    renders = []
+
+    def render(html):
+        def _render():
+            renders.append(html)
+            return rendered_page(html)
+        return _render
+
+    first = cache.get_or_render(('ssq', 100, '2025001'), 'index', render('<p>一</p>'))
+    again = cache.get_or_render(('ssq', 100, '2025001'), 'index', render('<p>一</p>'))
+    assert again is first
+    assert renders == ['<p>一</p>']
+    assert first.body == '<p>一</p>'.encode('utf-8')
+    assert first.etag == rendered_page('<p>一</p>').etag
+
+    newer = cache.get_or_render(('ssq', 101, '2025002'), 'index', render('<p>二</p>'))
+    assert renders == ['<p>一</p>', '<p>二</p>']
+    assert newer.etag != first.etag
+
+
+def test_precompressed_encoding_has_own_etag():
+    """按 Accept-Encoding 返回预压缩版本，压缩表示使用单独的强 ETag"""
+    page = rendered_page('<p>历史开奖</p>' * 100)
+
+    encoding, body, etag = choose_encoding(page, {'gzip', 'deflate'})
+    assert encoding == 'gzip'
+    assert gzip.decompress(body) == page.body
+    assert etag == f"{page.etag}-gzip"
+
+    assert choose_encoding(page, set()) == (None, page.body, page.etag)
+
+
+if __name__ == "__main__":
+    test_page_rendered_once_per_version()
+    test_precompressed_encoding_has_own_etag()
+    print("🎉 页面缓存测试通过！")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+频率图表渲染测试脚本
+"""
+
+import os
+import tempfile
+
+from scripts.plotting import BarPanel, ChartRenderer, ChartSpec, is_up_to_date, render_if_changed
+
+
+def _spec(path, counts):
+    return ChartSpec(path, (
+        BarPanel('红球出现频率分布', '红球号码', [1, 2, 3], counts, 'red', 8),
+    ), (4, 3), 50)
+
+
+def test_render_skips_when_counts_unchanged():
+    """统计结果未变化时跳过渲染；次数变化后重新渲染"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'pics', 'chart.png')
+        assert render_if_changed(_spec(path, [3, 0, 5]))
+        assert is_up_to_date(_spec(path, [3, 0, 5]))
+        assert not render_if_changed(_spec(path, [3, 0, 5]))
+
+        assert not is_up_to_date(_spec(path, [3, 1, 5]))
+        assert render_if_changed(_spec(path, [3, 1, 5]))
+
+
+def test_renderer_process_pool():
+    """进程池渲染：提交后等待全部完成，未变化的图表不会再次提交"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        specs = [_spec(os.path.join(tmp_dir, f'{i}.png'), [i, 2, 3]) for i in range(2)]
+        renderer = ChartRenderer()
+        for spec in specs:
+            renderer.submit(spec)
+        assert renderer.wait() == [spec.path for spec in specs]
+        assert all(is_up_to_date(spec) for spec in specs)
+
+        for spec in specs:
+            renderer.submit(spec)
+        assert renderer.wait() == []
+
+
+if __name__ == "__main__":
+    test_render_skips_when_counts_unchanged()
+    test_renderer_process_pool()
+    print("🎉 图表渲染测试通过！")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web 接口响应缓存测试脚本
+"""
+
+import os
+import tempfile
+
+from scripts.response_cache import ResponseCache
+
+
+def test_cache_shared_across_instances_and_invalidated_by_version():
+    """不同进程（实例）共享缓存；按数据集版本区分，新版本写入不会清掉仍在旧版本上的 worker 的缓存"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'cache.sqlite3')
+        writer = ResponseCache(path)
+        reader = ResponseCache(path)
+
+        writer.put('ssq:100:2025001', 'k', '{"plan": 1}')
+        assert reader.get('ssq:100:2025001', 'k') == '{"plan": 1}'
+        assert reader.get('ssq:100:2025001', 'other') is None
+
+        writer.put('ssq:101:2025002', 'k', '{"plan": 2}')
+        assert reader.get('ssq:101:2025002', 'k') == '{"plan": 2}'
+        assert ResponseCache(path).get('ssq:101:2025002', 'other') is None
+
+        # 切换期间：新旧版本的 worker 交替写入，彼此的缓存都保留
+        lagging = ResponseCache(path)
+        lagging.put('ssq:100:2025001', 'k2', '{"plan": 3}')
+        writer.put('ssq:101:2025002', 'k2', '{"plan": 4}')
+        assert ResponseCache(path).get('ssq:100:2025001', 'k') == '{"plan": 1}'
+        assert ResponseCache(path).get('ssq:100:2025001', 'k2') == '{"plan": 3}'
+        assert ResponseCache(path).get('ssq:101:2025002', 'k2') == '{"plan": 4}'
+
+
+def test_cache_ttl_and_lru_eviction():
+    """过期条目不再返回；超过上限时淘汰最久未使用的条目"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'cache.sqlite3')
+        cache = ResponseCache(path, max_entries=2)
+        cache.put('v', 'a', 'A')
+        cache.put('v', 'b', 'B')
+        assert ResponseCache(path).get('v', 'a') == 'A'
+        cache.put('v', 'c', 'C')
+
+        fresh = ResponseCache(path, max_entries=2)
+        assert fresh.get('v', 'a') == 'A'
+        assert fresh.get('v', 'b') is None
+        assert fresh.get('v', 'c') == 'C'
+
+        expired = ResponseCache(path, ttl=-1)
+        assert expired.get('v', 'a') is None
+        # 写入时顺带清掉过期条目（包括不再被读取的旧版本条目）
+        expired.put('v2', 'd', 'D')
+        assert ResponseCache(path).get('v', 'c') is None
+
+
+if __name__ == "__main__":
+    test_cache_shared_across_instances_and_invalidated_by_version()
+    test_cache_ttl_and_lru_eviction()
+    print("🎉 响应缓存测试通过！")
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web 接口测试脚本（Flask 测试客户端 + 临时数据文件，不访问网络）
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+
+import web_app
+from scripts import page_cache
+from scripts.analyzer_service import AnalyzerService
+from scripts.draw_calendar import SSQ_DRAW_WEEKDAYS, draw_datetime, next_draw_datetime
+from scripts.lottery_analyzer import DoubleColorBallAnalyzer
+from scripts.page_cache import PageCache
+from scripts.response_cache import ResponseCache
+
+
+def _records(count=100):
+    with open('data/lottery_data.json', 'r', encoding='utf-8') as f:
+        return json.load(f)[:count]
+
+
+@contextmanager
+def _client(records):
+    """用临时数据文件、响应缓存和页面缓存替换 web_app 的全局对象，返回测试客户端"""
+    saved = (web_app.analyzer_service, web_app.response_cache, web_app.page_cache)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'lottery_data.json')
+        writer = DoubleColorBallAnalyzer()
+        writer.lottery_data = records
+        writer.save_data(data_path)
+
+        web_app.analyzer_service = AnalyzerService(DoubleColorBallAnalyzer, data_path=data_path,
+                                                   check_interval=3600, sync_interval=3600)
+        web_app.response_cache = ResponseCache(os.path.join(tmp_dir, 'response_cache.sqlite3'))
+        web_app.page_cache = PageCache()
+        try:
+            yield web_app.app.test_client()
+        finally:
+            web_app.analyzer_service.stop()
+            web_app.analyzer_service, web_app.response_cache, web_app.page_cache = saved
+
+
+BATCH_ITEMS = [
+    {},
+    {"red_dan": "1,3,8"},
+    {"blue_dan": "9"},
+    {"red_dan": "5", "blue_dan": "2", "strategies": ["高频主导", "冷热结合"]},
+]
+
+
+def test_recommend_batch_matches_single_requests():
+    """批量接口每组的结果与逐个调用 /api/recommend 一致（两者都从空缓存开始计算）"""
+    with _client(_records()) as client:
+        response = client.post("/api/recommend/batch", json={"items": BATCH_ITEMS})
+        assert response.status_code == 200
+        batch = response.get_json()
+        assert len(batch["results"]) == len(BATCH_ITEMS)
+
+        web_app.response_cache.clear()
+        for item, result in zip(BATCH_ITEMS, batch["results"]):
+            single = client.post("/api/recommend", json=item)
+            assert single.headers["X-Cache"] == "MISS"
+            single = single.get_json()
+            assert result["plan"] == single["plan"]
+            assert batch["latest_period"] == single["latest_period"]
+
+        # 也可以直接上送数组；此时各组都命中单个接口写入的缓存
+        assert client.post("/api/recommend/batch", json=BATCH_ITEMS).get_json() == batch
+
+
+def test_recommend_batch_ndjson_stream():
+    """?format=ndjson 或 Accept: application/x-ndjson 时逐组输出一行 JSON，按请求顺序带 index"""
+    with _client(_records()) as client:
+        plans = [r["plan"] for r in client.post("/api/recommend/batch", json=BATCH_ITEMS).get_json()["results"]]
+
+        for url, headers in (
+            ("/api/recommend/batch?format=ndjson", {}),
+            ("/api/recommend/batch", {"Accept": "application/x-ndjson"}),
+        ):
+            with client.post(url, json=BATCH_ITEMS, headers=headers) as response:
+                assert response.status_code == 200
+                assert response.mimetype == "application/x-ndjson"
+                lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            assert [line["index"] for line in lines] == list(range(len(BATCH_ITEMS)))
+            assert [line["plan"] for line in lines] == plans
+            assert lines[1]["red_dan"] == [1, 3, 8] and lines[2]["blue_dan"] == [9]
+
+
+def test_recommend_batch_limits_and_bad_bodies():
+    """超出组数上限或请求体格式不对时返回 400；超限的拖胆和未知策略按未上送处理"""
+    with _client(_records()) as client:
+        too_many = [{}] * (web_app.RECOMMEND_BATCH_MAX_ITEMS + 1)
+        assert client.post("/api/recommend/batch", json=too_many).status_code == 400
+        assert client.post("/api/recommend/batch", json=[{}] * web_app.RECOMMEND_BATCH_MAX_ITEMS).status_code == 200
+
+        for body in ({"items": "1,3"}, {"items": [{}, 5]}, {"red_dan": "1"}, 42):
+            assert client.post("/api/recommend/batch", json=body).status_code == 400
+        response = client.post("/api/recommend/batch", data="not json", content_type="application/json")
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+        results = client.post("/api/recommend/batch", json=[
+            {},
+            {"red_dan": "1,2,3,4,5,6"},  # 红胆最多 5 个
+            {"blue_dan": "1,2"},         # 蓝胆最多 1 个
+            {"strategies": ["不存在的策略"]},
+        ]).get_json()["results"]
+        assert results[1]["red_dan"] == [] and results[2]["blue_dan"] == []
+        assert all(result["plan"] == results[0]["plan"] for result in results)
+
+
+def _all_pages(client, query):
+    """沿 next_cursor 翻完全部页，返回 (各页条数, 全部期号)"""
+    counts, periods, cursor = [], [], None
+    while True:
+        url = f"/api/draws?{query}" + (f"&cursor={cursor}" if cursor else "")
+        payload = client.get(url).get_json()
+        counts.append(payload["count"])
+        periods.extend(draw["period"] for draw in payload["draws"])
+        cursor = payload["next_cursor"]
+        if cursor is None:
+            return counts, periods
+
+
+def test_draws_cursor_pagination_and_order():
+    """按期号游标翻页：条数不足一页或恰好取完时 next_cursor 为 null；order=asc 从旧到新"""
+    records = _records()
+    periods = [rec["period"] for rec in records]
+    with _client(records) as client:
+        assert _all_pages(client, "limit=30") == ([30, 30, 30, 10], periods)
+        assert _all_pages(client, "limit=50") == ([50, 50], periods)
+        assert _all_pages(client, "limit=30&order=asc") == ([30, 30, 30, 10], periods[::-1])
+
+        first = client.get("/api/draws").get_json()
+        assert first["count"] == web_app.DRAWS_DEFAULT_LIMIT
+        assert first["draws"][0] == records[0]
+        assert client.get("/api/draws?limit=100000").get_json()["count"] == len(records)
+
+
+def test_draws_filters_and_projection():
+    """期号 / 日期范围筛选（含端点）与字段投影，layout=columns 按字段给出数组"""
+    records = _records()
+    with _client(records) as client:
+        payload = client.get(
+            f"/api/draws?period_from={records[20]['period']}&period_to={records[10]['period']}"
+            "&fields=period,blue_ball").get_json()
+        assert payload["fields"] == ["period", "blue_ball"]
+        assert payload["draws"] == [{"period": rec["period"], "blue_ball": rec["blue_ball"]}
+                                    for rec in records[10:21]]
+
+        payload = client.get(
+            f"/api/draws?date_from={records[40]['date']}&date_to={records[31]['date']}"
+            "&fields=red_balls&layout=columns&order=asc").get_json()
+        assert payload["columns"] == {"red_balls": [rec["red_balls"] for rec in records[31:41]][::-1]}
+        assert "draws" not in payload
+
+        # 翻页时筛选条件保持不变
+        query = f"limit=4&period_from={records[20]['period']}&period_to={records[10]['period']}"
+        counts, periods = _all_pages(client, query)
+        assert counts == [4, 4, 3] and periods == [rec["period"] for rec in records[10:21]]
+
+
+def test_draws_bad_requests():
+    """游标不是已有期号、字段未知、参数取值非法时返回 400"""
+    with _client(_records()) as client:
+        for query in ("cursor=abc", "cursor=1999001", "fields=period,nope", "order=sideways",
+                      "layout=table", "limit=ten"):
+            response = client.get(f"/api/draws?{query}")
+            assert response.status_code == 400, query
+            assert "error" in response.get_json()
+        assert "period" in client.get("/api/draws?fields=nope").get_json()["fields"]
+
+        # 带 ETag，数据未变时条件请求返回 304
+        etag = client.get("/api/draws?limit=5").headers["ETag"]
+        assert client.get("/api/draws?limit=5", headers={"If-None-Match": etag}).status_code == 304
+
+
+def _append_draws(records):
+    """像后台同步那样把新开奖追加到当前数据文件，并让服务切换到新数据"""
+    data_path = web_app.analyzer_service.data_path
+    writer = DoubleColorBallAnalyzer()
+    writer.load_data(data_path)
+    writer.merge_draws(records)
+    writer.append_data(records, data_path)
+    assert web_app.analyzer_service.reload_if_changed()
+
+
+def test_recommend_response_cache_headers():
+    """/api/recommend 规范化参数后命中响应缓存（X-Cache: HIT），新开奖后重新计算"""
+    records = _records()
+    with _client(records[1:]) as client:
+        first = client.post("/api/recommend", json={"red_dan": "3,1", "strategies": ["超高频", "高频主导"]})
+        assert first.headers["X-Cache"] == "MISS"
+        # 红胆顺序、策略顺序不同但规范化后相同，form 方式上送同样命中
+        again = client.post("/api/recommend", json={"red_dan": "1,3,3", "strategies": ["高频主导", "超高频"]})
+        assert again.headers["X-Cache"] == "HIT"
+        assert again.get_data() == first.get_data()
+        form = client.post("/api/recommend", data={"red_dan": "1,3", "strategies": "超高频,高频主导"})
+        assert form.headers["X-Cache"] == "HIT"
+        assert client.post("/api/recommend", json={"red_dan": "1,4"}).headers["X-Cache"] == "MISS"
+
+        _append_draws(records[:1])
+        fresh = client.post("/api/recommend", json={"red_dan": "1,3", "strategies": ["超高频", "高频主导"]})
+        assert fresh.headers["X-Cache"] == "MISS"
+        assert fresh.get_json()["latest_period"] == records[0]["period"]
+
+
+def test_index_served_from_cache_with_conditional_requests():
+    """首页每个数据集版本只渲染一次，带强 ETag / Last-Modified，条件请求返回 304；新开奖后重新渲染"""
+    records = _records()
+    renders = []
+    render_index = web_app.render_index
+    web_app.render_index = lambda analyzer: renders.append(analyzer) or render_index(analyzer)
+    try:
+        with _client(records[1:]) as client:
+            first = client.get("/")
+            assert first.status_code == 200
+            assert records[1]["period"] in first.get_data(as_text=True)
+            assert first.headers["Cache-Control"] == "no-cache"
+            assert "Accept-Encoding" in first.headers["Vary"]
+            assert first.last_modified is not None
+            etag = first.headers["ETag"]
+
+            assert client.get("/").headers["ETag"] == etag
+            revalidated = client.get("/", headers={"If-None-Match": etag})
+            assert revalidated.status_code == 304 and revalidated.get_data() == b""
+            assert len(renders) == 1
+
+            _append_draws(records[:1])
+            fresh = client.get("/", headers={"If-None-Match": etag})
+            assert fresh.status_code == 200 and fresh.headers["ETag"] != etag
+            assert records[0]["period"] in fresh.get_data(as_text=True)
+            assert len(renders) == 2
+    finally:
+        web_app.render_index = render_index
+
+
+def test_history_compression_and_cache_control():
+    """历史页按 Accept-Encoding 返回预压缩版本（各自的强 ETag），下一次开奖前允许浏览器直接缓存"""
+    records = _records(120)
+    with _client(records) as client:
+        plain = client.get("/history?page=2")
+        assert plain.status_code == 200 and plain.content_encoding is None
+        assert records[50]["period"] in plain.get_data(as_text=True)
+
+        zipped = client.get("/history?page=2", headers={"Accept-Encoding": "br;q=0, gzip"})
+        assert zipped.content_encoding == "gzip"
+        assert gzip.decompress(zipped.get_data()) == plain.get_data()
+        assert zipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+        assert client.get("/history?page=2", headers={
+            "Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]}).status_code == 304
+        # 压缩表示的 ETag 不能用来验证未压缩表示
+        assert client.get("/history?page=2", headers={"If-None-Match": zipped.headers["ETag"]}).status_code == 200
+
+        brotli_only = client.get("/history?page=2", headers={"Accept-Encoding": "br"})
+        if page_cache.brotli is not None:
+            assert brotli_only.content_encoding == "br"
+            assert page_cache.brotli.decompress(brotli_only.get_data()) == plain.get_data()
+        else:  # 未安装 brotli 时只有 gzip，br 客户端拿到未压缩的页面
+            assert brotli_only.content_encoding is None
+            assert brotli_only.get_data() == plain.get_data()
+
+        # 超出范围的页码落到最后一页
+        assert client.get("/history?page=99").headers["ETag"] == client.get("/history?page=3").headers["ETag"]
+
+        # 最新一期开奖之后、下一次开奖之前：页面不会变化，public + max-age 到下一次开奖
+        beijing_now = web_app.beijing_now
+        after_draw = draw_datetime(records[0]["date"]) + timedelta(hours=1)
+        try:
+            web_app.beijing_now = lambda: after_draw
+            response = client.get("/history?page=2")
+            max_age = int((next_draw_datetime(SSQ_DRAW_WEEKDAYS, after_draw) - after_draw).total_seconds())
+            assert response.cache_control.public and response.cache_control.max_age == max_age
+
+            # 已过下一次开奖时间但新数据还没同步进来：每次都要验证
+            web_app.beijing_now = lambda: after_draw + timedelta(days=7)
+            assert client.get("/history?page=2").headers["Cache-Control"] == "no-cache"
+        finally:
+            web_app.beijing_now = beijing_now
+
+
+if __name__ == "__main__":
+    test_recommend_batch_matches_single_requests()
+    test_recommend_batch_ndjson_stream()
+    test_recommend_batch_limits_and_bad_bodies()
+    test_draws_cursor_pagination_and_order()
+    test_draws_filters_and_projection()
+    test_draws_bad_requests()
+    test_recommend_response_cache_headers()
+    test_index_served_from_cache_with_conditional_requests()
+    test_history_compression_and_cache_control()
+    print("🎉 Web 接口测试通过！")
@@ -7,22 +7,54 @@
 - 手机适配的Web页面（参考 cp.webyoung.cn 的交互风格）
 - 支持可选红胆、蓝胆（拖胆）输入
 - 后端复用 DoubleColorBallAnalyzer 的推荐与增强方案逻辑
+- 请求只读取本地数据快照，增量同步由后台线程完成后原子替换（见 scripts/analyzer_service.py）
+
+环境变量：
+- SSQ_REFRESH_CHECK_SECONDS：检查数据文件变化的间隔，默认 5 秒
+- SSQ_SYNC_INTERVAL_SECONDS：增量同步间隔，默认 1800 秒
+- SSQ_RESPONSE_CACHE_PATH：/api/recommend 响应缓存文件，默认 data/response_cache.sqlite3
+- SSQ_RESPONSE_CACHE_TTL_SECONDS：响应缓存有效期，默认 86400 秒
+
+gunicorn 部署时 gunicorn_config.py 开启 preload_app，并在 master 中调用 preload_analyzer()，
+所有 worker 共享同一份已加载的数据和预计算结果。
 """
 
 from __future__ import annotations
 
 import os
+import json
 import math
 from datetime import datetime, timezone, timedelta
 from typing import List, Optional
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, stream_with_context
 
 from scripts.lottery_analyzer import DoubleColorBallAnalyzer
+from scripts.analyzer_service import AnalyzerService
+from scripts.analysis_cache import dataset_key
+from scripts.response_cache import ResponseCache
+from scripts.draw_export import STREAM_FORMATS, iter_csv, iter_ndjson, iter_stats
+from scripts.page_cache import PageCache, choose_encoding, rendered_page
+from scripts.draw_calendar import (
+    SSQ_DRAW_WEEKDAYS, beijing_now, draw_datetime, draw_possible_since, next_draw_datetime
+)
 
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
 
+analyzer_service = AnalyzerService(
+    DoubleColorBallAnalyzer,
+    check_interval=int(os.environ.get("SSQ_REFRESH_CHECK_SECONDS", 5)),
+    sync_interval=int(os.environ.get("SSQ_SYNC_INTERVAL_SECONDS", 1800)),
+)
+
+response_cache = ResponseCache(
+    os.environ.get("SSQ_RESPONSE_CACHE_PATH", "data/response_cache.sqlite3"),
+    ttl=int(os.environ.get("SSQ_RESPONSE_CACHE_TTL_SECONDS", 86400)),
+)
+
+page_cache = PageCache()
+
 
 @app.context_processor
 def inject_current_year():
@@ -31,13 +63,26 @@ def inject_current_year():
 
 
 def get_analyzer() -> DoubleColorBallAnalyzer:
-    """获取全局双色球分析器实例，并确保历史数据已初始化更新。"""
-    # 简单的惰性初始化，全局只创建一个实例
-    if not hasattr(app, "_dc_analyzer"):
-        analyzer = DoubleColorBallAnalyzer()
-        analyzer.init_and_update_history()
-        app._dc_analyzer = analyzer
-    return app._dc_analyzer  # type: ignore[attr-defined]
+    """
+    获取当前双色球分析器快照。
+
+    只读取本地数据，不访问官方接口；每个请求只调用一次，保证整个请求内使用同一份快照。
+    """
+    return analyzer_service.current()
+
+
+def warm_analyzer(analyzer: DoubleColorBallAnalyzer) -> None:
+    """预先计算统计和默认推荐并渲染首页，worker 首次请求无需再计算。"""
+    analyzer.stats
+    analyzer.recent_stats
+    analyzer.generate_recommendations(num_sets=8)
+    with app.test_request_context("/"):
+        page_cache.get_or_render(page_version(analyzer), "index", lambda: render_index(analyzer))
+
+
+def preload_analyzer() -> None:
+    """gunicorn master 中调用：数据只加载一次，worker fork 后写时复制共享。"""
+    analyzer_service.preload(warm=warm_analyzer)
 
 
 def parse_dan_input(raw: str, max_num: int) -> List[int]:
@@ -56,16 +101,84 @@ def parse_dan_input(raw: str, max_num: int) -> List[int]:
     return nums
 
 
-@app.route("/", methods=["GET"])
-def index():
-    """首页：表单 + 推荐结果展示."""
-    analyzer = get_analyzer()
-    latest_period = analyzer.lottery_data[0]["period"] if analyzer.lottery_data else "N/A"
-    latest_date = analyzer.lottery_data[0]["date"] if analyzer.lottery_data else "N/A"
+def parse_strategies(raw) -> List[str]:
+    """解析策略过滤参数：JSON 数组或逗号分隔的字符串。"""
+    if isinstance(raw, str):
+        # 兼容 form-urlencoded 传法：单个字符串也按逗号拆分
+        return [s.strip() for s in raw.split(",") if s.strip()]
+    return [str(s).strip() for s in raw if str(s).strip()]
+
+
+def recommend_cache_key(red_dan: List[int], blue_dan: List[int], strategies: List[str]) -> str:
+    """
+    规范化后的推荐请求键。
+
+    红胆按集合参与计算、策略只用于过滤，顺序和重复都不影响结果，因此排序去重；
+    蓝胆只取第一个，保持原样。
+    """
+    return json.dumps(
+        {
+            "red_dan": sorted(set(red_dan)),
+            "blue_dan": blue_dan,
+            "strategies": sorted(set(strategies)),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def page_version(analyzer: DoubleColorBallAnalyzer) -> tuple:
+    """页面缓存版本：数据集版本 + 年份（页脚显示 current_year）。"""
+    return dataset_key(analyzer.draw_store) + (datetime.now(timezone.utc).year,)
+
+
+def page_response(page, max_age: Optional[int] = None):
+    """
+    返回缓存的页面：按 Accept-Encoding 选用预压缩版本，带强 ETag / Last-Modified，
+    浏览器条件请求命中时返回 304。
+    - max_age: 给出时允许浏览器和 CDN 直接缓存该秒数；否则每次都要验证
+    """
+    accepted = {value for value, quality in request.accept_encodings if quality > 0}
+    encoding, body, etag = choose_encoding(page, accepted)
+    response = app.response_class(body, mimetype="text/html")
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag)
+    if page.last_modified is not None:
+        response.last_modified = page.last_modified
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        # 允许缓存但每次都要验证：新开奖后浏览器立即拿到新页面
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def seconds_until_next_draw(analyzer: DoubleColorBallAnalyzer) -> Optional[int]:
+    """
+    当前数据在下一次开奖前不会变化，返回距下一次开奖的秒数。
+    已过开奖时间但新数据还没同步进来时返回 None（此时页面随时可能变化）。
+    """
+    store = analyzer.draw_store
+    if not len(store):
+        return None
+    now = beijing_now()
+    if draw_possible_since(store.latest_date, SSQ_DRAW_WEEKDAYS, now):
+        return None
+    return int((next_draw_datetime(SSQ_DRAW_WEEKDAYS, now) - now).total_seconds())
+
+
+def render_index(analyzer: DoubleColorBallAnalyzer):
+    """渲染首页（默认无拖胆方案 + 最近10期开奖），每个数据集版本只执行一次。"""
+    store = analyzer.draw_store
+    latest_period = store.latest_period if len(store) else "N/A"
+    latest_date = store.latest_date if len(store) else "N/A"
 
     # 最近10期开奖，用于页面下方展示
     recent_draws = []
-    for rec in analyzer.lottery_data[:10]:
+    for rec in store.head(10).to_records():
         recent_draws.append(
             {
                 "period": rec.get("period"),
@@ -83,41 +196,29 @@ def index():
         silent=True,
     )
 
-    return render_template(
+    html = render_template(
         "index.html",
         latest_period=latest_period,
         latest_date=latest_date,
         enhanced_plan=enhanced_plan,
         recent_draws=recent_draws,
     )
+    return rendered_page(html, draw_datetime(latest_date) if len(store) else None)
 
 
-@app.route("/api/recommend", methods=["POST"])
-def api_recommend():
-    """
-    API: 根据可选红胆、蓝胆生成推荐方案。
-
-    请求(JSON 或 form)字段：
-    - red_dan: 可选，字符串，如 "1,3,8"
-    - blue_dan: 可选，字符串，如 "2,9"
-
-    响应(JSON)：
-    {
-      "latest_period": "...",
-      "latest_date": "...",
-      "plan": {
-        "singles_6_1": [...],
-        "combo_7_1": {...},
-        "combo_6_2": {...}
-      }
-    }
-    """
+@app.route("/", methods=["GET"])
+def index():
+    """首页：表单 + 推荐结果展示（同一期内直接返回缓存的页面）."""
     analyzer = get_analyzer()
+    page = page_cache.get_or_render(page_version(analyzer), "index", lambda: render_index(analyzer))
+    return page_response(page)
 
-    data = request.get_json(silent=True) or request.form
+
+def parse_recommend_constraints(data) -> tuple:
+    """从请求数据中解析并规范化 (红胆, 蓝胆, 策略过滤)。"""
     red_dan_raw = data.get("red_dan", "") if data else ""
     blue_dan_raw = data.get("blue_dan", "") if data else ""
-    strategies_raw = data.get("strategies", [])
+    strategies_raw = data.get("strategies", []) if data else []
 
     red_dan = parse_dan_input(red_dan_raw, max_num=33)
     blue_dan = parse_dan_input(blue_dan_raw, max_num=16)
@@ -128,15 +229,31 @@ def api_recommend():
     if len(blue_dan) > 1:
         blue_dan = []
 
+    strategies = parse_strategies(strategies_raw) if strategies_raw else []
+    return red_dan, blue_dan, strategies
+
+
+def recommend_payload(analyzer: DoubleColorBallAnalyzer, red_dan: List[int], blue_dan: List[int],
+                      strategies: List[str], load_recommendations=None) -> tuple:
+    """
+    生成一组拖胆约束对应的 /api/recommend 响应 JSON 文本，返回 (文本, 是否命中缓存)。
+
+    结果只取决于数据集版本和规范化参数，命中缓存时直接返回已序列化的响应。
+    - load_recommendations: 可选，返回8种策略推荐的无参回调；批量接口借此让多组约束共用一次推荐
+    """
+    version = ":".join(str(part) for part in dataset_key(analyzer.draw_store))
+    cache_key = recommend_cache_key(red_dan, blue_dan, strategies)
+    payload = response_cache.get(version, cache_key)
+    if payload is not None:
+        return payload, True
+
     # 先生成8种策略推荐，再带入增强方案（支持拖胆约束）
-    recommendations = analyzer.generate_recommendations(num_sets=8)
+    if load_recommendations is None:
+        recommendations = analyzer.generate_recommendations(num_sets=8)
+    else:
+        recommendations = load_recommendations()
     # 如果前端指定了策略过滤，则按策略名称过滤单式组合
-    if strategies_raw:
-        if isinstance(strategies_raw, str):
-            # 兼容 form-urlencoded 传法：单个字符串也按逗号拆分
-            strategies = [s.strip() for s in strategies_raw.split(",") if s.strip()]
-        else:
-            strategies = [str(s).strip() for s in strategies_raw if str(s).strip()]
+    if strategies:
         filtered = [r for r in recommendations if r.get("strategy") in strategies]
         if filtered:
             recommendations = filtered
@@ -148,23 +265,267 @@ def api_recommend():
         silent=True,
     )
 
-    latest_period = analyzer.lottery_data[0]["period"] if analyzer.lottery_data else "N/A"
-    latest_date = analyzer.lottery_data[0]["date"] if analyzer.lottery_data else "N/A"
+    latest_period = analyzer.draw_store.latest_period if len(analyzer.draw_store) else "N/A"
+    latest_date = analyzer.draw_store.latest_date if len(analyzer.draw_store) else "N/A"
 
-    return jsonify(
+    payload = jsonify(
         {
             "latest_period": latest_period,
             "latest_date": latest_date,
             "plan": plan,
         }
+    ).get_data(as_text=True)
+    response_cache.put(version, cache_key, payload)
+    return payload, False
+
+
+@app.route("/api/recommend", methods=["POST"])
+def api_recommend():
+    """
+    API: 根据可选红胆、蓝胆生成推荐方案。
+
+    请求(JSON 或 form)字段：
+    - red_dan: 可选，字符串，如 "1,3,8"
+    - blue_dan: 可选，字符串，如 "2,9"
+
+    响应(JSON)：
+    {
+      "latest_period": "...",
+      "latest_date": "...",
+      "plan": {
+        "singles_6_1": [...],
+        "combo_7_1": {...},
+        "combo_6_2": {...}
+      }
+    }
+    """
+    analyzer = get_analyzer()
+
+    data = request.get_json(silent=True) or request.form
+    red_dan, blue_dan, strategies = parse_recommend_constraints(data)
+
+    payload, hit = recommend_payload(analyzer, red_dan, blue_dan, strategies)
+    response = app.response_class(payload, mimetype="application/json")
+    response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    return response
+
+
+RECOMMEND_BATCH_MAX_ITEMS = 200
+
+
+@app.route("/api/recommend/batch", methods=["POST"])
+def api_recommend_batch():
+    """
+    API: 一次请求生成多组拖胆约束的推荐方案。
+
+    请求(JSON)：{"items": [{"red_dan": "1,3", "blue_dan": "2", "strategies": [...]}, ...]}
+    （也可以直接上送数组），单次最多 200 组。每组字段含义与 /api/recommend 相同。
+
+    统计与8种策略推荐在整个批次中只计算一次，各组只做拖胆约束部分；
+    已缓存的组合直接复用 /api/recommend 的响应缓存。
+
+    响应：
+    - 默认 JSON：{"latest_period", "latest_date", "results": [{"red_dan", "blue_dan", "strategies", "plan"}, ...]}
+    - ?format=ndjson 或 Accept: application/x-ndjson 时逐组流式输出，每行一个 JSON：
+      {"index", "red_dan", "blue_dan", "strategies", "latest_period", "latest_date", "plan"}
+    """
+    analyzer = get_analyzer()
+
+    data = request.get_json(silent=True)
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return jsonify({"error": "请求体须为 {\"items\": [...]} 或约束对象数组"}), 400
+    if len(items) > RECOMMEND_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"单次最多 {RECOMMEND_BATCH_MAX_ITEMS} 组约束"}), 400
+
+    constraints = [parse_recommend_constraints(item) for item in items]
+
+    shared = {}
+
+    def load_recommendations():
+        # 整个批次共用一次推荐结果（各组只读取，不会相互影响）
+        if "recommendations" not in shared:
+            shared["recommendations"] = analyzer.generate_recommendations(num_sets=8)
+        return shared["recommendations"]
+
+    def results():
+        for index, (red_dan, blue_dan, strategies) in enumerate(constraints):
+            payload, _ = recommend_payload(analyzer, red_dan, blue_dan, strategies, load_recommendations)
+            result = json.loads(payload)
+            result.update(index=index, red_dan=red_dan, blue_dan=blue_dan, strategies=strategies)
+            yield result
+
+    wants_ndjson = request.args.get("format") == "ndjson" or (
+        request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"]) == "application/x-ndjson"
+    )
+    if wants_ndjson:
+        def stream():
+            for result in results():
+                yield json.dumps(result, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+        return app.response_class(stream_with_context(stream()), mimetype="application/x-ndjson")
+
+    store = analyzer.draw_store
+    return jsonify(
+        {
+            "latest_period": store.latest_period if len(store) else "N/A",
+            "latest_date": store.latest_date if len(store) else "N/A",
+            "results": [
+                {key: result[key] for key in ("red_dan", "blue_dan", "strategies", "plan")}
+                for result in results()
+            ],
+        }
+    )
+
+
+DRAWS_DEFAULT_LIMIT = 50
+DRAWS_MAX_LIMIT = 500
+
+
+@app.route("/api/draws", methods=["GET"])
+def api_draws():
+    """
+    API: 按期号游标分页读取历史开奖，直接从列式存储取数。
+
+    查询参数：
+    - limit: 每页条数，默认 50，最大 500
+    - cursor: 上一页响应中的 next_cursor（期号），从该期之后继续；不是已有期号时返回 400
+    - order: desc（默认，从新到旧）或 asc
+    - period_from / period_to: 期号范围（含端点）
+    - date_from / date_to: 日期范围 YYYY-MM-DD（含端点）
+    - fields: 逗号分隔的字段名，只返回这些字段，如 "period,red_balls,blue_ball"
+    - layout: rows（默认，逐条对象）或 columns（按字段给出数组，最省流量）
+
+    响应(JSON)：
+    {
+      "fields": [...],
+      "count": 本页条数,
+      "next_cursor": "..." 或 null,
+      "draws": [{...}, ...]   或 layout=columns 时 "columns": {"period": [...], ...}
+    }
+    """
+    store = get_analyzer().draw_store
+    args = request.args
+
+    try:
+        limit = int(args.get("limit", DRAWS_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit 必须是整数"}), 400
+    limit = min(max(limit, 1), DRAWS_MAX_LIMIT)
+
+    order = args.get("order", "desc")
+    layout = args.get("layout", "rows")
+    if order not in ("desc", "asc") or layout not in ("rows", "columns"):
+        return jsonify({"error": "order 只能是 desc/asc，layout 只能是 rows/columns"}), 400
+
+    available = store.field_names()
+    fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()] or available
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        return jsonify({"error": f"未知字段: {', '.join(unknown)}", "fields": available}), 400
+
+    rows = store.select_rows(
+        period_from=args.get("period_from"),
+        period_to=args.get("period_to"),
+        date_from=args.get("date_from"),
+        date_to=args.get("date_to"),
+    )
+    if order == "asc":
+        rows = rows[::-1]
+    cursor = args.get("cursor")
+    if cursor and store.index_of(cursor) is None:
+        return jsonify({"error": "cursor 无效，应为上一页响应中的 next_cursor"}), 400
+    if cursor:
+        periods = store.periods[rows]
+        rows = rows[periods < cursor] if order == "desc" else rows[periods > cursor]
+
+    page_rows = rows[:limit]
+    next_cursor = str(store.periods[page_rows[-1]]) if len(rows) > limit else None
+
+    columns = {name: store.column(name, page_rows) for name in fields}
+    payload = {"fields": fields, "count": len(page_rows), "next_cursor": next_cursor}
+    if layout == "columns":
+        payload["columns"] = columns
+    else:
+        payload["draws"] = [dict(zip(fields, values)) for values in zip(*(columns[name] for name in fields))]
+
+    response = jsonify(payload)
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_response(chunks, fmt: str, filename: str):
+    """把逐块生成的导出内容以流式响应返回，客户端无需等待全部生成即可开始读取。"""
+    response = app.response_class(stream_with_context(chunks), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}.{fmt}"
+    return response
+
+
+@app.route("/api/export/draws", methods=["GET"])
+def api_export_draws():
+    """
+    API: 流式导出全部历史开奖（直接从列式存储逐块生成，内存占用恒定）。
+
+    查询参数：
+    - format: ndjson（默认）或 csv（号码列表展开为 red_balls_1 ... 等列）
+    - fields: 逗号分隔的字段名，默认全部字段
+    """
+    store = get_analyzer().draw_store
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in STREAM_FORMATS:
+        return jsonify({"error": f"format 只能是 {'/'.join(STREAM_FORMATS)}"}), 400
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    unknown = [f for f in fields if f not in store.field_names()]
+    if unknown:
+        return jsonify({"error": f"未知字段: {', '.join(unknown)}", "fields": store.field_names()}), 400
+
+    chunks = iter_ndjson(store, fields) if fmt == "ndjson" else iter_csv(store, fields)
+    return export_response(chunks, fmt, f"ssq_draws_{store.latest_period}")
+
+
+@app.route("/api/export/stats", methods=["GET"])
+def api_export_stats():
+    """API: 流式导出核心统计结果（号码频率与各类分布），每行一个 metric/value/count。"""
+    analyzer = get_analyzer()
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in STREAM_FORMATS:
+        return jsonify({"error": f"format 只能是 {'/'.join(STREAM_FORMATS)}"}), 400
+    return export_response(iter_stats(analyzer.stats, fmt), fmt, f"ssq_stats_{analyzer.draw_store.latest_period}")
+
+
+def render_history(analyzer: DoubleColorBallAnalyzer, page: int, per_page: int):
+    """渲染历史开奖的某一页，每个数据集版本每页只执行一次。"""
+    store = analyzer.draw_store
+    total = len(store)
+    pages = max(math.ceil(total / per_page), 1) if total else 1
+
+    start = (page - 1) * per_page
+    end = min(start + per_page, total)
+    page_records = [store.record(row) for row in range(start, end)]
+
+    html = render_template(
+        "history.html",
+        records=page_records,
+        page=page,
+        pages=pages,
+        total=total,
     )
+    return rendered_page(html, draw_datetime(store.latest_date) if total else None)
 
 
 @app.route("/history", methods=["GET"])
 def history():
-    """历史开奖数据分页展示页面。"""
+    """
+    历史开奖数据分页展示页面。
+
+    分页按最新一期在前，新开奖会让每一页整体后移一期，因此所有页面都以数据集版本缓存，
+    并允许浏览器缓存到下一次开奖时刻为止。
+    """
     analyzer = get_analyzer()
-    records = analyzer.lottery_data or []
 
     per_page = 50
     try:
@@ -173,22 +534,15 @@ def history():
         page = 1
     page = max(page, 1)
 
-    total = len(records)
+    total = len(analyzer.draw_store)
     pages = max(math.ceil(total / per_page), 1) if total else 1
     if page > pages:
         page = pages
 
-    start = (page - 1) * per_page
-    end = start + per_page
-    page_records = records[start:end]
-
-    return render_template(
-        "history.html",
-        records=page_records,
-        page=page,
-        pages=pages,
-        total=total,
+    cached = page_cache.get_or_render(
+        page_version(analyzer), f"history:{page}", lambda: render_history(analyzer, page, per_page)
     )
+    return page_response(cached, max_age=seconds_until_next_draw(analyzer))
 
 
 if __name__ == "__main__":